@@ -9,7 +9,7 @@ Sets up some convenience imports for commonly used classes.
 """
 # yapf: enable
 from .auth import AuthClient, InvalidLoginError, InvalidTokenError
-from .common import BaseClient
+from .common import AsyncBaseClient, BaseClient
 # yapf: disable
 from .exceptions import (ClientCancelledOperationError, CustomParamError, Error,
                          InternalServerError, InvalidClientCertificateError, InvalidRequestError,
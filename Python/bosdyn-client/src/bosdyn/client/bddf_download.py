@@ -5,16 +5,25 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """Code for downloading robot data in bddf format."""
+import http.client
 import logging
+import os
 import re
+import shutil
 import ssl
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+from bosdyn.bddf import PROTOBUF_CONTENT_TYPE, StreamDataReader
+from bosdyn.bddf.export import message_class
+from bosdyn.bddf.tools.rewrite import concatenate_files
 from bosdyn.client.time_sync import (NotEstablishedError, TimeSyncClient, TimeSyncEndpoint,
                                      robot_time_range_from_nanoseconds, timespec_to_robot_timespan)
-from bosdyn.util import TIME_FORMAT_DESC
+from bosdyn.util import TIME_FORMAT_DESC, now_nsec
 
 LOGGER = logging.getLogger()
 
@@ -23,6 +32,10 @@ REQUEST_TIMEOUT = 20  # Seconds.
 
 DEFAULT_OUTPUT = "./download.bddf"
 
+PART_SUFFIX = '.part'  # Suffix of a window file until it is completely downloaded.
+MAX_RETRIES = 5  # Times a window download is resumed after an interruption.
+RETRY_DELAY_SEC = 1.0  # Wait before the first resume, doubling for each further retry.
+
 
 def _print_help_timespan():
     print("""\
@@ -64,26 +77,7 @@ def _request_timespan_from_nanoseconds(start_nsec, end_nsec, time_sync_endpoint)
         robot_time_range_from_nanoseconds(start_nsec, end_nsec, time_sync_endpoint))
 
 
-def download_data(  # pylint: disable=too-many-arguments,too-many-locals
-        robot, hostname, start_nsec=None, end_nsec=None, timespan_spec=None, output_filename=None,
-        robot_time=False, channel=None, message_type=None, grpc_service=None, show_progress=False):
-    """
-    Download data from robot in bddf format
-
-    Args:
-      robot:          API robot object
-      hostname:       hostname/ip-address of robot
-      start_nsec:     start time of log
-      end_nsec:       end time of log
-      timespan_spec:  if start_time, end_time are None, string representing the timespan to download
-      robot_time:     if True, timespan is in robot_clock, if False, in host clock
-      channel:        if set, limit data to download to a specific channel
-      message_type:   if set, limit data by specified message-type
-      grpc_service:   if set, limit GRPC log data by name of service
-
-    Returns:
-      output filename, or None on error
-    """
+def _time_sync_endpoint(robot, robot_time):
     time_sync_endpoint = None
     if not robot_time:
         # Establish time sync with robot to obtain skew.
@@ -91,9 +85,12 @@ def download_data(  # pylint: disable=too-many-arguments,too-many-locals
         time_sync_endpoint = TimeSyncEndpoint(time_sync_client)
         if not time_sync_endpoint.establish_timesync():
             raise NotEstablishedError("time sync not established")
+    return time_sync_endpoint
 
-    # Now assemble the query to obtain a bddf file.
 
+def _request_params(  # pylint: disable=too-many-arguments
+        start_nsec, end_nsec, timespan_spec, time_sync_endpoint, channel, message_type,
+        grpc_service):
     # Get the parameters for limiting the timespan of the response.
     if start_nsec or end_nsec:
         get_params = _request_timespan_from_nanoseconds(start_nsec, end_nsec, time_sync_endpoint)
@@ -107,6 +104,34 @@ def download_data(  # pylint: disable=too-many-arguments,too-many-locals
         get_params['type'] = message_type
     if grpc_service:
         get_params['grpc_service'] = grpc_service
+    return get_params
+
+
+def download_data(  # pylint: disable=too-many-arguments,too-many-locals
+        robot, hostname, start_nsec=None, end_nsec=None, timespan_spec=None, output_filename=None,
+        robot_time=False, channel=None, message_type=None, grpc_service=None, show_progress=False):
+    """
+    Download data from robot in bddf format
+
+    Args:
+      robot:          API robot object
+      hostname:       hostname/ip-address of robot
+      start_nsec:     start time of log
+      end_nsec:       end time of log
+      timespan_spec:  if start_time, end_time are None, string representing the timespan to download
+      robot_time:     if True, timespan is in robot_clock, if False, in host clock
+      channel:        if set, limit data to download to a specific channel
+      message_type:   if set, limit data by specified message-type
+      grpc_service:   if set, limit GRPC log data by name of service
+
+    Returns:
+      output filename, or None on error
+    """
+    time_sync_endpoint = _time_sync_endpoint(robot, robot_time)
+
+    # Now assemble the query to obtain a bddf file.
+    get_params = _request_params(start_nsec, end_nsec, timespan_spec, time_sync_endpoint, channel,
+                                 message_type, grpc_service)
 
     # Request the data.
     url = _bddf_url(hostname) + '?{}'.format(urlencode(get_params))
@@ -132,6 +157,297 @@ def download_data(  # pylint: disable=too-many-arguments,too-many-locals
     return outfile
 
 
+class _ResponseStream:
+    """File-like view of an HTTP response, as read by StreamDataReader.
+
+    Each read returns the number of bytes asked for, waiting for them to arrive.  A response which
+     ends in the middle of a read raises EOFError, rather than returning a partial block.  The
+     number of bytes read so far is reported by tell().
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._offset = 0
+
+    def read(self, nbytes):
+        """Read nbytes from the response, or no bytes if the response has ended."""
+        chunks = []
+        remaining = nbytes
+        while remaining:
+            chunk = self._response.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        if chunks and remaining:
+            raise EOFError("Response ended in the middle of a bddf block")
+        block = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        self._offset += len(block)
+        return block
+
+    def tell(self):
+        """Return the number of bytes read so far."""
+        return self._offset
+
+    def seekable(self):  # pylint: disable=no-self-use
+        """An HTTP response cannot be seeked."""
+        return False
+
+    def close(self):
+        """Close the response."""
+        self._response.close()
+
+
+def stream_data(  # pylint: disable=too-many-arguments
+        robot, hostname, start_nsec=None, end_nsec=None, timespan_spec=None, robot_time=False,
+        channel=None, message_type=None, grpc_service=None, series_filter=None):
+    """
+    Generator over the data blocks of a bddf download, parsed as they arrive from the robot
+
+    The response is parsed incrementally with a bosdyn.bddf.StreamDataReader, so no file is
+    written and only the block being parsed is held in memory.  The checksum of the data is
+    verified when the end of the response is reached.
+
+    Args:
+      robot:          API robot object
+      hostname:       hostname/ip-address of robot
+      start_nsec:     start time of log
+      end_nsec:       end time of log
+      timespan_spec:  if start_time, end_time are None, string representing the timespan to download
+      robot_time:     if True, timespan is in robot_clock, if False, in host clock
+      channel:        if set, limit data to download to a specific channel
+      message_type:   if set, limit data by specified message-type
+      grpc_service:   if set, limit GRPC log data by name of service
+      series_filter:  optional function taking a SeriesDescriptor and returning True if the data
+                        of the series should be yielded
+
+    Yields:
+      DataDescriptor, SeriesDescriptor, data (bytes)
+
+    Raises:
+      HTTPError if the robot rejects the request, EOFError if the response ends before the end
+      of the bddf data, bosdyn.bddf.ParseError if the data is not valid bddf.
+    """
+    time_sync_endpoint = _time_sync_endpoint(robot, robot_time)
+    get_params = _request_params(start_nsec, end_nsec, timespan_spec, time_sync_endpoint, channel,
+                                 message_type, grpc_service)
+    url = _bddf_url(hostname) + '?{}'.format(urlencode(get_params))
+    request = Request(url, headers=_http_headers(robot))
+    context = ssl._create_unverified_context()  # pylint: disable=protected-access
+    with urlopen(request, context=context, timeout=REQUEST_TIMEOUT) as resp, \
+            StreamDataReader(_ResponseStream(resp), series_filter=series_filter) as reader:
+        while True:
+            try:
+                yield reader.read_data_block()
+            except EOFError:
+                if reader.checksum is None:
+                    # The end block was never received.
+                    raise
+                return
+
+
+def stream_protobuf_messages(robot, hostname, **kwargs):
+    """
+    Generator over the protobuf messages of a bddf download, decoded as they arrive
+
+    Series which do not hold protobuf messages, or whose message type is not known, are skipped.
+
+    Args:
+      robot:     API robot object
+      hostname:  hostname/ip-address of robot
+      kwargs:    timespan and filter arguments, as for stream_data()
+
+    Yields:
+      SeriesDescriptor, timestamp_nsec (int), deserialized protobuf object
+    """
+    message_classes = {}  # {type name -> protobuf class}
+
+    def _is_protobuf(series_descriptor):
+        if series_descriptor.message_type.content_type != PROTOBUF_CONTENT_TYPE:
+            return False
+        type_name = series_descriptor.message_type.type_name
+        if type_name not in message_classes:
+            try:
+                message_classes[type_name] = message_class(type_name)
+            except KeyError:
+                LOGGER.warning("Skipping series of unknown protobuf type %s", type_name)
+                message_classes[type_name] = None
+        return message_classes[type_name] is not None
+
+    blocks = stream_data(robot, hostname, series_filter=_is_protobuf, **kwargs)
+    try:
+        for desc, series_descriptor, data in blocks:
+            message = message_classes[series_descriptor.message_type.type_name]()
+            message.ParseFromString(data)
+            yield series_descriptor, desc.timestamp.ToNanoseconds(), message
+    finally:
+        # Close the response now, rather than when the generator is collected.
+        blocks.close()
+
+
+def _window_params(get_params, num_windows, time_sync_endpoint):
+    """Split the timespan of the request parameters into consecutive windows.
+
+    Returns a list of request parameters, one for each window.  The to_sec of each window is the
+     from_sec of the next.  A timespan without a start is not split.
+    """
+    if 'from_sec' not in get_params:
+        return [get_params]
+    start_sec = int(get_params['from_sec'])
+    if 'to_sec' in get_params:
+        end_sec = int(get_params['to_sec'])
+    else:
+        end_sec = int(
+            _request_timespan_from_nanoseconds(None, now_nsec(), time_sync_endpoint)['to_sec'])
+    num_windows = max(1, min(num_windows, end_sec - start_sec))
+    bounds = [
+        start_sec + (end_sec - start_sec) * idx // num_windows for idx in range(num_windows + 1)
+    ]
+    return [
+        dict(get_params, from_sec=str(window_start), to_sec=str(window_end))
+        for window_start, window_end in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def _download_window(  # pylint: disable=too-many-arguments
+        url, headers, filename, max_retries=MAX_RETRIES, retry_delay_sec=None,
+        show_progress=False):
+    """Download url to filename, resuming from the last byte received after an interruption.
+
+    Data is written to filename + PART_SUFFIX, which is renamed to filename when it is complete.
+     An existing partial file (e.g., from an earlier run) is resumed, and an existing complete
+     file is not downloaded again.  Resuming uses an HTTP Range request; if the server sends
+     the whole response instead, the download starts again from the beginning.
+
+    Raises HTTPError if the server rejects the request, or the error of the last attempt if the
+     download is interrupted more than max_retries times in a row without progress.
+    """
+    if os.path.exists(filename):
+        return filename
+    if retry_delay_sec is None:
+        retry_delay_sec = RETRY_DELAY_SEC
+    part_filename = filename + PART_SUFFIX
+    context = ssl._create_unverified_context()  # pylint: disable=protected-access
+    num_failures = 0
+    while True:
+        offset = os.path.getsize(part_filename) if os.path.exists(part_filename) else 0
+        request_headers = dict(headers)
+        if offset:
+            request_headers['Range'] = 'bytes={}-'.format(offset)
+        try:
+            with urlopen(Request(url, headers=request_headers), context=context,
+                         timeout=REQUEST_TIMEOUT) as resp:
+                if offset and resp.status != 206:
+                    # The server ignored the Range header and sent the whole response.
+                    offset = 0
+                content_length = resp.headers['Content-Length']
+                num_received = 0
+                with open(part_filename, 'ab' if offset else 'wb') as fid:
+                    while True:
+                        chunk = resp.read(REQUEST_CHUNK_SIZE)
+                        if len(chunk) == 0:
+                            break
+                        if show_progress:
+                            print('.', end='', flush=True)
+                        fid.write(chunk)
+                        num_received += len(chunk)
+                        num_failures = 0
+                # A dropped connection ends the response early without an error.
+                if content_length is not None and num_received < int(content_length):
+                    raise http.client.IncompleteRead(b'', int(content_length) - num_received)
+            break
+        except HTTPError as err:
+            if err.code == 416 and offset:
+                # Range not satisfiable: nothing is left to download after the offset.
+                break
+            LOGGER.error("%s response: %d", url, err.code)
+            raise
+        except (URLError, OSError, http.client.HTTPException) as err:
+            num_failures += 1
+            if num_failures > max_retries:
+                raise
+            delay_sec = retry_delay_sec * 2**(num_failures - 1)
+            LOGGER.warning("Download of %s interrupted (%s), resuming in %.1f sec", filename, err,
+                           delay_sec)
+            time.sleep(delay_sec)
+    os.replace(part_filename, filename)
+    return filename
+
+
+def download_data_parallel(  # pylint: disable=too-many-arguments,too-many-locals
+        robot, hostname, start_nsec=None, end_nsec=None, timespan_spec=None, output_filename=None,
+        output_directory=None, robot_time=False, channel=None, message_type=None,
+        grpc_service=None, num_windows=4, num_connections=None, max_retries=MAX_RETRIES,
+        show_progress=False):
+    """
+    Download data from robot in bddf format, as time windows fetched over concurrent connections
+
+    The timespan is split into num_windows windows of whole seconds, each downloaded to its own
+    file in output_directory.  A window whose download is interrupted resumes from the last byte
+    received, and running the same download again (with an absolute timespan) resumes any
+    windows which were not completed.
+
+    Args:
+      robot:            API robot object
+      hostname:         hostname/ip-address of robot
+      start_nsec:       start time of log
+      end_nsec:         end time of log
+      timespan_spec:    if start_time, end_time are None, string representing the timespan to
+                          download
+      output_filename:  file into which the windows are joined, if output_directory is not set
+                          (default is DEFAULT_OUTPUT)
+      output_directory: if set, keep one file per window in this directory, which can be read
+                          with bosdyn.bddf.MultiFileReader, instead of joining them
+      robot_time:       if True, timespan is in robot_clock, if False, in host clock
+      channel:          if set, limit data to download to a specific channel
+      message_type:     if set, limit data by specified message-type
+      grpc_service:     if set, limit GRPC log data by name of service
+      num_windows:      number of time windows to split the timespan into
+      num_connections:  maximum number of concurrent downloads (default is one per window)
+      max_retries:      times a window is resumed after an interruption without progress
+
+    Returns:
+      output filename, or output directory if set
+
+    Raises:
+      HTTPError if the robot rejects a request, or the error of the last attempt of a window
+      which could not be completed.  Completed and partial windows are left for a later resume.
+    """
+    time_sync_endpoint = _time_sync_endpoint(robot, robot_time)
+    get_params = _request_params(start_nsec, end_nsec, timespan_spec, time_sync_endpoint, channel,
+                                 message_type, grpc_service)
+    windows = _window_params(get_params, num_windows, time_sync_endpoint)
+
+    output_filename = output_filename or DEFAULT_OUTPUT
+    directory = output_directory or output_filename + '.parts'
+    os.makedirs(directory, exist_ok=True)
+    headers = _http_headers(robot)
+    filenames = [
+        os.path.join(
+            directory,
+            'download-{:03d}-{}-{}.bddf'.format(idx, params.get('from_sec', ''),
+                                                 params.get('to_sec', '')))
+        for idx, params in enumerate(windows)
+    ]
+    with ThreadPoolExecutor(max_workers=num_connections or len(windows)) as executor:
+        futures = [
+            executor.submit(_download_window,
+                            _bddf_url(hostname) + '?{}'.format(urlencode(params)), headers,
+                            filename, max_retries, show_progress=show_progress)
+            for params, filename in zip(windows, filenames)
+        ]
+        for future in futures:
+            future.result()
+    if show_progress:
+        print()
+
+    if output_directory:
+        return output_directory
+    concatenate_files(filenames, output_filename)
+    shutil.rmtree(directory)
+    return output_filename
+
+
 def _output_filename(response):
     """Get output filename either from http response, or default value."""
     content = response.headers['Content-Disposition']
@@ -162,6 +478,13 @@ def main():
     parser.add_argument('-o', '--output', help='Output file name (default is "download.bddf"')
     parser.add_argument('-R', '--robot-time', action='store_true',
                         help='Specified timespan is in robot time')
+    parser.add_argument('-n', '--windows', type=int, default=1,
+                        help='Number of time windows to download concurrently (default 1)')
+    parser.add_argument('--connections', type=int,
+                        help='Maximum number of concurrent downloads (default one per window)')
+    parser.add_argument('--output-dir',
+                        help='Keep one file per time window in this directory, instead of joining'
+                        ' them into the output file')
 
     add_common_arguments(parser, credentials_no_warn=True)
     options = parser.parse_args()
@@ -188,10 +511,19 @@ def main():
         LOGGER.error("Cannot authenticate to robot to obtain token: %s", err)
         return 1
 
-    output_filename = download_data(robot, options.hostname, timespan_spec=options.timespan,
-                                    robot_time=options.robot_time, channel=options.channel,
-                                    message_type=options.type, grpc_service=options.service,
-                                    show_progress=True)
+    if options.windows > 1 or options.output_dir:
+        output_filename = download_data_parallel(
+            robot, options.hostname, timespan_spec=options.timespan,
+            output_filename=options.output, output_directory=options.output_dir,
+            robot_time=options.robot_time, channel=options.channel, message_type=options.type,
+            grpc_service=options.service, num_windows=options.windows,
+            num_connections=options.connections, show_progress=True)
+    else:
+        output_filename = download_data(robot, options.hostname, timespan_spec=options.timespan,
+                                        output_filename=options.output,
+                                        robot_time=options.robot_time, channel=options.channel,
+                                        message_type=options.type, grpc_service=options.service,
+                                        show_progress=True)
 
     if not output_filename:
         return 1
@@ -7,6 +7,7 @@
 import logging
 
 import grpc
+import grpc.aio
 
 from .exceptions import (ClientCancelledOperationError, InvalidClientCertificateError,
                          NonexistentAuthorityError, NotFoundError, PermissionDeniedError,
@@ -107,6 +108,53 @@ def create_insecure_channel(address, port, authority=None, options=[]):
     return grpc.insecure_channel(socket, options=complete_options)
 
 
+def create_secure_aio_channel(address, port, creds, authority, options=[]):
+    """Create a secure grpc.aio channel to given host:port.
+
+    The channel must be created, used and closed from the same asyncio event loop.
+
+    Args:
+        address: Connection host address.
+        port: Connection port.
+        creds: A ChannelCredentials instance.
+        authority: Authority option for the channel.
+        options: A list of additional parameters for the GRPC channel.
+
+    Returns:
+        A secure grpc.aio channel.
+    """
+
+    socket = '{}:{}'.format(address, port)
+    complete_options = [('grpc.ssl_target_name_override', authority)]
+    complete_options.extend(options)
+    return grpc.aio.secure_channel(socket, creds, complete_options)
+
+
+def create_insecure_aio_channel(address, port, authority=None, options=[]):
+    """Create an insecure grpc.aio channel to given host and port.
+
+    This method is only used for testing purposes. Applications must use secure channels to
+    communicate with services running on Spot.
+
+    Args:
+        address: Connection host address.
+        port: Connection port.
+        authority: Authority option for the channel.
+        options: A list of additional parameters for the GRPC channel.
+
+    Returns:
+        An insecure grpc.aio channel.
+    """
+
+    socket = '{}:{}'.format(address, port)
+    complete_options = []
+    if authority:
+        complete_options.extend([('grpc.ssl_target_name_override', authority)])
+    if options:
+        complete_options.extend(options)
+    return grpc.aio.insecure_channel(socket, options=complete_options)
+
+
 def translate_exception(rpc_error):
     """Translated a GRPC error into an SDK RpcError.
 
@@ -5,14 +5,15 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """Contains elements common to all service clients."""
-import concurrent
 import copy
 import functools
 import logging
 import socket
+import threading
 import types
 
 import grpc
+import grpc.aio
 from deprecated.sphinx import deprecated
 
 from bosdyn.api.header_pb2 import CommonError
@@ -20,6 +21,8 @@ from bosdyn.deprecated import moved_to
 
 from .channel import TransportError, translate_exception
 from .data_chunk import chunk_message, parse_from_chunks
+from .executor import default_executor
+from .rpc_metrics import NO_MEASUREMENT
 from .exceptions import (CustomParamError, Error, InternalServerError, InvalidRequestError,
                          LeaseUseError, LicenseError, ResponseError, UnsetStatusError)
 
@@ -332,6 +335,7 @@ class BaseClient(object):
         self.lease_wallet = None
         self.client_name = None
         self.executor = None
+        self.rpc_metrics = None
 
     @staticmethod
     @deprecated(reason='Forces serialization even if the logging is not happening.  Do not use.',
@@ -364,6 +368,7 @@ class BaseClient(object):
         self.lease_wallet = other.lease_wallet
         self.client_name = other.client_name
         self.executor = other.executor
+        self.rpc_metrics = other.rpc_metrics
 
     def update_request_iterator(self, request_iterator, logger, rpc_method, is_blocking,
                                 copy_request=True):
@@ -376,9 +381,10 @@ class BaseClient(object):
             yield request
 
     def update_response_iterator(self, response_iterator, logger, rpc_method, is_blocking):
+        # Each response is a new message owned by this iterator, so it is processed in place.
         try:
             for response in response_iterator:
-                response = self._apply_response_processors(copy.deepcopy(response))
+                response = self._apply_response_processors(response)
                 if is_blocking:
                     logger.debug('blocking response: %s\n%s', rpc_method._method, response)
                 else:
@@ -401,16 +407,33 @@ class BaseClient(object):
         value_from_response and error_from_response should not raise their own exceptions!
         Additionally, value_from_response and error_from_response that are not common handlers
         must accept streaming responses if it is a grpc streaming response.
+
+        A streaming response without an assemble_type is collected into a list before it is
+        handled; use call_iterator() to handle each response as it arrives instead.
         """
+        measurement = self._start_measurement(rpc_method)
+        try:
+            return self._call(rpc_method, request, value_from_response, error_from_response,
+                              assemble_type, copy_request, measurement, **kwargs)
+        except Exception as exc:
+            measurement.finish(exc)
+            raise
+        finally:
+            measurement.finish()
+
+    def _call(self, rpc_method, request, value_from_response, error_from_response, assemble_type,
+              copy_request, measurement, **kwargs):
         logger = self._get_logger(rpc_method)
         if isinstance(rpc_method, grpc.StreamUnaryMultiCallable) or isinstance(
                 rpc_method, grpc.StreamStreamMultiCallable):
             # The incoming request is a streaming request.
             request = self.update_request_iterator(request, logger, rpc_method, is_blocking=True,
                                                    copy_request=copy_request)
+            request = measurement.requests(request)
         else:
             request = self._apply_request_processors(request, copy_request=copy_request)
             logger.debug('blocking request: %s\n%s', rpc_method._method, request)
+            measurement.add_request(request)
 
         try:
             timeout = kwargs.pop('timeout', DEFAULT_RPC_TIMEOUT)
@@ -431,7 +454,7 @@ class BaseClient(object):
                 # We cannot explicitly check for them until the RPC deadline has been exceeded.
                 # To make due, we attempt to parse the response and catch transport errors raised while iterating through the responses.
                 try:
-                    parse_from_chunks(response, msg)
+                    parse_from_chunks(measurement.responses(response), msg)
                 except TransportError as e:
                     raise translate_exception(e) from None
 
@@ -439,15 +462,69 @@ class BaseClient(object):
                 logger.debug('response: %s\n%s', rpc_method._method, msg)
                 return self.handle_response(msg, error_from_response, value_from_response)
             else:
-                responses = self.update_response_iterator(response, logger, rpc_method,
-                                                          is_blocking=True)
+                responses = self.update_response_iterator(measurement.responses(response),
+                                                          logger, rpc_method, is_blocking=True)
                 return self.handle_response_streaming(list(responses), error_from_response,
                                                       value_from_response)
         else:
+            measurement.add_response(response)
             response = self._apply_response_processors(response)
             logger.debug('response: %s\n%s', rpc_method._method, response)
             return self.handle_response(response, error_from_response, value_from_response)
 
+    @process_kwargs
+    def call_iterator(self, rpc_method, request, value_from_response=None,
+                      error_from_response=None, copy_request=True, **kwargs):
+        """Returns an iterator over the results of a streaming rpc_method(request, kwargs).
+
+        Each response is passed through the response processors, error_from_response and
+        value_from_response as it arrives, and is handed to the caller without being copied or
+        collected with the rest of the stream.  Unlike for call(), error_from_response and
+        value_from_response take a single response, as for unary rpcs.  An error from
+        error_from_response or from the transport is raised by the iterator, ending the stream.
+        Closing the iterator, or dropping it, before the end of the stream cancels the rpc, even if
+        iteration never started.
+        """
+        logger = self._get_logger(rpc_method)
+        timeout = kwargs.pop('timeout', DEFAULT_RPC_TIMEOUT)
+        measurement = self._start_measurement(rpc_method)
+        try:
+            if isinstance(rpc_method, grpc.StreamStreamMultiCallable):
+                # The incoming request is a streaming request.
+                request = measurement.requests(
+                    self.update_request_iterator(request, logger, rpc_method, is_blocking=True,
+                                                 copy_request=copy_request))
+            else:
+                request = self._apply_request_processors(request, copy_request=copy_request)
+                measurement.add_request(request)
+            try:
+                response_iterator = rpc_method(request, timeout=timeout, **kwargs)
+            except TransportError as e:
+                raise translate_exception(e) from None
+        except Exception as exc:
+            measurement.finish(exc)
+            raise
+        results = self._iterate_responses(response_iterator, logger, rpc_method,
+                                          error_from_response, value_from_response, measurement)
+        return _ResponseIterator(results, response_iterator, measurement)
+
+    def _iterate_responses(self, response_iterator, logger, rpc_method, error_from_response,
+                           value_from_response, measurement):
+        error = None
+        try:
+            for response in self.update_response_iterator(measurement.responses(response_iterator),
+                                                          logger, rpc_method, is_blocking=True):
+                yield self.handle_response(response, error_from_response, value_from_response)
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            measurement.finish(error)
+            # Cancelling a finished rpc does nothing.
+            cancel = getattr(response_iterator, 'cancel', None)
+            if cancel is not None:
+                cancel()
+
     def handle_response(self, response, error_from_response, value_from_response):
         if error_from_response is not None:
             exc = error_from_response(response)
@@ -479,27 +556,44 @@ class BaseClient(object):
 
         call_async does not accept streaming rpcs, see 'call_async_streaming'.
         """
-        request = self._apply_request_processors(request, copy_request=copy_request)
         logger = self._get_logger(rpc_method)
-        logger.debug('async request: %s\n%s', rpc_method._method, request)
         timeout = kwargs.pop('timeout', DEFAULT_RPC_TIMEOUT)
-        response_future = rpc_method.future(request, timeout=timeout, **kwargs)
+        measurement = self._start_measurement(rpc_method)
+        request = self._apply_request_processors(request, copy_request=copy_request)
+        logger.debug('async request: %s\n%s', rpc_method._method, request)
+        measurement.add_request(request)
+        try:
+            response_future = rpc_method.future(request, timeout=timeout, **kwargs)
+        except Exception as exc:
+            measurement.finish(exc)
+            raise
 
         def on_finish(fut):
             try:
                 result = fut.result()
             except Exception as exc:  # pylint: disable=broad-except
                 logger.debug('async exception: %s\n%s\n', rpc_method._method, exc)
+                if isinstance(exc, TransportError):
+                    exc = translate_exception(exc)
+                measurement.finish(exc)
             else:
+                measurement.add_response(result)
                 try:
                     self._apply_response_processors(result)
                 except Exception:  # pylint: disable=broad-except
                     logger.exception("Error applying response processors.")
                 else:
                     logger.debug('async response: %s\n%s', rpc_method._method, result)
-
+                if measurement is not NO_MEASUREMENT:
+                    # The error is raised to the caller by FutureWrapper.result(), which computes
+                    # it only once.
+                    error = future._error_from_result()  # pylint: disable=protected-access
+                    measurement.finish(error)
+                measurement.finish()
+
+        future = FutureWrapper(response_future, value_from_response, error_from_response)
         response_future.add_done_callback(on_finish)
-        return FutureWrapper(response_future, value_from_response, error_from_response)
+        return future
 
     @process_kwargs
     def call_async_streaming(self, rpc_method, request, value_from_response=None,
@@ -510,11 +604,12 @@ class BaseClient(object):
         value_from_response and error_from_response should not raise their own exceptions.
 
         A version of 'call_async' for streaming rpcs. True async streaming calls are not supported by
-        python grpc. Instead, this call creates a thread that runs the synchronous 'call' function.
+        python grpc. Instead, this call runs the synchronous 'call' function on the executor shared
+        by the clients of the Sdk, or by default_executor() if the client has none.
         """
         request = self._apply_request_processors(request, copy_request=copy_request)
         if self.executor is None:
-            self.executor = concurrent.futures.ThreadPoolExecutor()
+            self.executor = default_executor()
 
         future = self.executor.submit(self.call, rpc_method, request, assemble_type=assemble_type,
                                       copy_request=copy_request, **kwargs)
@@ -536,6 +631,15 @@ class BaseClient(object):
             proc.mutate(response)
         return response
 
+    def _start_measurement(self, rpc_method):
+        """Return the RpcMeasurement of a call of rpc_method, if the client's rpcs are measured."""
+        if self.rpc_metrics is None:
+            return NO_MEASUREMENT
+        method_name = getattr(rpc_method, '_method', None)
+        if isinstance(method_name, bytes):
+            method_name = method_name.decode()
+        return self.rpc_metrics.start((method_name or repr(rpc_method)).lstrip('/'))
+
     def _get_logger(self, rpc_method):
         method_name = getattr(rpc_method, '_method', None)
         if method_name:
@@ -547,6 +651,200 @@ class BaseClient(object):
     chunk_message = moved_to(chunk_message, version='3.3.0')
 
 
+class AsyncBaseClient(BaseClient):
+    """Helper base class for clients which can also call their service from an asyncio loop.
+
+    The *_aio methods of these clients are coroutines which call the service over a grpc.aio
+    channel, so a single event loop may have many calls in flight without a thread for each.
+    Requests and responses go through the same processors and error handling as for call().
+
+    The aio channel is either set directly or, on first use, created by aio_channel_factory,
+    which Robot.ensure_client() sets.  A grpc.aio channel may only be used from the event loop it
+    was created in.
+    """
+
+    def __init__(self, stub_creation_func, name=None):
+        super(AsyncBaseClient, self).__init__(stub_creation_func, name=name)
+        self._aio_channel = None
+        self._aio_stub = None
+        self.aio_channel_factory = None
+
+    @property
+    def aio_channel(self):
+        if self._aio_channel is None:
+            if self.aio_channel_factory is None:
+                raise Error('Client aio channel is unset!')
+            self.aio_channel = self.aio_channel_factory()
+        return self._aio_channel
+
+    @aio_channel.setter
+    def aio_channel(self, channel):
+        self._aio_channel = channel
+        self._aio_stub = None
+
+    @property
+    def aio_stub(self):
+        """The stub for calling the service over the aio channel."""
+        if self._aio_stub is None:
+            self._aio_stub = self._stub_creation_func(self.aio_channel)
+        return self._aio_stub
+
+    def _aio_request(self, rpc_method, request, logger, copy_request, measurement):
+        """Return the request, or request iterator, for rpc_method after running processors."""
+        if isinstance(rpc_method, (grpc.aio.StreamUnaryMultiCallable,
+                                   grpc.aio.StreamStreamMultiCallable)):
+            return measurement.requests(
+                self.update_request_iterator(request, logger, rpc_method, is_blocking=False,
+                                             copy_request=copy_request))
+        request = self._apply_request_processors(request, copy_request=copy_request)
+        logger.debug('aio request: %s\n%s', rpc_method._method, request)
+        measurement.add_request(request)
+        return request
+
+    @process_kwargs
+    async def call_aio(self, rpc_method, request, value_from_response=None,
+                       error_from_response=None, copy_request=True, **kwargs):
+        """Coroutine returning the result of rpc_method(request, kwargs) after running processors.
+
+        The asyncio version of call() for rpcs with a single response.  rpc_method must be a method
+        of aio_stub.
+
+        call_aio does not accept streaming responses, see 'call_aio_streaming'.
+        """
+        logger = self._get_logger(rpc_method)
+        timeout = kwargs.pop('timeout', DEFAULT_RPC_TIMEOUT)
+        measurement = self._start_measurement(rpc_method)
+        try:
+            request = self._aio_request(rpc_method, request, logger, copy_request, measurement)
+            try:
+                response = await rpc_method(request, timeout=timeout, **kwargs)
+            except TransportError as e:
+                raise translate_exception(e) from None
+            measurement.add_response(response)
+            response = self._apply_response_processors(response)
+            logger.debug('aio response: %s\n%s', rpc_method._method, response)
+            return self.handle_response(response, error_from_response, value_from_response)
+        except Exception as exc:
+            measurement.finish(exc)
+            raise
+        finally:
+            measurement.finish()
+
+    @process_kwargs
+    async def call_aio_streaming(self, rpc_method, request, value_from_response=None,
+                                 error_from_response=None, assemble_type=None, copy_request=True,
+                                 **kwargs):
+        """Coroutine returning the result of a streaming rpc_method(request, kwargs).
+
+        The asyncio version of call() for rpcs with streaming responses: the responses are
+        assembled into an assemble_type message or, without an assemble_type, collected into a
+        list before they are handled.  Use call_aio_iterator() to handle each response as it
+        arrives instead.
+        """
+        logger = self._get_logger(rpc_method)
+        timeout = kwargs.pop('timeout', DEFAULT_RPC_TIMEOUT)
+        measurement = self._start_measurement(rpc_method)
+        try:
+            request = self._aio_request(rpc_method, request, logger, copy_request, measurement)
+            try:
+                responses = [
+                    response
+                    async for response in rpc_method(request, timeout=timeout, **kwargs)
+                ]
+            except TransportError as e:
+                raise translate_exception(e) from None
+            for response in responses:
+                measurement.add_response(response)
+            if assemble_type is not None:
+                msg = assemble_type()
+                parse_from_chunks(responses, msg)
+                msg = self._apply_response_processors(msg)
+                logger.debug('aio response: %s\n%s', rpc_method._method, msg)
+                return self.handle_response(msg, error_from_response, value_from_response)
+            for response in responses:
+                self._apply_response_processors(response)
+                logger.debug('aio response: %s\n%s', rpc_method._method, response)
+            return self.handle_response_streaming(responses, error_from_response,
+                                                  value_from_response)
+        except Exception as exc:
+            measurement.finish(exc)
+            raise
+        finally:
+            measurement.finish()
+
+    @process_kwargs
+    async def call_aio_iterator(self, rpc_method, request, value_from_response=None,
+                                error_from_response=None, copy_request=True, **kwargs):
+        """Asynchronous iterator over the results of a streaming rpc_method(request, kwargs).
+
+        The asyncio version of call_iterator(): each response is processed and handled as it
+        arrives, and stopping the iteration early cancels the rpc.  The rpc is only started by
+        the first iteration, so an iterator which is never iterated does nothing.
+        """
+        logger = self._get_logger(rpc_method)
+        timeout = kwargs.pop('timeout', DEFAULT_RPC_TIMEOUT)
+        measurement = self._start_measurement(rpc_method)
+        response_call = None
+        error = None
+        try:
+            request = self._aio_request(rpc_method, request, logger, copy_request, measurement)
+            response_call = rpc_method(request, timeout=timeout, **kwargs)
+            async for response in response_call:
+                measurement.add_response(response)
+                response = self._apply_response_processors(response)
+                logger.debug('aio response: %s\n%s', rpc_method._method, response)
+                yield self.handle_response(response, error_from_response, value_from_response)
+        except TransportError as e:
+            error = translate_exception(e)
+            raise error from None
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            measurement.finish(error)
+            if response_call is not None:
+                # Cancelling a finished rpc does nothing.
+                response_call.cancel()
+
+    def _stub_for_call(self, call_func):
+        """Return the stub with the rpc methods taken by call_func, such as call or call_aio."""
+        if call_func == self.call_aio:  # pylint: disable=comparison-with-callable
+            return self.aio_stub
+        return self._stub
+
+
+class _ResponseIterator(object):
+    """Iterator over the results of a streaming rpc, returned by BaseClient.call_iterator().
+
+    The iterator owns the rpc: closing it, or dropping it, cancels the rpc and finishes its
+    measurement, whether or not iteration has started.
+    """
+
+    def __init__(self, results, response_call, measurement):
+        self._results = results
+        self._response_call = response_call
+        self._measurement = measurement
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._results)
+
+    def close(self):
+        """Stop the iteration and cancel the rpc, if it has not finished."""
+        # Closing a generator which has not started does not run its cleanup, so repeat it here.
+        self._results.close()
+        self._measurement.finish()
+        # Cancelling a finished rpc does nothing.
+        cancel = getattr(self._response_call, 'cancel', None)
+        if cancel is not None:
+            cancel()
+
+    def __del__(self):
+        self.close()
+
+
 class FutureWrapper():
     """Wraps a Future to aid more complicated clients' async calls."""
 
@@ -555,6 +853,9 @@ class FutureWrapper():
         self._error_from_response = error_from_response
         self._value_from_response = value_from_response
         self._is_streaming = is_streaming
+        self._response_error_lock = threading.Lock()
+        self._response_error = None
+        self._has_response_error = False
 
     def __repr__(self):
         return self.original_future.__repr__()
@@ -595,9 +896,7 @@ class FutureWrapper():
         error = self.original_future.exception(**kwargs)
 
         if error is None:
-            if self._error_from_response is None:
-                return None
-            return self._error_from_response(self.original_future.result())
+            return self._error_from_result()
 
         # 'call_async_streaming' uses the non-async 'call' function. 'call' does all of it's
         # own error handling so just return any errors from that call as is.
@@ -606,6 +905,16 @@ class FutureWrapper():
 
         return translate_exception(error)
 
+    def _error_from_result(self):
+        """Return error_from_response of the result, calling it only once for the future."""
+        if self._error_from_response is None:
+            return None
+        with self._response_error_lock:
+            if not self._has_response_error:
+                self._response_error = self._error_from_response(self.original_future.result())
+                self._has_response_error = True
+            return self._response_error
+
 
 def get_self_ip(robot_hostname):
     """ Get the IP address of the ethernet or WiFi interface used to talk to the robot."""
@@ -26,7 +26,7 @@ import bosdyn.api.data_buffer_service_pb2_grpc as data_buffer_service
 from bosdyn import util as core_util
 from bosdyn.api import parameter_pb2
 from bosdyn.client import time_sync
-from bosdyn.client.common import BaseClient, common_header_errors
+from bosdyn.client.common import AsyncBaseClient, common_header_errors
 from bosdyn.client.exceptions import Error, ResponseError, RpcError
 
 
@@ -105,7 +105,7 @@ def make_parameter(label, value, units="", notes=""):
     return parameter
 
 
-class DataBufferClient(BaseClient):
+class DataBufferClient(AsyncBaseClient):
     """A client for adding to robot data buffer."""
 
     default_service_name = 'data-buffer'
@@ -140,11 +140,15 @@ class DataBufferClient(BaseClient):
         """Async version of add_text_messages."""
         return self._do_add_text_messages(self.call_async, text_messages, **kwargs)
 
+    async def add_text_messages_aio(self, text_messages, **kwargs):
+        """Asyncio version of add_text_messages."""
+        return await self._do_add_text_messages(self.call_aio, text_messages, **kwargs)
+
     def _do_add_text_messages(self, func, text_messages, **kwargs):
         """Internal text message RPC stub call."""
         request = data_buffer_protos.RecordTextMessagesRequest()
         request.text_messages.extend(text_messages)
-        return func(self._stub.RecordTextMessages, request, value_from_response=None,
+        return func(self._stub_for_call(func).RecordTextMessages, request, value_from_response=None,
                     error_from_response=common_header_errors, **kwargs)
 
     def add_operator_comment(self, msg, robot_timestamp=None, **kwargs):
@@ -164,14 +168,18 @@ class DataBufferClient(BaseClient):
         """Async version of add_operator_comment."""
         return self._do_add_operator_comment(self.call_async, msg, robot_timestamp, **kwargs)
 
+    async def add_operator_comment_aio(self, msg, robot_timestamp=None, **kwargs):
+        """Asyncio version of add_operator_comment."""
+        return await self._do_add_operator_comment(self.call_aio, msg, robot_timestamp, **kwargs)
+
     def _do_add_operator_comment(self, func, msg, robot_timestamp=None, **kwargs):
         """Internal operator comment RPC stub call."""
         request = data_buffer_protos.RecordOperatorCommentsRequest()
         robot_timestamp = robot_timestamp or self.now_in_robot_basis(msg_type="Operator Comment")
         # pylint: disable=no-member
         request.operator_comments.add(message=msg, timestamp=robot_timestamp)
-        return func(self._stub.RecordOperatorComments, request, value_from_response=None,
-                    error_from_response=common_header_errors, **kwargs)
+        return func(self._stub_for_call(func).RecordOperatorComments, request,
+                    value_from_response=None, error_from_response=common_header_errors, **kwargs)
 
     def add_blob(self, data, type_id, channel=None, robot_timestamp=None, write_sync=False,
                  **kwargs):
@@ -198,6 +206,12 @@ class DataBufferClient(BaseClient):
         return self._do_add_blob(self.call_async, data, type_id, channel, robot_timestamp,
                                  write_sync, **kwargs)
 
+    async def add_blob_aio(self, data, type_id, channel=None, robot_timestamp=None,
+                           write_sync=False, **kwargs):
+        """Asyncio version of add_blob."""
+        return await self._do_add_blob(self.call_aio, data, type_id, channel, robot_timestamp,
+                                       write_sync, **kwargs)
+
     def _do_add_blob(  # pylint: disable=too-many-arguments
             self, func, data, type_id, channel, robot_timestamp, write_sync, **kwargs):
         """Internal blob RPC stub call."""
@@ -213,7 +227,7 @@ class DataBufferClient(BaseClient):
 
         request.sync = write_sync
 
-        return func(self._stub.RecordDataBlobs, request, value_from_response=None,
+        return func(self._stub_for_call(func).RecordDataBlobs, request, value_from_response=None,
                     error_from_response=common_header_errors, **kwargs)
 
     def add_protobuf(self, proto, channel=None, robot_timestamp=None, write_sync=False):
@@ -234,6 +248,11 @@ class DataBufferClient(BaseClient):
         return self._do_add_protobuf(self.add_blob_async, proto, channel, robot_timestamp,
                                      write_sync)
 
+    async def add_protobuf_aio(self, proto, channel=None, robot_timestamp=None, write_sync=False):
+        """Asyncio version of add_protobuf."""
+        return await self._do_add_protobuf(self.add_blob_aio, proto, channel, robot_timestamp,
+                                           write_sync)
+
     def _do_add_protobuf(self, func, proto, channel, robot_timestamp, write_sync):
         """Internal blob stub call, serializes proto and logs as blob."""
         binary_data = proto.SerializeToString()
@@ -258,6 +277,10 @@ class DataBufferClient(BaseClient):
         """Async version of add_events."""
         return self._do_add_events(self.call_async, events, **kwargs)
 
+    async def add_events_aio(self, events, **kwargs):
+        """Asyncio version of add_events."""
+        return await self._do_add_events(self.call_aio, events, **kwargs)
+
     def _do_add_events(self, func, events, **kwargs):
         """Internal event stub call."""
         request = data_buffer_protos.RecordEventsRequest()
@@ -265,7 +288,7 @@ class DataBufferClient(BaseClient):
         for event in events:
             request.events.add().CopyFrom(event)  # pylint: disable=no-member
 
-        return func(self._stub.RecordEvents, request, value_from_response=None,
+        return func(self._stub_for_call(func).RecordEvents, request, value_from_response=None,
                     error_from_response=common_header_errors, **kwargs)
 
     def register_signal_schema(self, variables, schema_name, **kwargs):
@@ -285,6 +308,11 @@ class DataBufferClient(BaseClient):
         """Async version of register_signal_schema"""
         return self._do_register_signal_schema(self.call_async, variables, schema_name, **kwargs)
 
+    async def register_signal_schema_aio(self, variables, schema_name, **kwargs):
+        """Asyncio version of register_signal_schema"""
+        return await self._do_register_signal_schema(self.call_aio, variables, schema_name,
+                                                     **kwargs)
+
     def _do_register_signal_schema(self, func, variables, schema_name, **kwargs):
         """Internal register stub call."""
         tick_schema = data_buffer_protos.SignalSchema(vars=variables, schema_name=schema_name)
@@ -294,7 +322,7 @@ class DataBufferClient(BaseClient):
         # response from the server to get the schema id. The response does not include the schema
         # itself so use a partial to process the response appropriately.
         value_from_response = functools.partial(self._save_schema_id, tick_schema)
-        return func(self._stub.RegisterSignalSchema, request,
+        return func(self._stub_for_call(func).RegisterSignalSchema, request,
                     value_from_response=value_from_response,
                     error_from_response=common_header_errors, **kwargs)
 
@@ -326,6 +354,13 @@ class DataBufferClient(BaseClient):
         return self._do_add_signal_tick(self.call_async, data, schema_id, encoding, sequence_id,
                                         source, **kwargs)
 
+    async def add_signal_tick_aio(  # pylint: disable=too-many-arguments,no-member
+            self, data, schema_id, encoding=data_buffer_protos.SignalTick.ENCODING_RAW,
+            sequence_id=0, source="client", **kwargs):
+        """Asyncio version of add_signal_tick."""
+        return await self._do_add_signal_tick(self.call_aio, data, schema_id, encoding,
+                                              sequence_id, source, **kwargs)
+
     def _do_add_signal_tick(  # pylint: disable=too-many-arguments
             self, func, data, schema_id, encoding, sequence_id, source, **kwargs):
         """Internal add signal tick stub call."""
@@ -336,7 +371,7 @@ class DataBufferClient(BaseClient):
         request.tick_data.add(  # pylint: disable=no-member
             sequence_id=sequence_id, source=source, schema_id=schema_id, encoding=encoding,
             data=data)
-        return func(self._stub.RecordSignalTicks, request, value_from_response=None,
+        return func(self._stub_for_call(func).RecordSignalTicks, request, value_from_response=None,
                     error_from_response=common_header_errors, **kwargs)
 
     def _save_schema_id(self, schema, response):
@@ -0,0 +1,104 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Thread pool shared by the clients of an Sdk for calls which run in the background."""
+
+import collections
+import concurrent.futures
+import threading
+
+# Largest number of threads of an executor, unless set otherwise.
+DEFAULT_MAX_WORKERS = 8
+
+ExecutorMetrics = collections.namedtuple(
+    'ExecutorMetrics', ['max_workers', 'active_workers', 'queue_depth', 'completed'])
+ExecutorMetrics.__doc__ = """How busy a SharedExecutor is.
+
+    max_workers:     largest number of threads of the executor.
+    active_workers:  number of tasks running now.
+    queue_depth:     number of tasks submitted and waiting for a thread.
+    completed:       number of tasks which have finished, successfully or not.
+"""
+
+
+class SharedExecutor(concurrent.futures.ThreadPoolExecutor):
+    """ThreadPoolExecutor with a bounded number of threads, which reports how busy it is.
+
+    One executor is shared by all the clients of an Sdk (see BaseClient.call_async_streaming()),
+    instead of each client starting its own thread pool.  Tasks beyond max_workers wait in a
+    queue, so long-running loops should keep their own threads rather than hold a worker.
+
+    Args:
+        max_workers: Largest number of threads to run tasks on.
+        thread_name_prefix: Prefix of the names of the threads.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix='bosdyn-executor'):
+        super(SharedExecutor, self).__init__(max_workers=max_workers,
+                                             thread_name_prefix=thread_name_prefix)
+        self._metrics_lock = threading.Lock()
+        self._num_submitted = 0
+        self._num_active = 0
+        self._num_completed = 0
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def submit(self, fn, *args, **kwargs):  # pylint: disable=arguments-differ
+        with self._metrics_lock:
+            self._num_submitted += 1
+        try:
+            future = super(SharedExecutor, self).submit(self._run, fn, args, kwargs)
+        except RuntimeError:
+            # The executor has been shut down, so the task will never run.
+            self._forget_task()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def metrics(self):
+        """Return the ExecutorMetrics of the executor now."""
+        with self._metrics_lock:
+            return ExecutorMetrics(
+                max_workers=self._max_workers, active_workers=self._num_active,
+                queue_depth=self._num_submitted - self._num_active - self._num_completed,
+                completed=self._num_completed)
+
+    def _forget_task(self):
+        with self._metrics_lock:
+            self._num_submitted -= 1
+
+    def _on_done(self, future):
+        # A task cancelled while waiting in the queue never runs.
+        if future.cancelled():
+            self._forget_task()
+
+    def _run(self, fn, args, kwargs):
+        with self._metrics_lock:
+            self._num_active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._metrics_lock:
+                self._num_active -= 1
+                self._num_completed += 1
+
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def default_executor():
+    """Return the SharedExecutor used by clients which were not given one, creating it if needed.
+
+    Clients created through an Sdk use the executor of the Sdk instead.
+    """
+    global _default_executor  # pylint: disable=global-statement
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = SharedExecutor()
+        return _default_executor
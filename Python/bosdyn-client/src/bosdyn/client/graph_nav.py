@@ -15,7 +15,7 @@ from deprecated.sphinx import deprecated
 from bosdyn.api import data_chunk_pb2, lease_pb2
 from bosdyn.api.graph_nav import (graph_nav_pb2, graph_nav_service_pb2, graph_nav_service_pb2_grpc,
                                   map_pb2, nav_pb2)
-from bosdyn.client.common import (BaseClient, common_header_errors, common_lease_errors,
+from bosdyn.client.common import (AsyncBaseClient, common_header_errors, common_lease_errors,
                                   error_factory, error_pair, handle_common_header_errors,
                                   handle_lease_use_result_errors, handle_license_errors_if_present,
                                   handle_unset_status_error)
@@ -23,7 +23,7 @@ from bosdyn.client.exceptions import Error, InvalidRequestError, ResponseError,
 from bosdyn.client.lease import add_lease_wallet_processors
 
 
-class GraphNavClient(BaseClient):
+class GraphNavClient(AsyncBaseClient):
     """Client to the GraphNav service."""
     default_service_name = 'graph-nav-service'
     service_type = 'bosdyn.api.graph_nav.GraphNavService'
@@ -122,6 +122,20 @@ class GraphNavClient(BaseClient):
         return self.call_async(self._stub.SetLocalization, req, _localization_from_response,
                                _set_localization_error, copy_request=False, **kwargs)
 
+    async def set_localization_aio(
+            self, initial_guess_localization, ko_tform_body=None, max_distance=None, max_yaw=None,
+            fiducial_init=graph_nav_pb2.SetLocalizationRequest.FIDUCIAL_INIT_NEAREST,
+            use_fiducial_id=None, refine_fiducial_result_with_icp=False, do_ambiguity_check=False,
+            refine_with_visual_features=False, verify_visual_features_quality=False, **kwargs):
+        """Asyncio version of set_localization()"""
+        req = self._build_set_localization_request(
+            initial_guess_localization, ko_tform_body, max_distance, max_yaw, fiducial_init,
+            use_fiducial_id, refine_fiducial_result_with_icp, do_ambiguity_check,
+            refine_with_visual_features, verify_visual_features_quality)
+        return await self.call_aio(self.aio_stub.SetLocalization, req,
+                                   _localization_from_response, _set_localization_error,
+                                   copy_request=False, **kwargs)
+
     def get_localization_state(
             self,
             request_live_point_cloud=False,
@@ -164,6 +178,21 @@ class GraphNavClient(BaseClient):
         return self.call_async(self._stub.GetLocalizationState, req, None, common_header_errors,
                                copy_request=False, **kwargs)
 
+    async def get_localization_state_aio(
+            self, request_live_point_cloud=False, request_live_images=False,
+            request_live_terrain_maps=False, request_live_world_objects=False,
+            request_live_robot_state=False, waypoint_id=None, request_gps_state=False, **kwargs):
+        """Asyncio version of get_localization_state()."""
+        req = self._build_get_localization_state_request(
+            request_live_point_cloud=request_live_point_cloud,
+            request_live_images=request_live_images,
+            request_live_terrain_maps=request_live_terrain_maps,
+            request_live_world_objects=request_live_world_objects,
+            request_live_robot_state=request_live_robot_state, waypoint_id=waypoint_id,
+            request_gps_state=request_gps_state)
+        return await self.call_aio(self.aio_stub.GetLocalizationState, req, None,
+                                   common_header_errors, copy_request=False, **kwargs)
+
     def navigate_route(self, route, cmd_duration, route_follow_params=None, travel_params=None,
                        leases=None, timesync_endpoint=None, command_id=None,
                        destination_waypoint_tform_body_goal=None, **kwargs):
@@ -224,6 +253,22 @@ class GraphNavClient(BaseClient):
                                _command_id_from_navigate_route_response, _navigate_route_error,
                                copy_request=False, **kwargs)
 
+    async def navigate_route_aio(self, route, cmd_duration, route_follow_params=None,
+                                 travel_params=None, leases=None, timesync_endpoint=None,
+                                 command_id=None, destination_waypoint_tform_body_goal=None,
+                                 **kwargs):
+        """Asyncio version of navigate_route()"""
+        used_endpoint = timesync_endpoint or self._timesync_endpoint
+        if not used_endpoint:
+            raise GraphNavServiceResponseError(response=None, error_message='No timesync endpoint!')
+        request = self._build_navigate_route_request(route, route_follow_params, travel_params,
+                                                     cmd_duration, leases, used_endpoint,
+                                                     command_id,
+                                                     destination_waypoint_tform_body_goal)
+        return await self.call_aio(self.aio_stub.NavigateRoute, request,
+                                   _command_id_from_navigate_route_response, _navigate_route_error,
+                                   copy_request=False, **kwargs)
+
     def navigate_route_full(self, route, route_follow_params, cmd_duration, travel_params=None,
                             leases=None, timesync_endpoint=None, command_id=None,
                             destination_waypoint_tform_body_goal=None, **kwargs):
@@ -326,6 +371,23 @@ class GraphNavClient(BaseClient):
                                value_from_response=_command_id_from_navigate_route_response,
                                error_from_response=_navigate_to_error, copy_request=False, **kwargs)
 
+    async def navigate_to_aio(self, destination_waypoint_id, cmd_duration, route_params=None,
+                              travel_params=None, leases=None, timesync_endpoint=None,
+                              command_id=None, destination_waypoint_tform_body_goal=None,
+                              route_blocked_behavior=None, **kwargs):
+        """Asyncio version of navigate_to()."""
+        used_endpoint = timesync_endpoint or self._timesync_endpoint
+        if not used_endpoint:
+            raise GraphNavServiceResponseError(response=None, error_message='No timesync endpoint!')
+        request = self._build_navigate_to_request(destination_waypoint_id, travel_params,
+                                                  route_params, cmd_duration, leases, used_endpoint,
+                                                  command_id, destination_waypoint_tform_body_goal,
+                                                  route_blocked_behavior)
+        return await self.call_aio(self.aio_stub.NavigateTo, request,
+                                   value_from_response=_command_id_from_navigate_route_response,
+                                   error_from_response=_navigate_to_error, copy_request=False,
+                                   **kwargs)
+
     def navigate_to_full(self, destination_waypoint_id, cmd_duration, route_params=None,
                          travel_params=None, leases=None, timesync_endpoint=None, command_id=None,
                          destination_waypoint_tform_body_goal=None, route_blocked_behavior=None,
@@ -456,6 +518,14 @@ class GraphNavClient(BaseClient):
                                error_from_response=_navigate_feedback_error, copy_request=False,
                                **kwargs)
 
+    async def navigation_feedback_aio(self, command_id=0, **kwargs):
+        """Asyncio version of navigation_feedback()."""
+        request = self._build_navigate_feedback_request(command_id)
+        return await self.call_aio(self.aio_stub.NavigationFeedback, request,
+                                   value_from_response=_get_response,
+                                   error_from_response=_navigate_feedback_error,
+                                   copy_request=False, **kwargs)
+
     def clear_graph(self, lease=None, **kwargs):
         """Clears the local graph structure. Also erases any snapshots currently in RAM.
 
@@ -592,6 +662,25 @@ class GraphNavClient(BaseClient):
                                error_from_response=common_header_errors, copy_request=False,
                                **kwargs)
 
+    async def download_graph_aio(self, **kwargs):
+        """Asyncio version of download_graph()."""
+        request = self._build_download_graph_request()
+        # Use streaming to download the graph, if applicable.
+        if self._use_streaming_graph_upload:
+            try:
+                return await self.call_aio_streaming(
+                    self.aio_stub.DownloadGraphStreaming, request,
+                    value_from_response=_get_streamed_download_graph,
+                    error_from_response=_download_graph_stream_errors, copy_request=False,
+                    **kwargs)
+            except UnimplementedError:
+                print('DownloadGraphStreaming unimplemented. Old robot release?')
+                # Continue to regular DownloadGraph.
+        return await self.call_aio(self.aio_stub.DownloadGraph, request,
+                                   value_from_response=_get_graph,
+                                   error_from_response=common_header_errors, copy_request=False,
+                                   **kwargs)
+
     def download_waypoint_snapshot(
             self,
             waypoint_snapshot_id,
@@ -619,6 +708,18 @@ class GraphNavClient(BaseClient):
                          error_from_response=_download_waypoint_snapshot_stream_errors,
                          copy_request=False, **kwargs)
 
+    async def download_waypoint_snapshot_aio(self, waypoint_snapshot_id, download_images=False,
+                                             do_not_download_point_cloud=False, **kwargs):
+        """Asyncio version of download_waypoint_snapshot()."""
+        request = self._build_download_waypoint_snapshot_request(waypoint_snapshot_id,
+                                                                 download_images,
+                                                                 do_not_download_point_cloud)
+        return await self.call_aio_streaming(
+            self.aio_stub.DownloadWaypointSnapshot, request,
+            value_from_response=_get_streamed_waypoint_snapshot,
+            error_from_response=_download_waypoint_snapshot_stream_errors, copy_request=False,
+            **kwargs)
+
 
     def download_edge_snapshot(self, edge_snapshot_id, **kwargs):
         """Downloads a specific edge snapshot with streaming from the server.
@@ -637,6 +738,15 @@ class GraphNavClient(BaseClient):
                          error_from_response=_download_edge_snapshot_stream_errors,
                          copy_request=False, **kwargs)
 
+    async def download_edge_snapshot_aio(self, edge_snapshot_id, **kwargs):
+        """Asyncio version of download_edge_snapshot()."""
+        request = self._build_download_edge_snapshot_request(edge_snapshot_id)
+        return await self.call_aio_streaming(
+            self.aio_stub.DownloadEdgeSnapshot, request,
+            value_from_response=_get_streamed_edge_snapshot,
+            error_from_response=_download_edge_snapshot_stream_errors, copy_request=False,
+            **kwargs)
+
 
     def _write_bytes(self, filepath, filename, data):
         """Write data to a file."""
@@ -12,7 +12,7 @@ import warnings
 import numpy as np
 
 from bosdyn.api import image_pb2, image_service_pb2_grpc
-from bosdyn.client.common import (BaseClient, common_header_errors, custom_params_error,
+from bosdyn.client.common import (AsyncBaseClient, common_header_errors, custom_params_error,
                                   error_factory, error_pair, handle_common_header_errors)
 from bosdyn.client.exceptions import ResponseError, UnsetStatusError
 
@@ -83,7 +83,7 @@ def _error_from_response(response):
     return None
 
 
-class ImageClient(BaseClient):
+class ImageClient(AsyncBaseClient):
     """Client for the image service."""
     default_service_name = 'image'
     service_type = 'bosdyn.api.ImageService'
@@ -110,6 +110,13 @@ class ImageClient(BaseClient):
         return self.call_async(self._stub.ListImageSources, req, _list_image_sources_value,
                                common_header_errors, copy_request=False, **kwargs)
 
+    async def list_image_sources_aio(self, **kwargs):
+        """Asyncio version of list_image_sources()"""
+        req = self._get_list_image_source_request()
+        return await self.call_aio(self.aio_stub.ListImageSources, req,
+                                   _list_image_sources_value, common_header_errors,
+                                   copy_request=False, **kwargs)
+
     def get_image_from_sources(self, image_sources, **kwargs):
         """Obtain images from sources using default parameters.
 
@@ -133,6 +140,11 @@ class ImageClient(BaseClient):
         return self.get_image_async([build_image_request(source) for source in image_sources],
                                     **kwargs)
 
+    async def get_image_from_sources_aio(self, image_sources, **kwargs):
+        """Asyncio version of get_image_from_sources()"""
+        return await self.get_image_aio(
+            [build_image_request(source) for source in image_sources], **kwargs)
+
     def get_image(self, image_requests, **kwargs):
         """Obtain the set of images from the robot.
 
@@ -160,6 +172,12 @@ class ImageClient(BaseClient):
         return self.call_async(self._stub.GetImage, req, _get_image_value, _error_from_response,
                                copy_request=False, **kwargs)
 
+    async def get_image_aio(self, image_requests, **kwargs):
+        """Asyncio version of get_image()"""
+        req = self._get_image_request(image_requests)
+        return await self.call_aio(self.aio_stub.GetImage, req, _get_image_value,
+                                   _error_from_response, copy_request=False, **kwargs)
+
     @staticmethod
     def _get_image_request(image_requests):
         return image_pb2.GetImageRequest(image_requests=image_requests)
@@ -6,6 +6,7 @@
 
 """Settings common to a user's access to one robot."""
 import copy
+import functools
 import logging
 import time
 from typing import Optional
@@ -16,6 +17,7 @@ from bosdyn.util import now_sec, timestamp_to_sec
 
 from .auth import AuthClient
 from .channel import DEFAULT_MAX_MESSAGE_LENGTH
+from .common import AsyncBaseClient
 from .data_buffer import DataBufferClient
 from .data_buffer import log_event as pkg_log_event
 from .directory import DirectoryClient
@@ -114,6 +116,7 @@ class Robot(object):
         self._current_user = None
         self.service_clients_by_name = {}
         self.channels_by_authority = {}
+        self.aio_channels_by_authority = {}
         self.authorities_by_name = {}
         self._robot_id = None
         self._hardware_config = None
@@ -130,6 +133,7 @@ class Robot(object):
         self.lease_wallet = LeaseWallet()
         self._time_sync_thread = None
         self.executor = None
+        self.rpc_metrics = None
 
         #: Callable[[Exception], ErrorCallbackResult] | None: Optional callback to be invoked when
         #: an error occurs in the token refresh thread.
@@ -204,6 +208,7 @@ class Robot(object):
         self.client_name = other.client_name
         self.lease_wallet.set_client_name(self.client_name)
         self.executor = other.executor
+        self.rpc_metrics = other.rpc_metrics
 
     def ensure_client(self, service_name, channel=None, options=[], service_endpoint=None):
         """Ensure a Client for a given service.
@@ -242,6 +247,9 @@ class Robot(object):
         if channel is None:
             channel = self.ensure_channel(service_name, options=options,
                                           service_endpoint=service_endpoint)
+            if isinstance(client, AsyncBaseClient):
+                client.aio_channel_factory = functools.partial(self.ensure_aio_channel,
+                                                               service_name, options=options)
 
         client.channel = channel
         client.update_from(self)
@@ -250,9 +258,28 @@ class Robot(object):
         return client
 
     def shutdown(self):
+        """Close the channels.
+
+        The aio channels are not closed, since that must be awaited from the event loop they were
+        created in: await shutdown_aio() for them.
+        """
         for channel_from_auth in self.channels_by_authority.values():
             channel_from_auth.close()
 
+    async def shutdown_aio(self):
+        """Close the aio channels, from the event loop they were created in.
+
+        The clients forget their aio channels, and create new ones on their next *_aio call, so
+        they may be used again from another event loop.
+        """
+        aio_channels = list(self.aio_channels_by_authority.values())
+        self.aio_channels_by_authority = {}
+        for client in self.service_clients_by_name.values():
+            if isinstance(client, AsyncBaseClient) and client.aio_channel_factory is not None:
+                client.aio_channel = None
+        for channel_from_auth in aio_channels:
+            await channel_from_auth.close()
+
     def get_cached_robot_id(self, timeout=None):
         """Return the RobotId proto for this robot, querying it from the robot if not yet cached.
 
@@ -289,7 +316,24 @@ class Robot(object):
             RpcError: There was a problem communicating with the robot.
             UnregisteredServiceNameError: service_name is unknown.
         """
+        return self.ensure_secure_channel(self._get_authority(service_name), options=options)
+
+    def ensure_aio_channel(self, service_name, options=[]):
+        """Get the grpc.aio channel to access the given service, creating it if it doesn't exist.
+
+        The channel must be used from the event loop that is running when it is created.
+
+        Args:
+            service_name: Name of the service in the directory.
+        Returns:
+            Existing aio channel if found, or newly created aio channel if not found.
+        Raises:
+            RpcError: There was a problem communicating with the robot.
+            UnregisteredServiceNameError: service_name is unknown.
+        """
+        return self.ensure_secure_aio_channel(self._get_authority(service_name), options=options)
 
+    def _get_authority(self, service_name):
         # If a specific channel was not set, look up the authority so we can get a channel.
         # Get the authority from either
         #   1. The bootstrap authority for this client_class, if available
@@ -306,19 +350,14 @@ class Robot(object):
         # If authority still not known, then the service name has not been registered.
         if not authority:
             raise UnregisteredServiceNameError(service_name)
-
-        return self.ensure_secure_channel(authority, options=options)
+        return authority
 
     def ensure_secure_channel(self, authority, options=[]):
         """Get the channel to access the given authority, creating it if it doesn't exist."""
         if authority in self.channels_by_authority:
             return self.channels_by_authority[authority]
 
-        # Update max send/receive message lengths.
-        if 'grpc.max_receive_message_length' not in [option[0] for option in options]:
-            options.append(('grpc.max_receive_message_length', self.max_receive_message_length))
-        if 'grpc.max_send_message_length' not in [option[0] for option in options]:
-            options.append(('grpc.max_send_message_length', self.max_send_message_length))
+        self._add_message_length_options(options)
 
         # Channel doesn't exist, so create it.
         creds = bosdyn.client.channel.create_secure_channel_creds(self.cert,
@@ -331,6 +370,30 @@ class Robot(object):
         self.channels_by_authority[authority] = channel
         return channel
 
+    def ensure_secure_aio_channel(self, authority, options=[]):
+        """Get the aio channel to access the given authority, creating it if it doesn't exist."""
+        if authority in self.aio_channels_by_authority:
+            return self.aio_channels_by_authority[authority]
+
+        options = self._add_message_length_options(list(options))
+        creds = bosdyn.client.channel.create_secure_channel_creds(self.cert,
+                                                                  lambda: self.user_token)
+        channel = bosdyn.client.channel.create_secure_aio_channel(self.address,
+                                                                  self._secure_channel_port, creds,
+                                                                  authority, options=options)
+        self.logger.debug('Created aio channel to %s at port %i with authority %s', self.address,
+                          self._secure_channel_port, authority)
+        self.aio_channels_by_authority[authority] = channel
+        return channel
+
+    def _add_message_length_options(self, options):
+        """Add the max send/receive message lengths to the channel options, if not set."""
+        if 'grpc.max_receive_message_length' not in [option[0] for option in options]:
+            options.append(('grpc.max_receive_message_length', self.max_receive_message_length))
+        if 'grpc.max_send_message_length' not in [option[0] for option in options]:
+            options.append(('grpc.max_send_message_length', self.max_send_message_length))
+        return options
+
 
     def authenticate(
             self,
@@ -7,10 +7,10 @@
 """For clients to use the robot state service."""
 
 from bosdyn.api import robot_state_pb2, robot_state_service_pb2_grpc
-from bosdyn.client.common import BaseClient, common_header_errors
+from bosdyn.client.common import AsyncBaseClient, common_header_errors
 
 
-class RobotStateClient(BaseClient):
+class RobotStateClient(AsyncBaseClient):
     """Client for the RobotState service."""
     default_service_name = 'robot-state'
     service_type = 'bosdyn.api.RobotStateService'
@@ -37,6 +37,12 @@ class RobotStateClient(BaseClient):
         return self.call_async(self._stub.GetRobotState, req, _get_robot_state_value,
                                common_header_errors, copy_request=False, **kwargs)
 
+    async def get_robot_state_aio(self, **kwargs):
+        """Asyncio version of get_robot_state()"""
+        req = self._get_robot_state_request()
+        return await self.call_aio(self.aio_stub.GetRobotState, req, _get_robot_state_value,
+                                   common_header_errors, copy_request=False, **kwargs)
+
     def get_robot_metrics(self, **kwargs):
         """Obtain robot metrics, such as distance traveled or time powered on.
 
@@ -56,6 +62,12 @@ class RobotStateClient(BaseClient):
         return self.call_async(self._stub.GetRobotMetrics, req, _get_robot_metrics_value,
                                common_header_errors, copy_request=False, **kwargs)
 
+    async def get_robot_metrics_aio(self, **kwargs):
+        """Asyncio version of get_robot_metrics()"""
+        req = self._get_robot_metrics_request()
+        return await self.call_aio(self.aio_stub.GetRobotMetrics, req, _get_robot_metrics_value,
+                                   common_header_errors, copy_request=False, **kwargs)
+
     def get_robot_hardware_configuration(self, **kwargs):
         """Obtain current hardware configuration of robot.
 
@@ -77,6 +89,13 @@ class RobotStateClient(BaseClient):
                                _get_robot_hardware_configuration_value, common_header_errors,
                                copy_request=False, **kwargs)
 
+    async def get_robot_hardware_configuration_aio(self, **kwargs):
+        """Asyncio version of get_robot_hardware_configuration()"""
+        req = self._get_robot_hardware_configuration_request()
+        return await self.call_aio(self.aio_stub.GetRobotHardwareConfiguration, req,
+                                   _get_robot_hardware_configuration_value, common_header_errors,
+                                   copy_request=False, **kwargs)
+
     def get_robot_link_model(self, link_name, **kwargs):
         """Obtain link model OBJ for a specific link.
 
@@ -99,6 +118,13 @@ class RobotStateClient(BaseClient):
         return self.call_async(self._stub.GetRobotLinkModel, req, _get_robot_link_model_value,
                                common_header_errors, copy_request=False, **kwargs)
 
+    async def get_robot_link_model_aio(self, link_name, **kwargs):
+        """Asyncio version of get_robot_link_model()"""
+        req = self._get_robot_link_model_request(link_name)
+        return await self.call_aio(self.aio_stub.GetRobotLinkModel, req,
+                                   _get_robot_link_model_value, common_header_errors,
+                                   copy_request=False, **kwargs)
+
     def get_hardware_config_with_link_info(self):
         """Convenience function which first requests a robot's hardware configuration followed by
         requests to get link models for all robot links.
@@ -129,7 +155,7 @@ class RobotStateClient(BaseClient):
         return robot_state_pb2.RobotLinkModelRequest(link_name=link_name)
 
 
-class RobotStateStreamingClient(BaseClient):
+class RobotStateStreamingClient(AsyncBaseClient):
     """Client for the RobotState service.
     
     This client is in BETA and may undergo changes in future releases.
@@ -146,6 +172,26 @@ class RobotStateStreamingClient(BaseClient):
         req = self._get_robot_state_stream_request()
         return self._stub.GetRobotStateStream(req)
 
+    def get_robot_state_stream_iterator(self, **kwargs):
+        """Returns an iterator over the state updates of the robot, handled as they arrive.
+
+        Unlike get_robot_state_stream(), the request and each response go through the request
+        and response processors of the client.  The stream lasts until the iterator is closed or
+        dropped, which cancels it, unless a timeout is given.
+        """
+        req = self._get_robot_state_stream_request()
+        kwargs.setdefault('timeout', None)
+        return self.call_iterator(self._stub.GetRobotStateStream, req, **kwargs)
+
+    def get_robot_state_stream_aio(self, **kwargs):
+        """Asyncio version of get_robot_state_stream_iterator(), returning an asynchronous iterator.
+
+        Call it from the event loop, e.g., 'async for state in client.get_robot_state_stream_aio()'
+        """
+        req = self._get_robot_state_stream_request()
+        kwargs.setdefault('timeout', None)
+        return self.call_aio_iterator(self.aio_stub.GetRobotStateStream, req, **kwargs)
+
     @staticmethod
     def _get_robot_state_stream_request():
         return robot_state_pb2.RobotStateStreamRequest()
@@ -0,0 +1,299 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Per-method statistics of the rpcs made by service clients.
+
+Measuring is opt-in: set the rpc_metrics of an Sdk, Robot or client to an RpcMetrics, and the
+clients created from it from then on record, for each rpc method:
+  - a histogram of call latencies, from the start of the call to its result or error,
+  - the number of bytes of the requests and responses,
+  - the number of errors, by exception type,
+  - the number of calls in flight.
+
+Example:
+  with measure_rpcs(robot) as metrics:
+      run_mission(robot)
+  print(metrics.prometheus_text())
+"""
+
+import contextlib
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds.
+DEFAULT_LATENCY_BUCKETS_SEC = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                               5.0, 10.0, 30.0)
+
+
+def _message_size(message):
+    try:
+        return message.ByteSize()
+    except AttributeError:
+        return 0
+
+
+class _MethodMetrics(object):
+    """Statistics of one rpc method."""
+
+    def __init__(self, num_buckets):
+        self.calls = 0
+        self.in_flight = 0
+        self.bucket_counts = [0] * (num_buckets + 1)  # The last is for latencies beyond all bounds.
+        self.latency_sum_sec = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.errors = {}  # {exception type name -> count}
+
+
+class RpcMeasurement(object):
+    """The measurement of a single rpc call, started by RpcMetrics.start()."""
+
+    def __init__(self, metrics, method):
+        self._metrics = metrics
+        self._method = method
+        self._start_time = time.perf_counter()
+        self._request_bytes = 0
+        self._response_bytes = 0
+        self._finished = False
+
+    def add_request(self, request):
+        """Count the bytes of a request message."""
+        self._request_bytes += _message_size(request)
+
+    def add_response(self, response):
+        """Count the bytes of a response message."""
+        self._response_bytes += _message_size(response)
+
+    def requests(self, request_iterator):
+        """Return an iterator over request_iterator which counts the bytes of each request."""
+        for request in request_iterator:
+            self.add_request(request)
+            yield request
+
+    def responses(self, response_iterator):
+        """Return an iterator over response_iterator which counts the bytes of each response."""
+        for response in response_iterator:
+            self.add_response(response)
+            yield response
+
+    def finish(self, error=None):
+        """Record the call as finished, with the exception it raised, if any.
+
+        Only the first call to finish() is recorded.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        self._metrics._record(self._method, time.perf_counter() - self._start_time,
+                              self._request_bytes, self._response_bytes, error)
+
+
+class _NoMeasurement(object):
+    """Stands in for an RpcMeasurement when the rpcs of a client are not measured."""
+
+    def add_request(self, request):
+        pass
+
+    def add_response(self, response):
+        pass
+
+    def requests(self, request_iterator):
+        return request_iterator
+
+    def responses(self, response_iterator):
+        return response_iterator
+
+    def finish(self, error=None):
+        pass
+
+
+NO_MEASUREMENT = _NoMeasurement()
+
+
+class RpcMetrics(object):
+    """Thread-safe collection of per-method rpc statistics.
+
+    Args:
+        latency_buckets_sec: Increasing upper bounds of the latency histogram buckets, in seconds.
+    """
+
+    def __init__(self, latency_buckets_sec=DEFAULT_LATENCY_BUCKETS_SEC):
+        self.latency_buckets_sec = tuple(latency_buckets_sec)
+        self._lock = threading.Lock()
+        self._methods = {}  # {method name -> _MethodMetrics}
+
+    def start(self, method):
+        """Return an RpcMeasurement of a call of the named method, which is now in flight."""
+        with self._lock:
+            self._get_method(method).in_flight += 1
+        return RpcMeasurement(self, method)
+
+    @contextlib.contextmanager
+    def measure(self, method):
+        """Context measuring the code in it as a call of the named method.
+
+        An exception raised in the context is counted as an error of the call, and is not caught.
+        Yields the RpcMeasurement, to which the messages sent and received may be added.
+        """
+        measurement = self.start(method)
+        try:
+            yield measurement
+        except Exception as exc:
+            measurement.finish(exc)
+            raise
+        finally:
+            measurement.finish()
+
+    def reset(self):
+        """Forget all the statistics, except the calls in flight."""
+        with self._lock:
+            in_flight = {
+                method: stats.in_flight
+                for method, stats in self._methods.items()
+                if stats.in_flight
+            }
+            self._methods = {}
+            for method, count in in_flight.items():
+                self._get_method(method).in_flight = count
+
+    def snapshot(self):
+        """Return the statistics as a dict.
+
+        The dict is keyed by method name.  Each value is a dict with the keys:
+          calls:           number of finished calls.
+          in_flight:       number of calls started and not yet finished.
+          latency_sec:     dict of 'sum' of the latencies of the finished calls and 'buckets', a
+                            list of (upper bound, cumulative count) ending with (inf, calls).
+          request_bytes:   total size of the requests of the finished calls.
+          response_bytes:  total size of the responses of the finished calls.
+          errors:          dict of the number of errors by exception type name.
+        """
+        with self._lock:
+            snapshot = {}
+            for method, stats in self._methods.items():
+                buckets = []
+                cumulative = 0
+                for bound, count in zip(self.latency_buckets_sec + (float('inf'),),
+                                        stats.bucket_counts):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                snapshot[method] = {
+                    'calls': stats.calls,
+                    'in_flight': stats.in_flight,
+                    'latency_sec': {
+                        'sum': stats.latency_sum_sec,
+                        'buckets': buckets
+                    },
+                    'request_bytes': stats.request_bytes,
+                    'response_bytes': stats.response_bytes,
+                    'errors': dict(stats.errors),
+                }
+            return snapshot
+
+    def prometheus_text(self, prefix='bosdyn_client_rpc'):
+        """Return the statistics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Prefix of the names of the metrics.
+        """
+        snapshot = self.snapshot()
+        methods = sorted(snapshot)
+        lines = []
+
+        def _family(name, metric_type, help_text):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, metric_type))
+
+        def _sample(name, labels, value):
+            label_text = ','.join(
+                '{}="{}"'.format(key, _escape_label(label)) for key, label in labels)
+            lines.append('{}_{}{{{}}} {}'.format(prefix, name, label_text, _format_value(value)))
+
+        _family('latency_seconds', 'histogram', 'Time from the start of an rpc to its result.')
+        for method in methods:
+            latency = snapshot[method]['latency_sec']
+            for bound, count in latency['buckets']:
+                _sample('latency_seconds_bucket', [('method', method),
+                                                   ('le', _format_value(bound))], count)
+            _sample('latency_seconds_sum', [('method', method)], latency['sum'])
+            _sample('latency_seconds_count', [('method', method)], snapshot[method]['calls'])
+        _family('request_bytes_total', 'counter', 'Bytes of the requests of finished rpcs.')
+        for method in methods:
+            _sample('request_bytes_total', [('method', method)],
+                    snapshot[method]['request_bytes'])
+        _family('response_bytes_total', 'counter', 'Bytes of the responses of finished rpcs.')
+        for method in methods:
+            _sample('response_bytes_total', [('method', method)],
+                    snapshot[method]['response_bytes'])
+        _family('errors_total', 'counter', 'Rpcs which raised an error, by exception type.')
+        for method in methods:
+            for error, count in sorted(snapshot[method]['errors'].items()):
+                _sample('errors_total', [('method', method), ('error', error)], count)
+        _family('in_flight', 'gauge', 'Rpcs started and not yet finished.')
+        for method in methods:
+            _sample('in_flight', [('method', method)], snapshot[method]['in_flight'])
+        return '\n'.join(lines) + '\n'
+
+    def _get_method(self, method):
+        # Must be called with the lock held.
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = _MethodMetrics(len(self.latency_buckets_sec))
+        return stats
+
+    def _record(self, method, latency_sec, request_bytes, response_bytes, error):
+        bucket = len(self.latency_buckets_sec)
+        for index, bound in enumerate(self.latency_buckets_sec):
+            if latency_sec <= bound:
+                bucket = index
+                break
+        with self._lock:
+            stats = self._get_method(method)
+            stats.in_flight -= 1
+            stats.calls += 1
+            stats.bucket_counts[bucket] += 1
+            stats.latency_sum_sec += latency_sec
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            if error is not None:
+                error_name = type(error).__name__
+                stats.errors[error_name] = stats.errors.get(error_name, 0) + 1
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+@contextlib.contextmanager
+def measure_rpcs(target, metrics=None):
+    """Context in which the rpcs of a Robot's clients, or of a single client, are measured.
+
+    The rpc_metrics of the target (and, for a Robot, of the clients it has already created) are
+    restored when the context exits.
+
+    Args:
+        target: Robot or client whose rpcs to measure.
+        metrics: RpcMetrics to record into, or None for a new one.
+
+    Yields the RpcMetrics.
+    """
+    if metrics is None:
+        metrics = RpcMetrics()
+    objects = [target] + list(getattr(target, 'service_clients_by_name', {}).values())
+    previous = [(obj, obj.rpc_metrics) for obj in objects]
+    for obj in objects:
+        obj.rpc_metrics = metrics
+    try:
+        yield metrics
+    finally:
+        for obj, rpc_metrics in previous:
+            obj.rpc_metrics = rpc_metrics
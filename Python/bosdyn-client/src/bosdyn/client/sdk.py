@@ -32,6 +32,7 @@ from .docking import DockingClient
 from .door import DoorClient
 from .estop import EstopClient
 from .exceptions import Error
+from .executor import SharedExecutor
 from .fault import FaultClient
 from .gps.aggregator_client import AggregatorClient
 from .gps.registration_client import RegistrationClient
@@ -204,8 +205,11 @@ class Sdk(object):
         self.max_send_message_length = DEFAULT_MAX_MESSAGE_LENGTH
         self.max_receive_message_length = DEFAULT_MAX_MESSAGE_LENGTH
 
-        # ThreadPoolExecutor instance for asynchronous streaming calls.
-        self.executor = None
+        # Bounded thread pool shared by the clients of all robots for asynchronous streaming calls.
+        self.executor = SharedExecutor()
+
+        # RpcMetrics recording the rpcs of the clients of robots created from now on, if set.
+        self.rpc_metrics = None
 
 
     def create_robot(
@@ -9,14 +9,14 @@
 from bosdyn.api import geometry_pb2 as geom
 from bosdyn.api import world_object_pb2, world_object_service_pb2
 from bosdyn.api import world_object_service_pb2_grpc as world_object_service
-from bosdyn.client.common import BaseClient, common_header_errors
+from bosdyn.client.common import AsyncBaseClient, common_header_errors
 from bosdyn.client.frame_helpers import *
 from bosdyn.client.robot_command import NoTimeSyncError
 from bosdyn.client.time_sync import update_time_filter, update_timestamp_filter
 from bosdyn.util import now_timestamp
 
 
-class WorldObjectClient(BaseClient):
+class WorldObjectClient(AsyncBaseClient):
     """Client for World Object service."""
     default_service_name = 'world-objects'
     service_type = 'bosdyn.api.WorldObjectService'
@@ -82,6 +82,17 @@ class WorldObjectClient(BaseClient):
                                error_from_response=common_header_errors, copy_request=False,
                                **kwargs)
 
+    async def list_world_objects_aio(self, object_type=None, time_start_point=None, **kwargs):
+        """Asyncio version of list_world_objects()."""
+        if time_start_point is not None:
+            time_start_point = update_time_filter(self, time_start_point, self.timesync_endpoint)
+        req = world_object_pb2.ListWorldObjectRequest(object_type=object_type,
+                                                      timestamp_filter=time_start_point)
+        return await self.call_aio(self.aio_stub.ListWorldObjects, req,
+                                   value_from_response=_get_world_object_value,
+                                   error_from_response=common_header_errors, copy_request=False,
+                                   **kwargs)
+
     def mutate_world_objects(self, mutation_req, **kwargs):
         """Mutate (add, change, delete) world objects.
 
@@ -117,6 +128,17 @@ class WorldObjectClient(BaseClient):
                                value_from_response=_get_status,
                                error_from_response=common_header_errors, **kwargs)
 
+    async def mutate_world_objects_aio(self, mutation_req, **kwargs):
+        """Asyncio version of mutate_world_objects()."""
+        if mutation_req.mutation.object.HasField("acquisition_time"):
+            # Ensure the mutation request's object's time of detection is in robot time.
+            client_timestamp = mutation_req.mutation.object.acquisition_time
+            mutation_req.mutation.object.acquisition_time.CopyFrom(
+                update_timestamp_filter(self, client_timestamp, self.timesync_endpoint))
+        return await self.call_aio(self.aio_stub.MutateWorldObjects, mutation_req,
+                                   value_from_response=_get_status,
+                                   error_from_response=common_header_errors, **kwargs)
+
 
     def draw_sphere(self, name, x_rt_frame_name, y_rt_frame_name, z_rt_frame_name, frame_name,
                     radius=0.05, rgba=(255, 0, 0, 1), list_objects_now=True):
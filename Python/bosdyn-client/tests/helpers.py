@@ -9,6 +9,7 @@
 import concurrent
 
 import grpc
+import grpc.aio
 
 import bosdyn.api.header_pb2 as HeaderProto
 
@@ -19,7 +20,8 @@ def setup_client_and_service(client, service, service_adder):
     The service should have already been instantiated. It will be
     attached to a server listening on an ephemeral port and started.
 
-    The client will have a networking channel which points to that service.
+    The client will have a networking channel which points to that service, and an aio
+    channel factory for the asyncio methods of an AsyncBaseClient.
 
     Args:
         * client: The common.BaseClient derived client to use in a test.
@@ -35,6 +37,7 @@ def setup_client_and_service(client, service, service_adder):
     server.start()
     channel = grpc.insecure_channel('127.0.0.1:{}'.format(port))
     client.channel = channel
+    client.aio_channel_factory = lambda: grpc.aio.insecure_channel('127.0.0.1:{}'.format(port))
     return server
 
 
@@ -4,9 +4,24 @@
 # is subject to the terms and conditions of the Boston Dynamics Software
 # Development Kit License (20191101-BDSDK-SL).
 
+import asyncio
+import concurrent.futures
 from functools import partial
 
-from bosdyn.client.common import BaseClient
+import grpc
+import pytest
+
+from bosdyn.api import (header_pb2, lease_pb2, robot_command_pb2, robot_state_pb2,
+                        robot_state_service_pb2_grpc)
+from bosdyn.client.common import BaseClient, common_header_errors
+from bosdyn.client.exceptions import InternalServerError, PermissionDeniedError
+from bosdyn.client.lease import Lease, LeaseWallet, LeaseWalletRequestProcessor
+from bosdyn.client.processors import AddRequestHeader
+from bosdyn.client.robot import Robot
+from bosdyn.client.robot_state import RobotStateClient, RobotStateStreamingClient
+from bosdyn.client.rpc_metrics import RpcMetrics
+
+from . import helpers
 
 
 def method_wrapper(func):
@@ -103,3 +118,273 @@ def test_base_client():
     response = client.call_async_streaming(client._stub.rpc_method, None,
                                            value_from_response=value_from_response, **kwargs)
     assert isinstance(response.result(), Response)
+
+
+class RecordingRpcMethod():
+    """Unary rpc method which records the serialized requests sent to it."""
+
+    _method = b"MockStub.recording_method"
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request, **kwargs):
+        self.requests.append(request.SerializeToString())
+        return Response()
+
+    def future(self, request, **kwargs):
+        return self(request, **kwargs)
+
+
+def test_request_processors_copy():
+    lease_wallet = LeaseWallet()
+    lease_wallet.add(Lease(lease_pb2.Lease(resource='body', epoch='epoch', sequence=[1])))
+    client = BaseClient(stub_creation_func)
+    client.request_processors = [
+        AddRequestHeader(lambda: 'test-client'),
+        LeaseWalletRequestProcessor(lease_wallet)
+    ]
+    request = robot_command_pb2.RobotCommandRequest(clock_identifier='clock')
+    original = request.SerializeToString()
+    rpc_method = RecordingRpcMethod()
+
+    # The caller's request is never modified, so it may be shared by concurrent calls.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        calls = [executor.submit(client.call, rpc_method, request) for _ in range(20)]
+        calls += [client.call_async(rpc_method, request) for _ in range(20)]
+        for call in calls:
+            call.result()
+    assert request.SerializeToString() == original
+    assert len(rpc_method.requests) == 40
+    for serialized in rpc_method.requests:
+        sent = robot_command_pb2.RobotCommandRequest.FromString(serialized)
+        assert sent.header.client_name == 'test-client'
+        assert sent.lease.resource == 'body'
+        assert sent.clock_identifier == 'clock'
+
+    # A lease set by the caller is kept.
+    request.lease.resource = 'arm'
+    client.call(rpc_method, request)
+    assert robot_command_pb2.RobotCommandRequest.FromString(
+        rpc_method.requests[-1]).lease.resource == 'arm'
+    assert not request.HasField('header')
+
+    # With copy_request=False the caller gives up the request, which is modified in place.
+    client.call(rpc_method, request, copy_request=False)
+    assert request.header.client_name == 'test-client'
+
+
+class StreamingRpcMethod():
+    """Server-streaming rpc method which produces responses only as they are read."""
+
+    _method = b"MockStub.streaming_method"
+
+    def __init__(self, error_codes):
+        self.error_codes = error_codes
+        self.num_sent = 0
+        self.responses = []
+        self.cancelled = False
+
+    def __call__(self, request, **kwargs):
+        self.request = robot_state_pb2.RobotStateStreamRequest.FromString(
+            request.SerializeToString())
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.cancelled or self.num_sent == len(self.error_codes):
+            raise StopIteration
+        response = robot_state_pb2.RobotStateStreamResponse()
+        response.header.error.code = self.error_codes[self.num_sent]
+        self.responses.append(response)
+        self.num_sent += 1
+        return response
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class CountingResponseProcessor():
+
+    def __init__(self):
+        self.responses = []
+
+    def mutate(self, response):
+        self.responses.append(response)
+
+
+def test_call_iterator():
+    client = BaseClient(stub_creation_func)
+    client.request_processors = [AddRequestHeader(lambda: 'test-client')]
+    response_processor = CountingResponseProcessor()
+    client.response_processors = [response_processor]
+    ok = header_pb2.CommonError.CODE_OK
+    rpc_method = StreamingRpcMethod([ok, ok, header_pb2.CommonError.CODE_INTERNAL_SERVER_ERROR, ok])
+
+    iterator = client.call_iterator(rpc_method, robot_state_pb2.RobotStateStreamRequest(),
+                                    value_from_response=lambda response: response.header,
+                                    error_from_response=common_header_errors)
+    assert rpc_method.request.header.client_name == 'test-client'
+    # Responses are produced only as they are read, and are not copied.
+    assert rpc_method.num_sent == 0
+    assert next(iterator) is rpc_method.responses[0].header
+    assert rpc_method.num_sent == 1
+    assert response_processor.responses == rpc_method.responses
+    assert next(iterator) is rpc_method.responses[1].header
+    # An error response raises, ending the stream.
+    with pytest.raises(InternalServerError):
+        next(iterator)
+    assert rpc_method.num_sent == 3
+    assert rpc_method.cancelled
+
+    # Stopping early cancels the rpc.
+    rpc_method = StreamingRpcMethod([ok, ok, ok])
+    iterator = client.call_iterator(rpc_method, robot_state_pb2.RobotStateStreamRequest())
+    next(iterator)
+    iterator.close()
+    assert rpc_method.cancelled
+    assert rpc_method.num_sent == 1
+
+    # An iterator dropped before it is started still cancels the rpc and finishes its measurement.
+    client.rpc_metrics = RpcMetrics()
+    rpc_method = StreamingRpcMethod([ok, ok, ok])
+    iterator = client.call_iterator(rpc_method, robot_state_pb2.RobotStateStreamRequest())
+    assert client.rpc_metrics.snapshot()['MockStub.streaming_method']['in_flight'] == 1
+    del iterator
+    assert rpc_method.cancelled
+    assert rpc_method.num_sent == 0
+    assert client.rpc_metrics.snapshot()['MockStub.streaming_method']['in_flight'] == 0
+
+
+class MockRobotStateServicer(robot_state_service_pb2_grpc.RobotStateServiceServicer):
+
+    def __init__(self):
+        self.client_names = []
+
+    def GetRobotState(self, request, context):
+        self.client_names.append(request.header.client_name)
+        response = robot_state_pb2.RobotStateResponse()
+        helpers.add_common_header(response, request)
+        response.robot_state.power_state.motor_power_state = robot_state_pb2.PowerState.STATE_ON
+        return response
+
+    def GetRobotMetrics(self, request, context):
+        context.abort(grpc.StatusCode.PERMISSION_DENIED, 'not allowed')
+
+
+class MockRobotStateStreamingServicer(
+        robot_state_service_pb2_grpc.RobotStateStreamingServiceServicer):
+
+    def GetRobotStateStream(self, request, context):
+        while context.is_active():
+            yield robot_state_pb2.RobotStateStreamResponse()
+
+
+def test_call_aio():
+    service = MockRobotStateServicer()
+    client = RobotStateClient()
+    streaming_client = RobotStateStreamingClient()
+    server = helpers.setup_client_and_service(
+        client, service, robot_state_service_pb2_grpc.add_RobotStateServiceServicer_to_server)
+    streaming_server = helpers.setup_client_and_service(
+        streaming_client, MockRobotStateStreamingServicer(),
+        robot_state_service_pb2_grpc.add_RobotStateStreamingServiceServicer_to_server)
+    response_processor = CountingResponseProcessor()
+    client.request_processors = [AddRequestHeader(lambda: 'test-client')]
+    client.response_processors = [response_processor]
+
+    async def run():
+        try:
+            # Many calls in flight at once from a single thread.
+            states = await asyncio.gather(*[client.get_robot_state_aio() for _ in range(50)])
+            assert all(state.power_state.motor_power_state == robot_state_pb2.PowerState.STATE_ON
+                       for state in states)
+            assert service.client_names == ['test-client'] * 50
+            assert len(response_processor.responses) == 50
+
+            # Transport errors are translated as for blocking calls.
+            with pytest.raises(PermissionDeniedError):
+                await client.get_robot_metrics_aio()
+
+            # A stream which is never iterated is never started.
+            streaming_client.rpc_metrics = RpcMetrics()
+            streaming_client.get_robot_state_stream_aio()
+            assert streaming_client.rpc_metrics.snapshot() == {}
+
+            # Stopping a stream early cancels it.
+            num_read = 0
+            async for _ in streaming_client.get_robot_state_stream_aio():
+                num_read += 1
+                if num_read == 3:
+                    break
+            assert num_read == 3
+        finally:
+            await client.aio_channel.close()
+            await streaming_client.aio_channel.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.stop(0)
+        streaming_server.stop(0)
+
+
+def test_robot_state_stream():
+    streaming_client = RobotStateStreamingClient()
+    response_processor = CountingResponseProcessor()
+    streaming_client.response_processors = [response_processor]
+    server = helpers.setup_client_and_service(
+        streaming_client, MockRobotStateStreamingServicer(),
+        robot_state_service_pb2_grpc.add_RobotStateStreamingServiceServicer_to_server)
+    try:
+        # The stream is the grpc call itself, which the caller can cancel and query.
+        stream = streaming_client.get_robot_state_stream()
+        next(stream)
+        stream.cancel()
+        assert stream.code() == grpc.StatusCode.CANCELLED
+        assert not response_processor.responses
+
+        # The iterator processes each response, and cancels the stream when closed.
+        iterator = streaming_client.get_robot_state_stream_iterator()
+        for _ in range(3):
+            assert isinstance(next(iterator), robot_state_pb2.RobotStateStreamResponse)
+        iterator.close()
+        assert len(response_processor.responses) == 3
+        with pytest.raises(StopIteration):
+            next(iterator)
+    finally:
+        server.stop(0)
+
+
+def test_shutdown_aio():
+    client = RobotStateClient()
+    server = helpers.setup_client_and_service(
+        client, MockRobotStateServicer(),
+        robot_state_service_pb2_grpc.add_RobotStateServiceServicer_to_server)
+    robot = Robot('test-robot')
+    robot.service_clients_by_name[client.default_service_name] = client
+    create_aio_channel = client.aio_channel_factory
+
+    def aio_channel_factory():
+        channel = create_aio_channel()
+        robot.aio_channels_by_authority['test-authority'] = channel
+        return channel
+
+    client.aio_channel_factory = aio_channel_factory
+
+    async def run():
+        try:
+            state = await client.get_robot_state_aio()
+            assert state.power_state.motor_power_state == robot_state_pb2.PowerState.STATE_ON
+        finally:
+            await robot.shutdown_aio()
+
+    try:
+        # Each event loop gets a new channel once the previous one is shut down.
+        asyncio.run(run())
+        assert robot.aio_channels_by_authority == {}
+        asyncio.run(run())
+    finally:
+        server.stop(0)
@@ -0,0 +1,197 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Test parallel, resumable bddf downloads against a local HTTP server."""
+import gc
+import io
+import os
+import re
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from bosdyn.api.data_buffer_pb2 import OperatorComment
+from bosdyn.bddf import DataReader, DataWriter, MultiFileReader, ProtobufSeriesWriter
+from bosdyn.client import bddf_download
+
+NSEC_PER_SEC = 1000000000
+START_SEC = 100
+END_SEC = 160
+
+
+class _Buffer(io.BytesIO):
+    """BytesIO which keeps its contents when the DataWriter closes it."""
+
+    def close(self):
+        pass
+
+
+def _bddf_bytes(from_sec, to_sec):
+    """Return a bddf file with one message per second in [from_sec, to_sec)."""
+    buffer = _Buffer()
+    with DataWriter(buffer) as data_writer:
+        proto_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='comments')
+        for sec in range(from_sec, to_sec):
+            proto_writer.write(sec * NSEC_PER_SEC, OperatorComment(message=str(sec)))
+    return buffer.getvalue()
+
+
+class _StubServer:
+    """HTTP server for the bddf endpoint which drops the first connection of each window."""
+
+    def __init__(self):
+        self.requests = []  # (path, Range header)
+        self._lock = threading.Lock()
+        self._interrupted = set()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                params = parse_qs(urlparse(self.path).query)
+                assert self.headers['Authorization'] == 'Bearer token'
+                data = _bddf_bytes(int(params['from_sec'][0]), int(params['to_sec'][0]))
+                range_header = self.headers['Range']
+                with stub._lock:
+                    stub.requests.append((self.path, range_header))
+                    interrupt = self.path not in stub._interrupted
+                    stub._interrupted.add(self.path)
+                offset = 0
+                if range_header:
+                    offset = int(re.match(r'bytes=(\d+)-', range_header).group(1))
+                    self.send_response(206)
+                    self.send_header('Content-Range',
+                                     'bytes {}-{}/{}'.format(offset, len(data) - 1, len(data)))
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Length', str(len(data) - offset))
+                self.end_headers()
+                if interrupt:
+                    # Send half of the data, then drop the connection.
+                    self.wfile.write(data[offset:offset + (len(data) - offset) // 2])
+                    self.close_connection = True
+                    return
+                self.wfile.write(data[offset:])
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.url = 'http://127.0.0.1:{}/v1/data-buffer/bddf/'.format(self._server.server_port)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = _StubServer()
+    monkeypatch.setattr(bddf_download, '_bddf_url', lambda hostname: server.url)
+    monkeypatch.setattr(bddf_download, 'RETRY_DELAY_SEC', 0)
+    yield server
+    server.close()
+
+
+def _download(**kwargs):
+    robot = types.SimpleNamespace(user_token='token')
+    return bddf_download.download_data_parallel(
+        robot, 'robot', start_nsec=START_SEC * NSEC_PER_SEC, end_nsec=END_SEC * NSEC_PER_SEC,
+        robot_time=True, num_windows=4, **kwargs)
+
+
+def test_window_params():
+    windows = bddf_download._window_params({'from_sec': '100', 'to_sec': '110', 'channel': 'c'},
+                                           3, None)
+    assert [(params['from_sec'], params['to_sec']) for params in windows] == [('100', '103'),
+                                                                               ('103', '106'),
+                                                                               ('106', '110')]
+    assert all(params['channel'] == 'c' for params in windows)
+    assert len(bddf_download._window_params({'from_sec': '100', 'to_sec': '102'}, 8, None)) == 2
+    assert bddf_download._window_params({'to_sec': '100'}, 4, None) == [{'to_sec': '100'}]
+
+
+def test_download_parallel_to_file(stub_server, tmp_path):
+    output_filename = str(tmp_path / 'download.bddf')
+    assert _download(output_filename=output_filename) == output_filename
+    assert not os.path.exists(output_filename + '.parts')
+
+    # Each window was interrupted once and resumed from where it stopped.
+    ranges = [range_header for _, range_header in stub_server.requests]
+    assert len(ranges) == 8
+    assert sum(1 for range_header in ranges if range_header) == 4
+
+    with DataReader(filename=output_filename) as data_reader:
+        assert list(data_reader.series_timestamps(0)) == [
+            sec * NSEC_PER_SEC for sec in range(START_SEC, END_SEC)
+        ]
+
+
+def test_download_parallel_to_directory(stub_server, tmp_path):
+    directory = str(tmp_path / 'windows')
+    assert _download(output_directory=directory, num_connections=2) == directory
+    filenames = sorted(os.listdir(directory))
+    assert len(filenames) == 4
+    assert all(name.endswith('.bddf') for name in filenames)
+
+    reader = MultiFileReader(directory)
+    assert [OperatorComment.FromString(data).message for _, _, data in reader] == [
+        str(sec) for sec in range(START_SEC, END_SEC)
+    ]
+
+    # Downloading again finds the complete windows and does not request them.
+    num_requests = len(stub_server.requests)
+    _download(output_directory=directory)
+    assert len(stub_server.requests) == num_requests
+
+
+def test_stream_data(stub_server):
+    robot = types.SimpleNamespace(user_token='token')
+    kwargs = dict(start_nsec=START_SEC * NSEC_PER_SEC, end_nsec=END_SEC * NSEC_PER_SEC,
+                  robot_time=True)
+    # The server cuts off its first response.
+    stream = bddf_download.stream_data(robot, 'robot', **kwargs)
+    with pytest.raises(EOFError):
+        for _ in stream:
+            pass
+
+    timestamps = [
+        desc.timestamp.ToNanoseconds()
+        for desc, _, _ in bddf_download.stream_data(robot, 'robot', **kwargs)
+    ]
+    assert timestamps == [sec * NSEC_PER_SEC for sec in range(START_SEC, END_SEC)]
+
+    messages = list(bddf_download.stream_protobuf_messages(robot, 'robot', **kwargs))
+    assert [(timestamp, message.message) for _, timestamp, message in messages] == [
+        (sec * NSEC_PER_SEC, str(sec)) for sec in range(START_SEC, END_SEC)
+    ]
+    assert all(isinstance(message, OperatorComment) for _, _, message in messages)
+    assert messages[0][0].series_identifier.spec['bosdyn:channel'] == 'comments'
+
+
+def test_stream_data_closes_response(stub_server, monkeypatch):
+    unraisable = []
+    monkeypatch.setattr(sys, 'unraisablehook', unraisable.append)
+    robot = types.SimpleNamespace(user_token='token')
+    kwargs = dict(start_nsec=START_SEC * NSEC_PER_SEC, end_nsec=END_SEC * NSEC_PER_SEC,
+                  robot_time=True)
+    with pytest.raises(EOFError):
+        list(bddf_download.stream_data(robot, 'robot', **kwargs))
+    assert len(list(bddf_download.stream_data(robot, 'robot', **kwargs))) == END_SEC - START_SEC
+
+    # Stopping early closes the reader and the response.
+    messages = bddf_download.stream_protobuf_messages(robot, 'robot', **kwargs)
+    next(messages)
+    messages.close()
+    del messages
+    gc.collect()
+    assert not unraisable
@@ -0,0 +1,72 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Unit tests for the executor module."""
+import threading
+import time
+
+from bosdyn.client.common import BaseClient
+from bosdyn.client.executor import ExecutorMetrics, SharedExecutor, default_executor
+from bosdyn.client.sdk import Sdk
+
+
+def _wait_for(condition, timeout=5):
+    end_time = time.time() + timeout
+    while not condition():
+        assert time.time() < end_time
+        time.sleep(0.01)
+
+
+def test_shared_executor_metrics():
+    executor = SharedExecutor(max_workers=2, thread_name_prefix='test-executor')
+    release = threading.Event()
+    try:
+        assert executor.metrics() == ExecutorMetrics(max_workers=2, active_workers=0,
+                                                     queue_depth=0, completed=0)
+        futures = [executor.submit(release.wait) for _ in range(5)]
+        _wait_for(lambda: executor.metrics().active_workers == 2)
+        assert executor.metrics().queue_depth == 3
+        # No more threads than max_workers are started.
+        assert sum(1 for thread in threading.enumerate()
+                   if thread.name.startswith('test-executor')) == 2
+
+        # A cancelled task leaves the queue.
+        assert futures[-1].cancel()
+        assert executor.metrics().queue_depth == 2
+
+        release.set()
+        assert all(future.result(timeout=5) for future in futures[:-1])
+        _wait_for(lambda: executor.metrics().completed == 4)
+        assert executor.metrics() == ExecutorMetrics(max_workers=2, active_workers=0,
+                                                     queue_depth=0, completed=4)
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_executor_shared_by_clients():
+    sdk = Sdk()
+    robot = sdk.create_robot('address')
+    assert isinstance(sdk.executor, SharedExecutor)
+    assert robot.executor is sdk.executor
+    clients = [BaseClient(lambda channel: None) for _ in range(3)]
+    for client in clients:
+        client.update_from(robot)
+    assert all(client.executor is sdk.executor for client in clients)
+
+
+def test_call_async_streaming_default_executor():
+
+    def rpc_method(request, **kwargs):
+        return request * 2
+
+    rpc_method._method = b'MockStub.rpc_method'
+
+    clients = [BaseClient(lambda channel: None) for _ in range(3)]
+    results = [client.call_async_streaming(rpc_method, 2).result() for client in clients]
+    assert results == [4, 4, 4]
+    # Clients without an executor share the default one, rather than each starting a pool.
+    assert all(client.executor is default_executor() for client in clients)
@@ -5,9 +5,11 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """Unit tests for the graph_nav module."""
+import asyncio
 import concurrent
 
 import grpc
+import grpc.aio
 import pytest
 
 import bosdyn.client.graph_nav
@@ -146,6 +148,7 @@ def server(client, service):
     port = server.add_insecure_port('127.0.0.1:0')
     channel = grpc.insecure_channel('127.0.0.1:{}'.format(port))
     client.channel = channel
+    client.aio_channel_factory = lambda: grpc.aio.insecure_channel('127.0.0.1:{}'.format(port))
     server.start()
     yield server
     server.stop(0)
@@ -421,3 +424,26 @@ def test_download_edge_snapshot(client, service, server):
     service.download_edge_snapshot_status = graph_nav_pb2.DownloadEdgeSnapshotResponse.STATUS_SNAPSHOT_DOES_NOT_EXIST
     with pytest.raises(bosdyn.client.graph_nav.UnknownMapInformationError):
         make_call()
+
+
+def test_aio(client, service, server):
+
+    async def run():
+        try:
+            snapshot = await client.download_waypoint_snapshot_aio(
+                waypoint_snapshot_id='mywaypoint')
+            assert snapshot == map_pb2.WaypointSnapshot()
+            await client.download_edge_snapshot_aio(edge_snapshot_id='myedge')
+            feedback = await client.navigation_feedback_aio()
+            assert feedback.status == service.nav_feedback_status
+
+            service.download_wp_snapshot_status = graph_nav_pb2.DownloadWaypointSnapshotResponse.STATUS_SNAPSHOT_DOES_NOT_EXIST
+            with pytest.raises(UnknownMapInformationError):
+                await client.download_waypoint_snapshot_aio(waypoint_snapshot_id='mywaypoint')
+            service.common_header_code = header_pb2.CommonError.CODE_INTERNAL_SERVER_ERROR
+            with pytest.raises(InternalServerError):
+                await client.navigation_feedback_aio()
+        finally:
+            await client.aio_channel.close()
+
+    asyncio.run(run())
@@ -0,0 +1,154 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Unit tests for the rpc_metrics module."""
+import asyncio
+import time
+
+import grpc
+import pytest
+
+from bosdyn.api import robot_state_pb2, robot_state_service_pb2_grpc
+from bosdyn.client.exceptions import PermissionDeniedError
+from bosdyn.client.robot_state import RobotStateClient
+from bosdyn.client.rpc_metrics import RpcMetrics, measure_rpcs
+
+from . import helpers
+
+GET_STATE = 'bosdyn.api.RobotStateService/GetRobotState'
+GET_METRICS = 'bosdyn.api.RobotStateService/GetRobotMetrics'
+
+
+class MockRobotStateServicer(robot_state_service_pb2_grpc.RobotStateServiceServicer):
+
+    def GetRobotState(self, request, context):
+        response = robot_state_pb2.RobotStateResponse()
+        helpers.add_common_header(response, request)
+        response.robot_state.power_state.motor_power_state = robot_state_pb2.PowerState.STATE_ON
+        return response
+
+    def GetRobotMetrics(self, request, context):
+        context.abort(grpc.StatusCode.PERMISSION_DENIED, 'not allowed')
+
+
+def _wait_for(condition, timeout=5):
+    end_time = time.time() + timeout
+    while not condition():
+        assert time.time() < end_time
+        time.sleep(0.01)
+
+
+def test_rpc_metrics():
+    metrics = RpcMetrics(latency_buckets_sec=[0.5, 10])
+    with metrics.measure('Service/Method') as measurement:
+        measurement.add_request(robot_state_pb2.RobotLinkModelRequest(link_name='body'))
+    with pytest.raises(ValueError):
+        with metrics.measure('Service/Method'):
+            raise ValueError()
+    in_flight = metrics.start('Service/Other')
+
+    snapshot = metrics.snapshot()
+    assert snapshot['Service/Method'] == {
+        'calls': 2,
+        'in_flight': 0,
+        'latency_sec': {
+            'sum': snapshot['Service/Method']['latency_sec']['sum'],
+            'buckets': [(0.5, 2), (10, 2), (float('inf'), 2)]
+        },
+        'request_bytes': 6,
+        'response_bytes': 0,
+        'errors': {
+            'ValueError': 1
+        },
+    }
+    assert snapshot['Service/Other']['in_flight'] == 1
+
+    text = metrics.prometheus_text()
+    assert '# TYPE bosdyn_client_rpc_latency_seconds histogram\n' in text
+    assert 'bosdyn_client_rpc_latency_seconds_bucket{method="Service/Method",le="+Inf"} 2\n' in text
+    assert 'bosdyn_client_rpc_errors_total{method="Service/Method",error="ValueError"} 1\n' in text
+    assert 'bosdyn_client_rpc_in_flight{method="Service/Other"} 1\n' in text
+
+    # Resetting keeps the calls in flight, which finish later.
+    metrics.reset()
+    assert list(metrics.snapshot()) == ['Service/Other']
+    in_flight.finish()
+    in_flight.finish()
+    assert metrics.snapshot()['Service/Other']['in_flight'] == 0
+    assert metrics.snapshot()['Service/Other']['calls'] == 1
+
+
+def test_client_rpc_metrics():
+    client = RobotStateClient()
+    server = helpers.setup_client_and_service(
+        client, MockRobotStateServicer(),
+        robot_state_service_pb2_grpc.add_RobotStateServiceServicer_to_server)
+    try:
+        # Nothing is measured unless asked for.
+        client.get_robot_state()
+        assert client.rpc_metrics is None
+
+        with measure_rpcs(client) as metrics:
+            client.get_robot_state()
+            client.get_robot_state_async().result()
+            with pytest.raises(PermissionDeniedError):
+                client.get_robot_metrics()
+            with pytest.raises(PermissionDeniedError):
+                client.get_robot_metrics_async().result()
+
+            async def run():
+                try:
+                    await client.get_robot_state_aio()
+                    with pytest.raises(PermissionDeniedError):
+                        await client.get_robot_metrics_aio()
+                finally:
+                    await client.aio_channel.close()
+
+            asyncio.run(run())
+        assert client.rpc_metrics is None
+    finally:
+        server.stop(0)
+
+    # Async calls are recorded by a callback, which may run after their result is returned.
+    _wait_for(lambda: all(method['in_flight'] == 0 for method in metrics.snapshot().values()))
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {GET_STATE, GET_METRICS}
+    state = snapshot[GET_STATE]
+    assert state['calls'] == 3
+    assert state['in_flight'] == 0
+    assert state['errors'] == {}
+    assert state['latency_sec']['buckets'][-1] == (float('inf'), 3)
+    assert state['request_bytes'] == 0  # No request processors, so the requests are empty.
+    assert state['response_bytes'] > 0
+    errors = snapshot[GET_METRICS]
+    assert errors['calls'] == 3
+    assert errors['in_flight'] == 0
+    assert errors['errors'] == {'PermissionDeniedError': 3}
+
+
+def test_call_async_error_from_response_once():
+    client = RobotStateClient()
+    server = helpers.setup_client_and_service(
+        client, MockRobotStateServicer(),
+        robot_state_service_pb2_grpc.add_RobotStateServiceServicer_to_server)
+    responses = []
+
+    def error_from_response(response):
+        responses.append(response)
+        return None
+
+    try:
+        with measure_rpcs(client) as metrics:
+            future = client.call_async(client._stub.GetRobotState,
+                                       robot_state_pb2.RobotStateRequest(),
+                                       error_from_response=error_from_response)
+            future.result()
+            assert future.exception() is None
+    finally:
+        server.stop(0)
+    # Both the measurement and the future use the same error.
+    _wait_for(lambda: metrics.snapshot()[GET_STATE]['calls'] == 1)
+    assert len(responses) == 1
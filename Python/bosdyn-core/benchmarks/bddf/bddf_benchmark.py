@@ -0,0 +1,358 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Benchmark suite for writing and reading bddf files, with results written as JSON.
+
+For each file size, a synthetic file is generated locally and these cases are run:
+  write:            DataWriter throughput writing the file (message blocks of --message-bytes).
+  pod_write:        PodSeriesWriter throughput writing float64 samples of a 3-vector series.
+  open:             DataReader open latency using the index at the end of the file, and using
+                     the sidecar index cache.
+  sequential_read:  messages/s reading every block in file order, with seek+read and with mmap.
+  random_read:      messages/s reading --random-reads blocks in random order.
+  stream_recovery:  StreamDataReader speed rebuilding the index of the file with its index and
+                     last block cut off, as after a crash of the writer.  This is also the
+                     latency of opening a file without an index.
+
+Each case runs in its own subprocess so that its peak RSS is measured independently.  With
+ --input, the cases which read are run on an existing file instead of generated ones.  Results
+ can be compared to an earlier run with --baseline, which reports the values which got worse by
+ more than --tolerance and exits with status 1 if there are any.
+
+Example:
+  python bddf_benchmark.py --size-mb 100 --size-mb 1000 --output results.json
+  python bddf_benchmark.py --size-mb 100 --baseline results.json
+  python bddf_benchmark.py --input log.bddf --case sequential_read
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import bosdyn.api.bddf_pb2 as bddf
+from bosdyn.bddf import DataReader, DataWriter, PodSeriesWriter, StreamDataReader
+from bosdyn.bddf.index_cache import index_cache_filename
+
+CASES = ('write', 'pod_write', 'open', 'sequential_read', 'random_read', 'stream_recovery')
+WRITE_CASES = ('write', 'pod_write')
+MB = 1024 * 1024
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB."""
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_write(filename, options):
+    """Write the test file with a single message series of size_mb megabytes."""
+    num_messages = max(1, (options.size_mb * MB) // options.message_bytes)
+    payload = os.urandom(options.message_bytes)
+    start = time.perf_counter()
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        series_index = data_writer.add_message_series('bosdyn/benchmark', {'channel': 'data'},
+                                                      'application/octet-stream', 'bytes')
+        for idx in range(num_messages):
+            data_writer.write_data(series_index, idx * 1000, payload)
+    elapsed = time.perf_counter() - start
+    return {
+        'messages': num_messages,
+        'seconds': elapsed,
+        'messages_per_sec': num_messages / elapsed,
+        'mb_per_sec': os.path.getsize(filename) / elapsed / MB,
+    }
+
+
+def run_pod_write(filename, options):
+    """Write size_mb megabytes of 3-vector float64 samples with a PodSeriesWriter."""
+    pod_filename = filename + '.pod'
+    num_samples = max(1, (options.size_mb * MB) // 24)
+    sample = (1.0, 2.0, 3.0)
+    start = time.perf_counter()
+    with open(pod_filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        pod_writer = PodSeriesWriter(data_writer, 'bosdyn/benchmark', {'varname': 'vector'},
+                                     bddf.TYPE_FLOAT64, dimensions=[3], data_block_size=8192)
+        for idx in range(num_samples):
+            pod_writer.write(idx * 1000, sample)
+    elapsed = time.perf_counter() - start
+    os.unlink(pod_filename)
+    return {
+        'samples': num_samples,
+        'seconds': elapsed,
+        'samples_per_sec': num_samples / elapsed,
+        'mb_per_sec': num_samples * 24 / elapsed / MB,
+    }
+
+
+def _open_and_index(filename, index_cache):
+    start = time.perf_counter()
+    with DataReader(filename=filename, index_cache=index_cache) as data_reader:
+        for series_index in range(len(data_reader.file_index.series_identifiers)):
+            data_reader.num_data_blocks(series_index)
+    return time.perf_counter() - start
+
+
+def run_open(filename, _options):
+    """Time opening the file and loading the index of every series."""
+    results = {'index_sec': _open_and_index(filename, index_cache=False)}
+    cache_filename = index_cache_filename(filename)
+    _open_and_index(filename, index_cache=True)  # Writes the sidecar.
+    try:
+        results['index_cache_sec'] = _open_and_index(filename, index_cache=True)
+    finally:
+        if os.path.exists(cache_filename):
+            os.unlink(cache_filename)
+    return results
+
+
+def _read_blocks(filename, use_mmap, blocks):
+    start = time.perf_counter()
+    num_bytes = 0
+    with DataReader(filename=filename, use_mmap=use_mmap) as data_reader:
+        if blocks is None:
+            blocks = [(series_index, index_in_series)
+                      for series_index in range(len(data_reader.file_index.series_identifiers))
+                      for index_in_series in range(data_reader.num_data_blocks(series_index))]
+            start = time.perf_counter()
+        for series_index, index_in_series in blocks:
+            num_bytes += len(data_reader.read(series_index, index_in_series)[2])
+    elapsed = time.perf_counter() - start
+    return {
+        'messages': len(blocks),
+        'seconds': elapsed,
+        'messages_per_sec': len(blocks) / elapsed,
+        'mb_per_sec': num_bytes / elapsed / MB,
+    }
+
+
+def run_sequential_read(filename, _options):
+    """Read every block in file order, with seek+read and with mmap."""
+    return {
+        'read': _read_blocks(filename, False, None),
+        'mmap': _read_blocks(filename, True, None),
+    }
+
+
+def run_random_read(filename, options):
+    """Read random_reads blocks chosen at random, with seek+read and with mmap."""
+    with DataReader(filename=filename) as data_reader:
+        all_blocks = [(series_index, index_in_series)
+                      for series_index in range(len(data_reader.file_index.series_identifiers))
+                      for index_in_series in range(data_reader.num_data_blocks(series_index))]
+    rng = random.Random(0)
+    blocks = [rng.choice(all_blocks) for _ in range(options.random_reads)]
+    return {
+        'read': _read_blocks(filename, False, blocks),
+        'mmap': _read_blocks(filename, True, blocks),
+    }
+
+
+class _TruncatedFile:
+    """Read-only file which ends at the given offset, without copying the file."""
+
+    def __init__(self, filename, size):
+        self._file = open(filename, 'rb')  # pylint: disable=consider-using-with
+        self._size = size
+
+    def read(self, nbytes=-1):
+        """Read up to nbytes, stopping at the truncated end of the file."""
+        remaining = self._size - self._file.tell()
+        if nbytes < 0 or nbytes > remaining:
+            nbytes = max(remaining, 0)
+        return self._file.read(nbytes)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Seek within the underlying file."""
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        """Return the current offset."""
+        return self._file.tell()
+
+    def seekable(self):  # pylint: disable=no-self-use
+        """The file is seekable."""
+        return True
+
+    def close(self):
+        """Close the underlying file."""
+        self._file.close()
+
+
+def run_stream_recovery(filename, _options):
+    """Rebuild the index of the file with its last data block, index and end block cut off."""
+    with DataReader(filename=filename) as data_reader:
+        truncated_size = max(
+            data_reader.block_arrays(series_index).file_offsets[-1]
+            for series_index in range(len(data_reader.file_index.series_identifiers))
+            if data_reader.num_data_blocks(series_index))
+    infile = _TruncatedFile(filename, truncated_size)
+    start = time.perf_counter()
+    num_blocks = 0
+    try:
+        # Without an end block there is no checksum to verify.
+        reader = StreamDataReader(infile, verify_checksum=False)
+        while True:
+            try:
+                reader.read_data_block()
+            except EOFError:
+                break
+            num_blocks += 1
+    finally:
+        infile.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'blocks': num_blocks,
+        'seconds': elapsed,
+        'blocks_per_sec': num_blocks / elapsed,
+        'mb_per_sec': truncated_size / elapsed / MB,
+    }
+
+
+CASE_FUNCTIONS = {
+    'write': run_write,
+    'pod_write': run_pod_write,
+    'open': run_open,
+    'sequential_read': run_sequential_read,
+    'random_read': run_random_read,
+    'stream_recovery': run_stream_recovery,
+}
+
+
+def run_case_in_subprocess(case, filename, options):
+    """Run one case in a fresh interpreter and return its results, with its peak RSS."""
+    output = subprocess.check_output([
+        sys.executable,
+        os.path.abspath(__file__), '--child', case, '--file', filename, '--size-mb',
+        str(options.size_mb or 0), '--message-bytes',
+        str(options.message_bytes), '--random-reads',
+        str(options.random_reads)
+    ])
+    return json.loads(output)
+
+
+def _flatten(results, prefix=''):
+    """Yield (dotted key, value) for every number in nested result dicts."""
+    for key, value in results.items():
+        if isinstance(value, dict):
+            for item in _flatten(value, prefix + key + '.'):
+                yield item
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield prefix + key, value
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of (key, baseline value, value) for results worse than the baseline.
+
+    Rates ('_per_sec') are worse when lower, and times and memory are worse when higher.  Counts
+     are not compared.
+    """
+    baseline_values = dict(_flatten(baseline.get('sizes', {}), 'sizes.'))
+    regressions = []
+    for key, value in _flatten(results['sizes'], 'sizes.'):
+        old = baseline_values.get(key)
+        if not old:
+            continue
+        if key.endswith('_per_sec'):
+            worse = value < old * (1 - tolerance)
+        elif key.endswith(('seconds', '_sec', '_mb')):
+            worse = value > old * (1 + tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append((key, old, value))
+    return regressions
+
+
+def main():
+    """Command-line interface."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, action='append',
+                        help='size of a generated file (may be repeated, default 100)')
+    parser.add_argument('--message-bytes', type=int, default=4096, help='size of each message')
+    parser.add_argument('--random-reads', type=int, default=10000,
+                        help='number of blocks read by random_read')
+    parser.add_argument('--case', action='append', choices=CASES,
+                        help='case(s) to run (default: all)')
+    parser.add_argument('--directory', help='directory for generated files (default: temp)')
+    parser.add_argument('--input', help='existing bddf file to run the read cases on')
+    parser.add_argument('--output', help='file to write the JSON results to (default: stdout)')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='fraction by which a result may be worse than the baseline')
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    parser.add_argument('--child', choices=CASES, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        options.size_mb = options.size_mb[0]
+        results = CASE_FUNCTIONS[options.child](options.file, options)
+        results['peak_rss_mb'] = peak_rss_mb()
+        print(json.dumps(results))
+        return 0
+
+    cases = options.case or CASES
+    if options.input:
+        cases = [case for case in cases if case not in WRITE_CASES]
+    directory = options.directory or tempfile.gettempdir()
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'message_bytes': options.message_bytes,
+        'sizes': {},
+    }
+    sizes_mb = options.size_mb or [100]
+    if options.input:
+        sizes_mb = []
+        options.size_mb = None
+        results['sizes'][os.path.basename(options.input)] = {
+            case: run_case_in_subprocess(case, options.input, options) for case in cases
+        }
+    for size_mb in sizes_mb:
+        options.size_mb = size_mb
+        filename = os.path.join(directory, 'bddf_benchmark_{}.bddf'.format(os.getpid()))
+        size_results = {}
+        try:
+            # The other cases read the file written by the write case.
+            size_results['write'] = run_case_in_subprocess('write', filename, options)
+            for case in cases:
+                if case != 'write':
+                    size_results[case] = run_case_in_subprocess(case, filename, options)
+        finally:
+            if os.path.exists(filename):
+                os.unlink(filename)
+        if 'write' not in cases:
+            del size_results['write']
+        results['sizes']['{}MB'.format(size_mb)] = size_results
+
+    text = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, 'w') as outfile:
+            outfile.write(text + '\n')
+    else:
+        print(text)
+
+    if options.baseline:
+        with open(options.baseline) as infile:
+            regressions = compare(results, json.load(infile), options.tolerance)
+        for key, old, value in regressions:
+            print('REGRESSION {}: {:.6g} -> {:.6g}'.format(key, old, value), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Report compression ratio and write/read throughput of each bddf block compression codec.
+
+Messages are synthetic RobotState protobufs unless an existing bddf file is given, in which
+ case the data blocks of that file are re-written with each codec.
+
+Example:
+  python compression_benchmark.py --num-messages 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bosdyn.api.robot_state_pb2 import RobotState
+from bosdyn.bddf import DataReader, DataWriter, StreamDataReader, codec_names
+
+JOINT_NAMES = ['fl.hx', 'fl.hy', 'fl.kn', 'fr.hx', 'fr.hy', 'fr.kn',
+               'hl.hx', 'hl.hy', 'hl.kn', 'hr.hx', 'hr.hy', 'hr.kn']  # yapf: disable
+
+
+def synthetic_messages(num_messages):
+    """Return a list of (timestamp_nsec, serialized RobotState) tuples."""
+    messages = []
+    for idx in range(num_messages):
+        state = RobotState()
+        state.kinematic_state.acquisition_timestamp.FromNanoseconds(idx * 1000000)
+        for joint_idx, name in enumerate(JOINT_NAMES):
+            joint = state.kinematic_state.joint_states.add(name=name)
+            joint.position.value = 0.001 * ((idx + joint_idx) % 1000)
+            joint.velocity.value = 0.01 * ((idx * joint_idx) % 100)
+            joint.load.value = float(joint_idx)
+        state.power_state.locomotion_charge_percentage.value = 100.0 - idx * 1e-4
+        messages.append((idx * 1000000, state.SerializeToString()))
+    return messages
+
+
+def messages_from_file(filename):
+    """Return a list of (timestamp_nsec, data) tuples for all data blocks in a bddf file."""
+    messages = []
+    with open(filename, 'rb') as infile, StreamDataReader(infile) as data_reader:
+        while True:
+            try:
+                desc, _sdesc, data = data_reader.read_data_block()
+            except EOFError:
+                return messages
+            messages.append((desc.timestamp.ToNanoseconds(), bytes(data)))
+
+
+def run_codec(filename, codec, messages):
+    """Write and read the messages with the given codec, returning a dict of results."""
+    raw_bytes = sum(len(data) for _, data in messages)
+    start = time.perf_counter()
+    with open(filename, 'wb') as outfile, DataWriter(outfile, compression=codec) as data_writer:
+        series_index = data_writer.add_message_series('bosdyn/benchmark', {'channel': 'data'},
+                                                      'application/protobuf', 'bytes')
+        for timestamp_nsec, data in messages:
+            data_writer.write_data(series_index, timestamp_nsec, data)
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with DataReader(filename=filename) as data_reader:
+        for index_in_series in range(data_reader.num_data_blocks(0)):
+            data_reader.read(0, index_in_series)
+    read_seconds = time.perf_counter() - start
+
+    file_bytes = os.path.getsize(filename)
+    return {
+        'file_mb': file_bytes / (1024 * 1024),
+        'ratio': raw_bytes / file_bytes,
+        'write_mb_per_sec': raw_bytes / write_seconds / (1024 * 1024),
+        'read_mb_per_sec': raw_bytes / read_seconds / (1024 * 1024),
+    }
+
+
+def main():
+    """Command-line interface."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num-messages', type=int, default=10000,
+                        help='number of synthetic messages to write')
+    parser.add_argument('--file', help='existing bddf file whose data is used for the benchmark')
+    parser.add_argument('--codec', action='append', help='codec(s) to test (default: all)')
+    options = parser.parse_args()
+
+    if options.file:
+        messages = messages_from_file(options.file)
+    else:
+        messages = synthetic_messages(options.num_messages)
+    filename = os.path.join(tempfile.gettempdir(), 'compression_benchmark.bddf')
+    try:
+        results = {
+            codec: run_codec(filename, codec, messages)
+            for codec in (options.codec or codec_names())
+        }
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,18 +9,28 @@
 # Importing symbols to use directly via "bosdyn.bddf" namespace.
 
 # pylint: disable=unused-import
+# Class for writing data to a DataWriter from a background thread.
+from .async_data_writer import AsyncDataWriter, OverflowPolicy
 from .common import (LOGGER, PROTOBUF_CONTENT_TYPE, AddSeriesError, ChecksumError, DataError,
                      DataFormatError, ParseError, SeriesNotUniqueError)
+# Registry of codecs for compressing the data blocks of a series.
+from .compression import BlockCodec, codec_names, get_codec, register_codec
 # Class for reading data from a file-like object which is seekable.
 from .data_reader import DataReader
 # Class for writing data to a file.
 from .data_writer import DataWriter
 # Class for registering a series which stores GRPC request/response pairs.
 from .grpc_reader import GrpcReader
+# A logged GRPC request and its response.
+from .grpc_service_reader import GrpcRequestResponse
 # Class for registering a series which stores GRPC request/response pairs.
 from .grpc_service_writer import GrpcServiceWriter
+# Sidecar files caching the parsed index of a bddf file.
+from .index_cache import INDEX_CACHE_SUFFIX, index_cache_filename
 # A class for reading message data from a DataFile.
 from .message_reader import MessageReader
+# A class for reading the data of many bddf files in timestamp order.
+from .multi_file_reader import MultiFileReader
 # Class for reading a series of POD data from a DataFile.
 from .pod_series_reader import PodSeriesReader
 # Class which assists with writing POD data values into a series, within a DataWriter.
@@ -33,3 +43,5 @@ from .protobuf_reader import ProtobufReader
 from .protobuf_series_writer import ProtobufSeriesWriter
 # A data reader which reads the file format from a stream, without seeking.
 from .stream_data_reader import StreamDataReader
+# Data reader which follows a file while it is being written.
+from .tailing_stream_reader import TailingStreamReader
@@ -0,0 +1,223 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""AsyncDataWriter writes data to a DataWriter from a background thread."""
+
+import collections
+import threading
+
+from .common import LOGGER
+
+
+class OverflowPolicy:  # pylint: disable=too-few-public-methods
+    """What AsyncDataWriter.write_data() does when the queue is full."""
+
+    BLOCK = 'block'  # Wait until there is room in the queue.
+    DROP_OLDEST = 'drop-oldest'  # Discard the oldest queued data to make room.
+    DROP_NEWEST = 'drop-newest'  # Discard the data being written.
+
+    ALL = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class AsyncDataWriter:  # pylint: disable=too-many-instance-attributes
+    """Wraps a DataWriter so that data blocks are written by a dedicated thread.
+
+    write_data() only adds the data to a bounded queue.  Building the data descriptor, updating
+     the file checksum and writing to the file all happen on the writer thread, so a slow disk
+     does not stall the thread which produces the data.
+
+    Registering series (add_series(), add_message_series(), add_pod_series()) writes to the
+     file immediately, from the calling thread.  The object can be passed in place of the
+     DataWriter to ProtobufSeriesWriter, PodSeriesWriter and GrpcServiceWriter.
+
+    Exceptions raised while writing in the background are re-raised from the next call to
+     write_data(), flush() or close().
+    """
+
+    def __init__(self, data_writer, max_queue_size=1024, overflow_policy=OverflowPolicy.BLOCK):
+        """
+        Args:
+         data_writer:      DataWriter to which data is written.
+         max_queue_size:   maximum number of data blocks waiting to be written.
+         overflow_policy:  OverflowPolicy value selecting what happens when the queue is full.
+        """
+        if overflow_policy not in OverflowPolicy.ALL:
+            raise ValueError('Unknown overflow_policy "{}"'.format(overflow_policy))
+        if max_queue_size < 1:
+            raise ValueError('max_queue_size must be positive')
+        self._data_writer = data_writer
+        self._max_queue_size = max_queue_size
+        self._overflow_policy = overflow_policy
+        self._queue = collections.deque()
+        self._cond = threading.Condition()  # Protects the queue, counters and state flags.
+        self._write_lock = threading.Lock()  # Serializes access to the DataWriter.
+        self._num_in_progress = 0
+        self._num_written = 0
+        self._num_dropped = 0
+        self._max_queue_depth = 0
+        self._error = None
+        self._stopping = False
+        self._closed = False
+        self._on_close = []
+        self._thread = threading.Thread(target=self._run, name='AsyncDataWriter', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value_, tb_):
+        self.close()
+
+    @property
+    def data_writer(self):
+        """Return the underlying DataWriter."""
+        return self._data_writer
+
+    @property
+    def file_index(self):
+        """Get the FileIndex proto used which describes how to access data in the file."""
+        with self._write_lock:
+            return self._data_writer.file_index
+
+    @property
+    def queue_depth(self):
+        """Number of data blocks currently waiting to be written."""
+        return len(self._queue)
+
+    @property
+    def max_queue_depth(self):
+        """Largest number of data blocks which have been waiting to be written at once."""
+        return self._max_queue_depth
+
+    @property
+    def num_written(self):
+        """Number of data blocks written to the DataWriter."""
+        return self._num_written
+
+    @property
+    def num_dropped(self):
+        """Number of data blocks discarded because the queue was full."""
+        return self._num_dropped
+
+    def add_message_series(self, *args, **kwargs):
+        """Add a new series for storing message data.  See DataWriter.add_message_series()."""
+        with self._write_lock:
+            return self._data_writer.add_message_series(*args, **kwargs)
+
+    def add_pod_series(self, *args, **kwargs):
+        """Add a new series for storing POD data.  See DataWriter.add_pod_series()."""
+        with self._write_lock:
+            return self._data_writer.add_pod_series(*args, **kwargs)
+
+    def add_series(self, *args, **kwargs):
+        """Register a new series for messages.  See DataWriter.add_series()."""
+        with self._write_lock:
+            return self._data_writer.add_series(*args, **kwargs)
+
+    def write_checkpoint(self):
+        """Write a checkpoint for all data written so far.  See DataWriter.write_checkpoint().
+
+        Data which is still queued is not included in the checkpoint.
+        """
+        with self._write_lock:
+            self._data_writer.write_checkpoint()
+
+    def write_data(self, series_index, timestamp_nsec, data, additional_indexes=None):
+        """Queue binary data to be stored into the file, under a previously-defined channel.
+
+        Args:
+         series_index:   integer returned when series was registered with the file.
+         timestamp_nsec: nsec since unix epoch to timestamp the data.
+         data:           binary data to store.  It must not be modified after this call.
+         additional_indexes: additional timestamps if needed for this channel.
+
+        Returns True if the data was queued, False if it was dropped.
+
+        Raises ValueError if the writer is closed, including while waiting for room in the queue.
+        """
+        with self._cond:
+            self._raise_error()
+            if self._stopping:
+                raise ValueError('AsyncDataWriter is closed')
+            if len(self._queue) >= self._max_queue_size:
+                if self._overflow_policy == OverflowPolicy.DROP_NEWEST:
+                    self._num_dropped += 1
+                    return False
+                if self._overflow_policy == OverflowPolicy.DROP_OLDEST:
+                    self._queue.popleft()
+                    self._num_dropped += 1
+                else:
+                    self._cond.wait_for(lambda: (len(self._queue) < self._max_queue_size or
+                                                 self._stopping or self._error is not None))
+                    # The writer may have been closed, or failed, while waiting.
+                    self._raise_error()
+                    if self._stopping:
+                        raise ValueError('AsyncDataWriter is closed')
+            self._queue.append((series_index, timestamp_nsec, data, additional_indexes))
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._cond.notify_all()
+        return True
+
+    def run_on_close(self, thunk):
+        """Register a function to be called when file is closed, before queued data is flushed."""
+        self._on_close.append(thunk)
+
+    def flush(self, timeout=None):
+        """Wait until all queued data has been written to the DataWriter.
+
+        Returns True if the queue was emptied, False if the timeout elapsed first.
+        """
+        with self._cond:
+            done = self._cond.wait_for(lambda: not self._queue and not self._num_in_progress,
+                                       timeout)
+            self._raise_error()
+        return done
+
+    def close(self):
+        """Write all queued data, stop the writer thread, and close the DataWriter."""
+        if self._closed:
+            return
+        self._closed = True
+        for thunk in self._on_close:
+            thunk()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._write_lock:
+            self._data_writer._close()  # pylint: disable=protected-access
+        with self._cond:
+            self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stopping)
+                if not self._queue:
+                    return
+                item = self._queue.popleft()
+                self._num_in_progress = 1
+                # Wake producers waiting for room in the queue.
+                self._cond.notify_all()
+            error = None
+            try:
+                with self._write_lock:
+                    self._data_writer.write_data(*item)
+            except Exception as err:  # pylint: disable=broad-except
+                LOGGER.exception('Failed to write data to series %d', item[0])
+                error = err
+            with self._cond:
+                self._num_in_progress = 0
+                if error is None:
+                    self._num_written += 1
+                elif self._error is None:
+                    self._error = error
+                self._cond.notify_all()
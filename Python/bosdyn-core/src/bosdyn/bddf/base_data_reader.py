@@ -12,6 +12,10 @@ import bosdyn.api.bddf_pb2 as bddf
 from .common import (BLOCK_HEADER_SIZE_MASK, BLOCK_HEADER_TYPE_MASK, DATA_BLOCK_TYPE,
                      DESCRIPTOR_BLOCK_TYPE, END_BLOCK_TYPE, LOGGER, MAGIC, SHA1_DIGEST_NBYTES,
                      ChecksumError, DataFormatError, ParseError)
+from .compression import COMPRESSION_ANNOTATION, COMPRESSION_MINOR_VERSION, get_codec
+
+# Largest number of bytes read at once when skipping over data.
+_SKIP_CHUNK_NBYTES = 1 << 20
 
 
 class BaseDataReader:  # pylint: disable=too-many-instance-attributes
@@ -38,6 +42,7 @@ class BaseDataReader:  # pylint: disable=too-many-instance-attributes
         self._read_checksum = None
         self._eof = False
         self._file_index = None
+        self._series_index_to_codec = {}  # {series_index -> BlockCodec or None}
         self._read_header()
 
     @property
@@ -79,6 +84,10 @@ class BaseDataReader:  # pylint: disable=too-many-instance-attributes
         """Override to compute checksum on reading, in stream-readers."""
         return None
 
+    def series_descriptor(self, series_index):
+        """Return SeriesDescriptor for given series index."""
+        raise NotImplementedError
+
     def series_spec_to_index(self, series_spec):
         """Given a series spec (map {key -> value}), return the series index for that series.
 
@@ -108,13 +117,22 @@ class BaseDataReader:  # pylint: disable=too-many-instance-attributes
             raise EOFError("Unexpected end of bddf file")
         return block
 
+    def _skip(self, nbytes):
+        """Advance past nbytes of the file without returning them."""
+        while nbytes:
+            nbytes -= len(self._read(min(nbytes, _SKIP_CHUNK_NBYTES)))
+
+    def _skip_data_block(self, data_descriptor):  # pylint: disable=no-self-use,unused-argument
+        """Override to return True for data blocks whose data should not be read."""
+        return False
+
     def _read_header(self):
         magic = self._read(len(MAGIC))
         if magic != MAGIC:
             raise ParseError("Bad magic bytes at the start of the file.")
         self._file_descriptor = self._read_desc_block("file_descriptor")
         if (self._file_descriptor.version.major_version != 1 or
-                self._file_descriptor.version.minor_version != 0 or
+                self._file_descriptor.version.minor_version > COMPRESSION_MINOR_VERSION or
                 self._file_descriptor.version.patch_level != 0):
             raise DataFormatError("Unsupported file version: {}.{}.{}".format(
                 self._file_descriptor.version.major_version,
@@ -138,6 +156,21 @@ class BaseDataReader:  # pylint: disable=too-many-instance-attributes
         descriptor.ParseFromString(block)
         return descriptor
 
+    def _decode_data(self, series_index, data):
+        """Return the data of a block of the given series, decompressing it if necessary."""
+        try:
+            codec = self._series_index_to_codec[series_index]
+        except KeyError:
+            codec = None
+            if self._file_descriptor.version.minor_version >= COMPRESSION_MINOR_VERSION:
+                annotations = self.series_descriptor(series_index).annotations
+                if COMPRESSION_ANNOTATION in annotations:
+                    codec = get_codec(annotations[COMPRESSION_ANNOTATION])
+            self._series_index_to_codec[series_index] = codec
+        if codec is None:
+            return data
+        return codec.decompress(data)
+
     def _read_data_block(self):
         is_data, desc, data = self._read_block()
         assert is_data
@@ -181,5 +214,8 @@ class BaseDataReader:  # pylint: disable=too-many-instance-attributes
                 desc_size, block_size))
         data_desc = self._read_proto(bddf.DataDescriptor, desc_size)
         data_size = block_size - desc_size
+        if self._skip_data_block(data_desc):
+            self._skip(data_size)
+            return is_data_block, data_desc, None
         data = self._read(data_size)
         return is_data_block, data_desc, data
@@ -44,6 +44,10 @@ class BlockWriter:
         self._hasher.update(data)
         self._outfile.write(data)
 
+    def flush(self):
+        """Flush written data to the file."""
+        self._outfile.flush()
+
     def close(self):
         """Close the file, if not already closed."""
         if self.closed:
@@ -56,7 +60,7 @@ class BlockWriter:
         """Returns True if the writer has been closed."""
         return self._outfile is None
 
-    def write_header(self, annotations):
+    def write_header(self, annotations, minor_version=0):
         """Write the header of the data file, including annotations."""
         # pylint: disable=no-member
         # Magic bytes at the start of the file
@@ -64,7 +68,7 @@ class BlockWriter:
         header_block = bddf.DescriptorBlock()
         file_descriptor = header_block.file_descriptor
         file_descriptor.version.major_version = 1
-        file_descriptor.version.minor_version = 0
+        file_descriptor.version.minor_version = minor_version
         file_descriptor.version.patch_level = 0
         if annotations:
             file_descriptor.annotations.update(annotations)
@@ -0,0 +1,75 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Codecs for compressing the data of bddf data blocks.
+
+A series whose data blocks are compressed is annotated with the name of its codec under
+ COMPRESSION_ANNOTATION.  Files which may contain compressed series are written with
+ minor_version COMPRESSION_MINOR_VERSION, so readers which do not support compression reject
+ them as an unsupported version instead of returning compressed data.
+"""
+import zlib
+
+from .common import DataFormatError
+
+# Series annotation which names the codec used for the data blocks of a series.
+COMPRESSION_ANNOTATION = 'bosdyn:compression'
+
+# File format minor version of files which may contain compressed series.
+COMPRESSION_MINOR_VERSION = 1
+
+# Name of the codec which leaves data uncompressed.
+NO_COMPRESSION = 'none'
+
+
+class BlockCodec:  # pylint: disable=too-few-public-methods
+    """A named pair of functions which compress and decompress the data of a block.
+
+    Both functions take a bytes-like object and return bytes.
+    """
+
+    def __init__(self, name, compress, decompress):
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+
+
+_CODECS = {}
+
+
+def register_codec(codec):
+    """Register a BlockCodec so it may be used for writing and reading series.
+
+    A codec registered with the name of an existing codec replaces it.
+    """
+    _CODECS[codec.name] = codec
+
+
+def get_codec(name):
+    """Return the BlockCodec registered under the given name.
+
+    Raises DataFormatError if there is no such codec.
+    """
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise DataFormatError('Unknown compression codec "{}"'.format(name)) from None
+
+
+def codec_names():
+    """Return the names of all registered codecs."""
+    return list(_CODECS)
+
+
+register_codec(BlockCodec(NO_COMPRESSION, bytes, bytes))
+register_codec(BlockCodec('zlib', zlib.compress, zlib.decompress))
+
+try:
+    import lzma
+except ImportError:  # Python may be built without lzma support.
+    pass
+else:
+    register_codec(BlockCodec('lzma', lzma.compress, lzma.decompress))
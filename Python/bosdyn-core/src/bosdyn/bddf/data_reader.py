@@ -5,30 +5,77 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """Class for reading data from a file-like object which is seekable."""
+import mmap
 import os
 import struct
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import islice
+
+import bosdyn.api.bddf_pb2 as bddf
 
 from .base_data_reader import BaseDataReader
-from .common import END_MAGIC, INDEX_OFFSET_OFFSET, MAGIC, ParseError
+from .common import END_MAGIC, INDEX_OFFSET_OFFSET, LOGGER, MAGIC, ParseError
+from .file_indexer import BlockIndexArrays
+from .index_cache import CachedIndex, IndexCacheKey, load_index_cache, write_index_cache
 
 
 class DataReader(BaseDataReader):  # pylint: disable=too-many-instance-attributes
     """Class for reading data from a file-like object which is seekable.
 
     Methods raise ParseError if there is a problem with the format of the file.
+
+    If use_mmap is True, the file is memory-mapped and data is returned as memoryview slices of
+     the mapped file rather than as newly allocated bytes.  The mapping is kept alive until the
+     reader is closed and none of those memoryviews are referenced.
+
+    If index_cache is True, the index of the file is loaded from a sidecar file (see
+     bosdyn.bddf.index_cache) when a valid one exists, and otherwise the sidecar is written after
+     the index is read from the file.  This requires the name of the file to be known.
+
+    If cache_bytes is set, up to that many bytes of recently read (and decompressed) block data
+     are kept in a least-recently-used cache, so re-reading neighboring blocks does not access
+     the file again.  When blocks of a series are read in order, the following read_ahead_blocks
+     blocks of the series are also read, with a single read of the file, and cached.
     """
 
-    def __init__(self, infile=None, filename=None):
+    def __init__(  # pylint: disable=too-many-arguments
+            self, infile=None, filename=None, use_mmap=False, index_cache=False, cache_bytes=0,
+            read_ahead_blocks=16):
         """
         At least one of the following arguments must be specified.
 
         Args:
          infile:      binary file-like object for reading (e.g., from open(fname, "rb")).
          filename:    path of input file, if applicable.
+         use_mmap:    if True, memory-map the file instead of using seek+read (default=False).
+                       The file object must support fileno().
+         index_cache: if True, read and write a sidecar index cache file (default=False).
+         cache_bytes: maximum number of bytes of block data to cache, or 0 for no cache.
+         read_ahead_blocks: number of blocks to read ahead for in-order reads, when caching.
+                       Read-ahead is not used for memory-mapped files.
         """
+        self._use_mmap = use_mmap
+        self._mmap = None
+        self._view = None  # memoryview of the mapped file, when use_mmap is True.
+        self._view_offset = 0  # Read location within self._view.
+        self._view_base = 0  # File offset of the start of self._view.
         super(DataReader, self).__init__(infile, filename)
+        self._index_cache = index_cache
         self._series_index_to_descriptor = {}
         self._series_index_to_block_index = {}  # {series_index -> SeriesBlockIndex}
+        self._series_index_to_block_arrays = {}  # {series_index -> BlockIndexArrays}
+        self._series_index_to_descriptor_offset = {}  # {series_index -> file offset}
+        self._series_index_to_timestamps = {}  # {series_index -> array('q') of timestamp_nsec}
+        self._unsorted_series = set()  # series indexes whose timestamps are not in order
+        self._cache_bytes = cache_bytes
+        self._read_ahead_blocks = 0 if use_mmap else read_ahead_blocks
+        # {(series_index, index_in_series) -> (DataDescriptor, data)}, least recent first.
+        self._block_cache = OrderedDict()
+        self._block_cache_nbytes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._last_read = None  # (series_index, index_in_series) of the previous read().
         self._read_index()
 
     def series_descriptor(self, series_index):
@@ -38,19 +85,20 @@ class DataReader(BaseDataReader):  # pylint: disable=too-many-instance-attribute
         except KeyError:
             pass
 
-        series_block_index = self.series_block_index(series_index)
+        if series_index not in self._series_index_to_descriptor_offset:
+            self.block_arrays(series_index)
         desc = self._read_desc_block_at("series_descriptor",
-                                        series_block_index.descriptor_file_offset)
+                                        self._series_index_to_descriptor_offset[series_index])
         self._series_index_to_descriptor[series_index] = desc
         return desc
 
     def num_data_blocks(self, series_index):
         """Returns the number of data blocks for a given series in the file."""
-        return len(self.series_block_index(series_index).block_entries)
+        return len(self.block_arrays(series_index))
 
     def total_bytes(self, series_index):
         """Returns the total number of bytes for data in a given series in the file."""
-        return self.series_block_index(series_index).total_bytes
+        return self.block_arrays(series_index).total_bytes
 
     def read(self, series_index, index_in_series):
         """Retrieves a message and related information from the file.
@@ -63,10 +111,162 @@ class DataReader(BaseDataReader):  # pylint: disable=too-many-instance-attribute
 
         Raises ParseError if there is a problem with the format of the file.
         """
-        series_block_index = self.series_block_index(series_index)
-        msg_idx = series_block_index.block_entries[index_in_series]
-        desc, data = self._read_data_block_at(msg_idx.file_offset)
-        return desc, msg_idx.timestamp.ToNanoseconds(), data
+        arrays = self.block_arrays(series_index)
+        if not self._cache_bytes:
+            desc, data = self._read_data_block_at(arrays.file_offsets[index_in_series])
+            return desc, arrays.timestamps[index_in_series], self._decode_data(series_index, data)
+
+        index_in_series = range(len(arrays))[index_in_series]  # Handle negative indexes.
+        key = (series_index, index_in_series)
+        try:
+            desc, data = self._block_cache[key]
+        except KeyError:
+            self._cache_misses += 1
+            if self._read_ahead_blocks and self._last_read == (series_index, index_in_series - 1):
+                self._read_ahead(series_index, index_in_series)
+            try:
+                desc, data = self._block_cache[key]
+            except KeyError:
+                desc, data = self._read_data_block_at(arrays.file_offsets[index_in_series])
+                data = self._decode_data(series_index, data)
+                self._cache_block(key, desc, data)
+        else:
+            self._cache_hits += 1
+            self._block_cache.move_to_end(key)
+        self._last_read = key
+        return desc, arrays.timestamps[index_in_series], data
+
+    def series_timestamps(self, series_index):
+        """Returns the timestamps (nsec) of the data blocks in a series, as an array('q').
+
+        The array must not be modified.
+        """
+        try:
+            return self._series_index_to_timestamps[series_index]
+        except KeyError:
+            pass
+        timestamps = self.block_arrays(series_index).timestamps
+        if any(prev > cur for prev, cur in zip(timestamps, islice(timestamps, 1, None))):
+            self._unsorted_series.add(series_index)
+        self._series_index_to_timestamps[series_index] = timestamps
+        return timestamps
+
+    def index_range(self, series_index, start_nsec=None, end_nsec=None):
+        """Returns the indexes of data blocks with timestamps in [start_nsec, end_nsec).
+
+        Args:
+         series_index: int selecting the series.
+         start_nsec:   first timestamp to include, or None for the start of the series.
+         end_nsec:     timestamp at which to stop (exclusive), or None for the end of the series.
+
+        Returns: an iterable of index_in_series values, in the order they are stored in the file.
+        """
+        timestamps = self.series_timestamps(series_index)
+        if series_index in self._unsorted_series:
+            return [
+                idx for idx, timestamp in enumerate(timestamps)
+                if (start_nsec is None or timestamp >= start_nsec) and
+                (end_nsec is None or timestamp < end_nsec)
+            ]
+        first = 0 if start_nsec is None else bisect_left(timestamps, start_nsec)
+        end = len(timestamps) if end_nsec is None else bisect_left(timestamps, end_nsec)
+        return range(first, max(first, end))
+
+    def read_range(self, series_index, start_nsec=None, end_nsec=None):
+        """Generator over the messages of a series with timestamps in [start_nsec, end_nsec).
+
+        Only the blocks within the time range are read from the file.
+
+        Args:
+         series_index: int selecting from which series to read messages.
+         start_nsec:   first timestamp to include, or None for the start of the series.
+         end_nsec:     timestamp at which to stop (exclusive), or None for the end of the series.
+
+        Yields: DataTypeDescriptor for channel, timestamp_nsec (int), message-data (bytes)
+
+        Raises ParseError if there is a problem with the format of the file.
+        """
+        for index_in_series in self.index_range(series_index, start_nsec, end_nsec):
+            yield self.read(series_index, index_in_series)
+
+    def index_decimated(self, series_index, step, start_nsec=None, end_nsec=None):
+        """Returns the indexes of every step-th data block with timestamp in [start_nsec, end_nsec).
+
+        Raises ValueError if step is less than 1.
+        """
+        if step < 1:
+            raise ValueError('step must be at least 1, not {}'.format(step))
+        return self.index_range(series_index, start_nsec, end_nsec)[::step]
+
+    def read_decimated(self, series_index, step, start_nsec=None, end_nsec=None):
+        """Generator over every step-th message of a series within [start_nsec, end_nsec).
+
+        Only the blocks which are returned are read from the file.
+
+        Yields: DataTypeDescriptor for channel, timestamp_nsec (int), message-data (bytes)
+        """
+        for index_in_series in self.index_decimated(series_index, step, start_nsec, end_nsec):
+            yield self.read(series_index, index_in_series)
+
+    def index_bucketed(  # pylint: disable=too-many-arguments
+            self, series_index, bucket_nsec, last=False, start_nsec=None, end_nsec=None):
+        """Returns the index of the first (or last) data block in each time bucket with data.
+
+        Buckets are bucket_nsec long and start at start_nsec, or at multiples of bucket_nsec
+         since the unix epoch if start_nsec is None.  Only blocks with timestamps in
+         [start_nsec, end_nsec) are considered.
+
+        Args:
+         series_index: int selecting the series.
+         bucket_nsec:  length of each time bucket.
+         last:         if True, return the last block in each bucket rather than the first.
+         start_nsec:   first timestamp to include, or None for the start of the series.
+         end_nsec:     timestamp at which to stop (exclusive), or None for the end of the series.
+
+        Returns: list of index_in_series values, one for each bucket in time order.
+
+        Raises ValueError if bucket_nsec is not positive.
+        """
+        if bucket_nsec <= 0:
+            raise ValueError('bucket_nsec must be positive, not {}'.format(bucket_nsec))
+        origin = start_nsec or 0
+        timestamps = self.series_timestamps(series_index)
+        indexes = self.index_range(series_index, start_nsec, end_nsec)
+        if not isinstance(indexes, range):
+            # Timestamps are not in order, so look at every block.
+            bucket_to_index = {}
+            for index_in_series in indexes:
+                timestamp = timestamps[index_in_series]
+                bucket = (timestamp - origin) // bucket_nsec
+                previous = bucket_to_index.get(bucket)
+                if (previous is None or (last and timestamp >= timestamps[previous]) or
+                    (not last and timestamp < timestamps[previous])):
+                    bucket_to_index[bucket] = index_in_series
+            return [bucket_to_index[bucket] for bucket in sorted(bucket_to_index)]
+
+        # Timestamps are in order, so find the bucket boundaries by bisection.
+        result = []
+        index_in_series = indexes.start
+        while index_in_series < indexes.stop:
+            bucket = (timestamps[index_in_series] - origin) // bucket_nsec
+            next_index = bisect_left(timestamps, origin + (bucket + 1) * bucket_nsec,
+                                     index_in_series, indexes.stop)
+            result.append(next_index - 1 if last else index_in_series)
+            index_in_series = next_index
+        return result
+
+    def read_bucketed(  # pylint: disable=too-many-arguments
+            self, series_index, bucket_nsec, last=False, start_nsec=None, end_nsec=None):
+        """Generator over the first (or last) message in each time bucket of a series.
+
+        See index_bucketed() for the arguments.  Only the blocks which are returned are read
+         from the file.
+
+        Yields: DataTypeDescriptor for channel, timestamp_nsec (int), message-data (bytes)
+        """
+        for index_in_series in self.index_bucketed(series_index, bucket_nsec, last, start_nsec,
+                                                   end_nsec):
+            yield self.read(series_index, index_in_series)
 
     def series_block_index(self, series_index):
         """Returns the SeriesBlockIndexes for the given series_index, loading it as needed."""
@@ -74,30 +274,208 @@ class DataReader(BaseDataReader):  # pylint: disable=too-many-instance-attribute
             return self._series_index_to_block_index[series_index]
         except KeyError:
             pass
-        # Need to load the block index for this series.
+        if series_index in self._series_index_to_block_arrays:
+            # The block entries came from the index cache, so rebuild the proto from them.
+            block_index = bddf.SeriesBlockIndex(
+                series_index=series_index,
+                descriptor_file_offset=self._series_index_to_descriptor_offset[series_index])
+            self._series_index_to_block_arrays[series_index].add_to_proto(block_index)
+        else:
+            block_index = self._load_series_block_index(series_index)
+        self._series_index_to_block_index[series_index] = block_index
+        return block_index
+
+    def block_arrays(self, series_index):
+        """Returns the BlockIndexArrays for the given series_index, loading them as needed.
+
+        The arrays must not be modified.
+        """
+        try:
+            return self._series_index_to_block_arrays[series_index]
+        except KeyError:
+            pass
+        self._series_index_to_block_index[series_index] = self._load_series_block_index(
+            series_index)
+        return self._series_index_to_block_arrays[series_index]
+
+    @property
+    def cache_hits(self):
+        """Number of read() calls which returned data from the block cache."""
+        return self._cache_hits
+
+    @property
+    def cache_misses(self):
+        """Number of read() calls with the block cache enabled which did not find the block."""
+        return self._cache_misses
+
+    @property
+    def cache_nbytes(self):
+        """Number of bytes of block data currently in the block cache."""
+        return self._block_cache_nbytes
+
+    def clear_cache(self):
+        """Remove all blocks from the block cache."""
+        self._block_cache.clear()
+        self._block_cache_nbytes = 0
+
+    def _cache_block(self, key, desc, data):
+        nbytes = len(data)
+        if nbytes > self._cache_bytes:
+            return
+        self._block_cache[key] = (desc, data)
+        self._block_cache_nbytes += nbytes
+        while self._block_cache_nbytes > self._cache_bytes:
+            _key, (_desc, evicted) = self._block_cache.popitem(last=False)
+            self._block_cache_nbytes -= len(evicted)
+
+    def _read_ahead(self, series_index, index_in_series):
+        """Cache the blocks of a series from index_in_series on, with a single file read.
+
+        Only the blocks which start within cache_bytes of the first one are read, and the last
+         block which would be read ahead is left to be read separately, as its size is unknown.
+        """
+        arrays = self.block_arrays(series_index)
+        file_offsets = arrays.file_offsets
+        start = file_offsets[index_in_series]
+        end_index = min(index_in_series + self._read_ahead_blocks, len(arrays) - 1)
+        while end_index > index_in_series and file_offsets[end_index] - start > self._cache_bytes:
+            end_index -= 1
+        if end_index <= index_in_series + 1:
+            return
+        self._file.seek(start)
+        self._view = memoryview(self._file.read(file_offsets[end_index] - start))
+        self._view_base = start
+        try:
+            for idx in range(index_in_series, end_index):
+                if (series_index, idx) in self._block_cache:
+                    continue
+                desc, data = self._read_data_block_at(file_offsets[idx])
+                data = self._decode_data(series_index, data)
+                self._cache_block((series_index, idx), desc, bytes(data))
+        finally:
+            self._view = None
+            self._view_base = 0
+
+    @property
+    def file_path(self):
+        """Returns the path of the file: filename if specified, otherwise the name of infile.
+
+        Returns None if the path is not known.
+        """
+        filename = self._filename or getattr(self._file, 'name', None)
+        return filename if isinstance(filename, str) else None
+
+    @property
+    def index_cache(self):
+        """Returns True if the reader uses a sidecar index cache file."""
+        return self._index_cache
+
+    def _load_series_block_index(self, series_index):
         offset = self.file_index.series_block_index_offsets[series_index]
         block_index = self._read_desc_block_at('series_block_index', offset)
-        self._series_index_to_block_index[series_index] = block_index
+        self._series_index_to_block_arrays[series_index] = BlockIndexArrays.from_proto(block_index)
+        self._series_index_to_descriptor_offset[series_index] = block_index.descriptor_file_offset
         return block_index
 
+    @property
+    def use_mmap(self):
+        """Returns True if the file is memory-mapped for reading."""
+        return self._use_mmap
+
+    def _read_header(self):
+        if self._use_mmap:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+        super(DataReader, self)._read_header()
+
+    def _read(self, nbytes):
+        if self._view is None:
+            return super(DataReader, self)._read(nbytes)
+        assert nbytes
+        start = self._view_offset
+        if start >= len(self._view):
+            raise EOFError("Unexpected end of bddf file")
+        self._view_offset = min(start + nbytes, len(self._view))
+        return self._view[start:self._view_offset]
+
+    def _close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Slices of the mapping are still referenced by the caller.  The mapping is
+                #  released when the last of them is garbage collected.
+                pass
+            self._mmap = None
+        super(DataReader, self)._close()
+
     def _read_index(self):
-        self._file.seek(-len(END_MAGIC), os.SEEK_END)
+        self._seek_from_end(len(END_MAGIC))
         end_magic = self._read(len(END_MAGIC))
         if end_magic != END_MAGIC:
             raise ParseError("Bad magic bytes at the end of the file.")
-        self._file.seek(-INDEX_OFFSET_OFFSET, os.SEEK_END)
+        self._seek_from_end(INDEX_OFFSET_OFFSET)
         self._index_offset, self._checksum = struct.unpack('<QQ', self._read(16))
         if self._index_offset < len(MAGIC):
             raise ParseError('Invalid offset to index: {})'.format(self._index_offset))
-        self._file_index = self._read_desc_block_at("file_index", self._index_offset)
+        cache_filename = self._index_cache_filename()
+        cached_index = None
+        if cache_filename:
+            cache_key = IndexCacheKey.from_file(cache_filename, self._checksum)
+            cached_index = load_index_cache(cache_filename, cache_key)
+        if cached_index is not None:
+            self._file_index = cached_index.file_index
+            for series_index, series_descriptor in enumerate(cached_index.series_descriptors):
+                self._series_index_to_descriptor[series_index] = series_descriptor
+                self._series_index_to_descriptor_offset[series_index] = (
+                    cached_index.descriptor_file_offsets[series_index])
+                self._series_index_to_block_arrays[series_index] = (
+                    cached_index.block_arrays[series_index])
+        else:
+            self._file_index = self._read_desc_block_at("file_index", self._index_offset)
         self._spec_index = [{
             key: value for key, value in desc.spec.items()
         } for desc in self._file_index.series_identifiers]
+        if cache_filename and cached_index is None:
+            self._write_index_cache(cache_filename, cache_key)
+
+    def _index_cache_filename(self):
+        """Return the name of the data file for the index cache, or None if not caching."""
+        if not self._index_cache:
+            return None
+        filename = self.file_path
+        if filename is None:
+            LOGGER.warning('Cannot use an index cache without the name of the file')
+            return None
+        return filename
+
+    def _write_index_cache(self, filename, cache_key):
+        num_series = len(self._file_index.series_identifiers)
+        cached_index = CachedIndex(
+            self._file_index, [self.series_descriptor(idx) for idx in range(num_series)],
+            [self._series_index_to_descriptor_offset[idx] for idx in range(num_series)],
+            [self.block_arrays(idx) for idx in range(num_series)])
+        try:
+            write_index_cache(filename, cache_key, cached_index)
+        except OSError as err:
+            LOGGER.warning('Could not write index cache for %s: %s', filename, err)
+
+    def _seek_from_end(self, nbytes):
+        if self._view is None:
+            self._file.seek(-nbytes, os.SEEK_END)
+        else:
+            self._view_offset = max(len(self._view) - nbytes, 0)
 
     def _seek_to(self, location):
         if location < len(MAGIC):
             raise ParseError('Invalid offset for block: {})'.format(location))
-        self._file.seek(location)
+        if self._view is None:
+            self._file.seek(location)
+        else:
+            self._view_offset = location - self._view_base
 
     def _read_data_block_at(self, location):
         self._seek_to(location)
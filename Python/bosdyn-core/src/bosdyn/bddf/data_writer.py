@@ -5,10 +5,14 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """DataWriter is a class for writing data to a file."""
+import time
 
 import bosdyn.api.bddf_pb2 as bddf
 
 from .block_writer import BlockWriter
+from .common import AddSeriesError
+from .compression import (COMPRESSION_ANNOTATION, COMPRESSION_MINOR_VERSION, NO_COMPRESSION,
+                          get_codec)
 from .file_indexer import FileIndexer
 
 
@@ -17,17 +21,34 @@ class DataWriter:
 
     # pylint: disable=too-many-arguments
 
-    def __init__(self, outfile, annotations=None):
+    def __init__(self, outfile, annotations=None, compression=None, checkpoint_interval_sec=None):
         """
         Args:
          outfile:       a file-like objet for writing binary data (e.g., from open(fname, 'wb')).
          annotations:   optional dict of key (string) -> value (string) pairs.
+         compression:   optional name of the codec (see bosdyn.bddf.compression) used by default
+                          to compress the data blocks of each series.  Series may only be
+                          compressed if this is set; 'none' allows compression of individual
+                          series without a default.  Files written with compression enabled
+                          cannot be read by versions of this library without compression support.
+         checkpoint_interval_sec:  if set, write_data() calls write_checkpoint() when at least
+                          this long has passed since the previous checkpoint.
         """
+        self._writer = None
+        if compression is not None:
+            get_codec(compression)  # Raises DataFormatError for unknown codecs.
         self._writer = BlockWriter(outfile)
         self._indexer = FileIndexer()
         self._annotations = annotations
-        self._writer.write_header(annotations)
+        self._compression = compression
+        self._series_codecs = {}  # {series_index -> BlockCodec}, for compressed series.
+        if compression is None:
+            self._writer.write_header(annotations)
+        else:
+            self._writer.write_header(annotations, minor_version=COMPRESSION_MINOR_VERSION)
         self._on_close = []
+        self._checkpoint_interval_sec = checkpoint_interval_sec
+        self._last_checkpoint_time = time.monotonic()
 
     def __del__(self):
         self._close()
@@ -44,7 +65,8 @@ class DataWriter:
         return self._indexer.file_index
 
     def add_message_series(self, series_type, series_spec, content_type, type_name,
-                           is_metadata=False, annotations=None, additional_index_names=None):
+                           is_metadata=False, annotations=None, additional_index_names=None,
+                           compression=None):
         """Add a new series for storing message data.  Message data is variable-sized binary data.
 
         Args:
@@ -59,6 +81,8 @@ class DataWriter:
                           associate with the message channel
          additional_index_names: names of additional timestamps to store with
                                         each message (list of string).
+         compression:   name of codec for compressing the data blocks, if not the default
+                          set in the constructor.
 
         Returns series id (int).
         """
@@ -66,9 +90,11 @@ class DataWriter:
                                                   is_metadata=is_metadata)
         return self.add_series(series_type, series_spec, message_type=message_type,
                                annotations=annotations,
-                               additional_index_names=additional_index_names)
+                               additional_index_names=additional_index_names,
+                               compression=compression)
 
-    def add_pod_series(self, series_type, series_spec, type_enum, dimension=None, annotations=None):
+    def add_pod_series(self, series_type, series_spec, type_enum, dimension=None, annotations=None,
+                       compression=None):
         """Add a new series for storing data POD data (float, double, int, etc....).
 
         Args:
@@ -79,14 +105,17 @@ class DataWriter:
                            [3] means vectors of size 3, [4, 4] is a 4x4 matrix, etc....
          annotations:   optional dict of key (string) -> value (string) pairs to
                             associate with the message channel
+         compression:   name of codec for compressing the data blocks, if not the default
+                          set in the constructor.
 
         Returns series id (int).
         """
         pod_type = bddf.PodTypeDescriptor(pod_type=type_enum, dimension=dimension)
-        return self.add_series(series_type, series_spec, pod_type=pod_type, annotations=annotations)
+        return self.add_series(series_type, series_spec, pod_type=pod_type, annotations=annotations,
+                               compression=compression)
 
     def add_series(self, series_type, series_spec, message_type=None, pod_type=None,
-                   annotations=None, additional_index_names=None):
+                   annotations=None, additional_index_names=None, compression=None):
         """Register a new series for messages.
 
         Args:
@@ -98,13 +127,28 @@ class DataWriter:
                             associate with the message channel
          additional_index_names: names of additional timestamps to store with
                                         each message (list of string).
+         compression:   name of codec for compressing the data blocks, if not the default
+                          set in the constructor.
 
         Returns series id (int).
 
-        Raises SeriesNotUniqueError if a series matching series_spec is already added.
+        Raises SeriesNotUniqueError if a series matching series_spec is already added,
+               AddSeriesError if compression is requested but not enabled for the file,
+               DataFormatError if the compression codec is unknown.
         """
-        return self._indexer.add_series(series_type, series_spec, message_type, pod_type,
-                                        annotations, additional_index_names, self._writer)
+        compression = compression or self._compression or NO_COMPRESSION
+        codec = get_codec(compression)
+        if compression != NO_COMPRESSION:
+            if self._compression is None:
+                raise AddSeriesError(
+                    "Compression ({}) requires DataWriter to be created with compression".format(
+                        compression))
+            annotations = dict(annotations or {}, **{COMPRESSION_ANNOTATION: compression})
+        series_index = self._indexer.add_series(series_type, series_spec, message_type, pod_type,
+                                                annotations, additional_index_names, self._writer)
+        if compression != NO_COMPRESSION:
+            self._series_codecs[series_index] = codec
+        return series_index
 
     def write_data(self, series_index, timestamp_nsec, data, additional_indexes=None):
         """Store binary data into the file, under a previously-defined channel.
@@ -118,18 +162,35 @@ class DataWriter:
         Raises:
             DataFormatError if the data or additional_indexes are not valid for this series.
         """
-        self._indexer.index_data_block(series_index, timestamp_nsec, self._writer.tell(), len(data),
-                                       additional_indexes)
         data_descriptor = self._indexer.make_data_descriptor(series_index, timestamp_nsec,
                                                              additional_indexes)
+        self._indexer.index_data_block(series_index, timestamp_nsec, self._writer.tell(), len(data),
+                                       additional_indexes)
+        codec = self._series_codecs.get(series_index)
+        if codec:
+            data = codec.compress(data)
         self._writer.write_data_block(data_descriptor, data)
+        if (self._checkpoint_interval_sec is not None and
+                time.monotonic() - self._last_checkpoint_time >= self._checkpoint_interval_sec):
+            self.write_checkpoint()
+
+    def write_checkpoint(self):
+        """Write index entries for the data written since the last checkpoint, and flush the file.
+
+        Checkpoints let readers which follow the file as it is written (see TailingStreamReader)
+         see data without waiting for the file to be closed, and record the index of the data in
+         a file whose writer does not exit cleanly.
+        """
+        self._indexer.write_checkpoint(self._writer)
+        self._writer.flush()
+        self._last_checkpoint_time = time.monotonic()
 
     def run_on_close(self, thunk):
         """Register a function to be called when file is closed, before index is written."""
         self._on_close.append(thunk)
 
     def _close(self):
-        if self._writer.closed:
+        if self._writer is None or self._writer.closed:
             return
         for thunk in self._on_close:
             thunk()
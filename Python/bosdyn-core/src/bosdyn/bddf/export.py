@@ -0,0 +1,462 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Export fields of protobuf channels in bddf files to columnar files.
+
+Fields are selected with field paths such as 'kinematic_state.joint_states[*].position'.  A
+ path is a sequence of field names separated by '.'.  Repeated fields must be followed by
+ '[*]', selecting all elements, or '[N]', selecting element N.  Paths which end at a wrapper
+ message (e.g., google.protobuf.DoubleValue) select its value, and paths which end at a
+ google.protobuf.Timestamp or Duration select it as integer nanoseconds.
+
+Each selected value becomes a column, named by the path with '[*]' replaced by the index of
+ the element.  The number of elements selected by '[*]' is set by the first exported message.
+ Every export also has a 'timestamp_nsec' column holding the timestamp of each message.
+
+Supported output formats are CSV, numpy .npz (requires numpy) and Parquet (requires pyarrow).
+ Messages are read and written in chunks, so memory use does not grow with the size of the
+ channel.
+
+Example:
+  python -m bosdyn.bddf.export log.bddf -c robot_state \\
+      -f kinematic_state.joint_states[*].position -o joint_positions.npz
+"""
+import csv
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+
+from google.protobuf.descriptor import FieldDescriptor
+
+from .common import DataFormatError
+from .protobuf_reader import ProtobufReader
+
+FORMATS = ('csv', 'npz', 'parquet')
+
+TIMESTAMP_COLUMN = 'timestamp_nsec'
+
+# Number of rows buffered before they are written.
+DEFAULT_CHUNK_ROWS = 4096
+
+_COMPONENT_RE = re.compile(r'^(\w+)(?:\[(\*|\d+)\])?$')
+
+_WRAPPER_TYPES = frozenset('google.protobuf.{}'.format(name) for name in (
+    'DoubleValue', 'FloatValue', 'Int64Value', 'UInt64Value', 'Int32Value', 'UInt32Value',
+    'BoolValue', 'StringValue'))
+_NSEC_TYPES = frozenset(('google.protobuf.Timestamp', 'google.protobuf.Duration'))
+
+# Column dtype names (numpy dtype names, except 'str') for each kind of field.
+_CPPTYPE_TO_DTYPE = {
+    FieldDescriptor.CPPTYPE_DOUBLE: 'float64',
+    FieldDescriptor.CPPTYPE_FLOAT: 'float32',
+    FieldDescriptor.CPPTYPE_INT32: 'int64',
+    FieldDescriptor.CPPTYPE_INT64: 'int64',
+    FieldDescriptor.CPPTYPE_UINT32: 'int64',
+    FieldDescriptor.CPPTYPE_UINT64: 'uint64',
+    FieldDescriptor.CPPTYPE_BOOL: 'bool',
+    FieldDescriptor.CPPTYPE_ENUM: 'int64',
+    FieldDescriptor.CPPTYPE_STRING: 'str',
+}
+
+
+def _is_repeated(field):
+    try:
+        return field.is_repeated
+    except AttributeError:  # Older protobuf versions.
+        return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+def _nsec_value(value):
+    return value.seconds * 1000000000 + value.nanos
+
+
+class FieldPath:
+    """A field path, compiled for a protobuf message type.
+
+    Raises ValueError if the path is not valid for the message type.
+    """
+
+    def __init__(self, descriptor, path):
+        """
+        Args:
+         descriptor:  Descriptor of the protobuf message type (e.g., RobotState.DESCRIPTOR).
+         path:        field path (string), as described in the module documentation.
+        """
+        self.path = path
+        self._steps = []  # list of (field name, None or '*' or element index)
+        message_type = descriptor
+        for component in path.split('.'):
+            match = _COMPONENT_RE.match(component)
+            if not match:
+                raise ValueError('Invalid component "{}" in field path "{}"'.format(
+                    component, path))
+            if message_type is None:
+                raise ValueError('Field path "{}" continues past a scalar field'.format(path))
+            name, index = match.groups()
+            field = message_type.fields_by_name.get(name)
+            if field is None:
+                raise ValueError('{} has no field "{}" (in field path "{}")'.format(
+                    message_type.full_name, name, path))
+            if field.message_type is not None and field.message_type.GetOptions().map_entry:
+                raise ValueError('Map field "{}" is not supported in field paths'.format(name))
+            if _is_repeated(field) != (index is not None):
+                raise ValueError('Field "{}" in field path "{}" {}'.format(
+                    name, path, 'needs [*] or [N]' if index is None else 'is not repeated'))
+            self._steps.append((name, index if index in (None, '*') else int(index)))
+            message_type = field.message_type
+
+        self._num_path_steps = len(self._steps)  # Steps named in the path.
+        convert = None
+        if message_type is not None:
+            if message_type.full_name in _WRAPPER_TYPES:
+                self._steps.append(('value', None))
+                field = message_type.fields_by_name['value']
+            elif message_type.full_name in _NSEC_TYPES:
+                convert = _nsec_value
+            else:
+                raise ValueError('Field path "{}" ends at a {} message, not a value'.format(
+                    path, message_type.full_name))
+        if convert is not None:
+            self.dtype = 'int64'
+        elif field.type == FieldDescriptor.TYPE_BYTES:
+            raise ValueError('Bytes field "{}" is not supported for export'.format(path))
+        else:
+            self.dtype = _CPPTYPE_TO_DTYPE[field.cpp_type]
+
+        # Build a function which appends the selected values of a message to a list.
+        if convert is None:
+            extract = lambda value, out: out.append(value)
+        else:
+            extract = lambda value, out: out.append(convert(value))
+        for name, index in reversed(self._steps):
+            extract = self._make_step(name, index, extract)
+        self._extract = extract
+
+    def _make_step(self, name, index, inner):
+        if index is None:
+            return lambda message, out: inner(getattr(message, name), out)
+        if index == '*':
+
+            def _all_elements(message, out):
+                for element in getattr(message, name):
+                    inner(element, out)
+
+            return _all_elements
+
+        def _one_element(message, out):
+            elements = getattr(message, name)
+            if index >= len(elements):
+                raise DataFormatError('Field path "{}": {} has only {} elements'.format(
+                    self.path, name, len(elements)))
+            inner(elements[index], out)
+
+        return _one_element
+
+    def extract(self, message, out):
+        """Append the values selected from message to the list out."""
+        self._extract(message, out)
+
+    def column_names(self, message):
+        """Return the names of the columns for the values selected from message."""
+        names = []
+        self._add_column_names(message, 0, '', names)
+        return names
+
+    def _add_column_names(self, value, step_idx, prefix, names):
+        if step_idx == self._num_path_steps:
+            names.append(prefix)
+            return
+        name, index = self._steps[step_idx]
+        prefix = prefix + '.' + name if prefix else name
+        value = getattr(value, name)
+        if index is None:
+            self._add_column_names(value, step_idx + 1, prefix, names)
+        elif index == '*':
+            for element_idx, element in enumerate(value):
+                self._add_column_names(element, step_idx + 1,
+                                       '{}[{}]'.format(prefix, element_idx), names)
+        else:
+            self._add_column_names(value[index], step_idx + 1, '{}[{}]'.format(prefix, index),
+                                   names)
+
+
+class Projection:
+    """A set of field paths for a protobuf message type, giving the columns of an export.
+
+    Raises ValueError if a path is not valid for the message type.
+    """
+
+    def __init__(self, descriptor, paths):
+        self.field_paths = [FieldPath(descriptor, path) for path in paths]
+        self._widths = None
+        self.column_names = None  # Set by the first call to row().
+        self.dtypes = None  # Set by the first call to row().
+
+    def row(self, message):
+        """Return the list of values selected from message.
+
+        Raises DataFormatError if a '[*]' path selects a different number of elements than it
+         did for the first message.
+        """
+        values = []
+        widths = []
+        for field_path in self.field_paths:
+            start = len(values)
+            field_path.extract(message, values)
+            widths.append(len(values) - start)
+        if self._widths is None:
+            self._widths = widths
+            self.column_names = []
+            self.dtypes = []
+            for field_path, width in zip(self.field_paths, widths):
+                self.column_names.extend(field_path.column_names(message))
+                self.dtypes.extend([field_path.dtype] * width)
+        elif widths != self._widths:
+            for field_path, width, expected in zip(self.field_paths, widths, self._widths):
+                if width != expected:
+                    raise DataFormatError(
+                        'Field path "{}" selects {} values, but {} in the first message'.format(
+                            field_path.path, width, expected))
+        return values
+
+
+class _CsvWriter:
+
+    def __init__(self, output, column_names, dtypes):  # pylint: disable=unused-argument
+        self._file = open(output, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(column_names)
+
+    def write(self, columns):
+        self._writer.writerows(zip(*columns))
+
+    def close(self):
+        self._file.close()
+
+
+class _NpzWriter:
+    """Writes each column to a temporary file, then copies them into the .npz archive."""
+
+    def __init__(self, output, column_names, dtypes):
+        import numpy  # pylint: disable=import-outside-toplevel
+        self._numpy = numpy
+        if 'str' in dtypes:
+            raise ValueError('String fields cannot be exported to npz')
+        self._output = output
+        self._column_names = column_names
+        self._dtypes = [numpy.dtype(dtype) for dtype in dtypes]
+        self._files = [tempfile.TemporaryFile() for _ in column_names]
+        self._num_rows = 0
+
+    def write(self, columns):
+        for column, dtype, column_file in zip(columns, self._dtypes, self._files):
+            column_file.write(self._numpy.asarray(column, dtype=dtype).tobytes())
+        self._num_rows += len(columns[0])
+
+    def close(self):
+        array_format = self._numpy.lib.format
+        with zipfile.ZipFile(self._output, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, dtype, column_file in zip(self._column_names, self._dtypes, self._files):
+                header = {
+                    'descr': array_format.dtype_to_descr(dtype),
+                    'fortran_order': False,
+                    'shape': (self._num_rows,)
+                }
+                with archive.open(name + '.npy', 'w', force_zip64=True) as entry:
+                    array_format.write_array_header_1_0(entry, header)
+                    column_file.seek(0)
+                    shutil.copyfileobj(column_file, entry)
+                column_file.close()
+
+
+class _ParquetWriter:
+
+    def __init__(self, output, column_names, dtypes):
+        # pylint: disable=import-outside-toplevel
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+        arrow_types = {
+            'float64': pyarrow.float64(),
+            'float32': pyarrow.float32(),
+            'int64': pyarrow.int64(),
+            'uint64': pyarrow.uint64(),
+            'bool': pyarrow.bool_(),
+            'str': pyarrow.string(),
+        }
+        self._schema = pyarrow.schema([
+            (name, arrow_types[dtype]) for name, dtype in zip(column_names, dtypes)
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(output, self._schema)
+
+    def write(self, columns):
+        arrays = [
+            self._pyarrow.array(column, type=field.type)
+            for column, field in zip(columns, self._schema)
+        ]
+        self._writer.write_table(self._pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_FORMAT_TO_WRITER = {'csv': _CsvWriter, 'npz': _NpzWriter, 'parquet': _ParquetWriter}
+
+
+def output_format_for(output):
+    """Return the export format for an output file name, from its extension.
+
+    Raises ValueError if the extension is not one of FORMATS.
+    """
+    output_format = os.path.splitext(output)[1][1:].lower()
+    if output_format not in FORMATS:
+        raise ValueError('Cannot tell export format of "{}"; use one of {}'.format(
+            output, ', '.join(FORMATS)))
+    return output_format
+
+
+def export_channel(  # pylint: disable=too-many-arguments,too-many-locals
+        protobuf_reader, channel_name, protobuf_type, field_paths, output, output_format=None,
+        start_nsec=None, end_nsec=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Export fields of the messages of a channel to a columnar file.
+
+    Args:
+     protobuf_reader: ProtobufReader for the file.
+     channel_name:    name of the channel of messages.
+     protobuf_type:   class of the protobuf messages in the channel.
+     field_paths:     list of field paths (strings) selecting the values to export.
+     output:          name of the file to write.
+     output_format:   one of FORMATS, or None to choose it from the extension of output.
+     start_nsec:      first timestamp to include, or None for the start of the channel.
+     end_nsec:        timestamp at which to stop (exclusive), or None for no limit.
+     chunk_rows:      number of rows buffered before they are written.
+
+    Returns the number of rows written.
+
+    Raises ValueError if a field path is not valid for protobuf_type,
+           DataFormatError if messages select differing numbers of values,
+           ImportError if the output format needs a package which is not installed.
+    """
+    output_format = output_format or output_format_for(output)
+    if output_format not in FORMATS:
+        raise ValueError('Unknown export format "{}"'.format(output_format))
+    projection = Projection(protobuf_type.DESCRIPTOR, field_paths)
+    series_index = protobuf_reader.series_index(channel_name,
+                                                message_type=protobuf_type.DESCRIPTOR.full_name)
+
+    writer = None
+    columns = None
+    num_rows = 0
+    try:
+        for _desc, timestamp_nsec, message in protobuf_reader.read_range(
+                series_index, protobuf_type, start_nsec, end_nsec):
+            values = projection.row(message)
+            if writer is None:
+                writer = _FORMAT_TO_WRITER[output_format](
+                    output, [TIMESTAMP_COLUMN] + projection.column_names,
+                    ['int64'] + projection.dtypes)
+                columns = [[] for _ in range(len(values) + 1)]
+            columns[0].append(timestamp_nsec)
+            for column, value in zip(columns[1:], values):
+                column.append(value)
+            num_rows += 1
+            if len(columns[0]) >= chunk_rows:
+                writer.write(columns)
+                columns = [[] for _ in columns]
+        if writer is None:
+            # No messages, so only the timestamp column is known.
+            writer = _FORMAT_TO_WRITER[output_format](output, [TIMESTAMP_COLUMN], ['int64'])
+        elif columns[0]:
+            writer.write(columns)
+    finally:
+        if writer is not None:
+            writer.close()
+    return num_rows
+
+
+def message_class(type_name):
+    """Return the protobuf message class with the given full name, e.g. 'bosdyn.api.RobotState'.
+
+    Modules of the bosdyn.api package are imported as necessary to find the class.
+
+    Raises KeyError if there is no such message class.
+    """
+    # pylint: disable=import-outside-toplevel
+    import importlib
+    import pkgutil
+
+    from google.protobuf import descriptor_pool, symbol_database
+
+    def _find():
+        try:
+            descriptor = descriptor_pool.Default().FindMessageTypeByName(type_name)
+        except KeyError:
+            return None
+        try:
+            from google.protobuf.message_factory import GetMessageClass
+        except ImportError:  # Older protobuf versions.
+            return symbol_database.Default().GetSymbol(type_name)
+        return GetMessageClass(descriptor)
+
+    proto_class = _find()
+    if proto_class is None:
+        import bosdyn.api
+        for module_info in pkgutil.walk_packages(bosdyn.api.__path__, 'bosdyn.api.'):
+            if module_info.name.endswith('_pb2'):
+                importlib.import_module(module_info.name)
+        proto_class = _find()
+    if proto_class is None:
+        raise KeyError('No protobuf message type named "{}"'.format(type_name))
+    return proto_class
+
+
+def main(args=None):
+    """Command-line interface."""
+    # pylint: disable=import-outside-toplevel
+    import argparse
+
+    from .data_reader import DataReader
+
+    parser = argparse.ArgumentParser(
+        description='Export fields of a protobuf channel in a bddf file to a columnar file.')
+    parser.add_argument('filename', help='bddf file to read')
+    parser.add_argument('-c', '--channel', help='name of the channel to export')
+    parser.add_argument('-f', '--field', action='append', default=[],
+                        help='field path to export (may be repeated)')
+    parser.add_argument('-o', '--output', help='output file (.csv, .npz or .parquet)')
+    parser.add_argument('--format', choices=FORMATS,
+                        help='output format (default is chosen from the output file extension)')
+    parser.add_argument('--start-nsec', type=int, help='first timestamp to export')
+    parser.add_argument('--end-nsec', type=int, help='timestamp at which to stop (exclusive)')
+    parser.add_argument('-l', '--list', action='store_true', help='list the protobuf channels')
+    options = parser.parse_args(args)
+
+    with DataReader(filename=options.filename) as data_reader:
+        protobuf_reader = ProtobufReader(data_reader)
+        channels = protobuf_reader.channel_name_to_series_descriptor
+        if options.list:
+            for channel_name, series_descriptor in sorted(channels.items()):
+                print('{}\t{}'.format(channel_name, series_descriptor.message_type.type_name))
+            return 0
+        if not options.channel or not options.field or not options.output:
+            parser.error('--channel, --field and --output are required to export')
+        if options.channel not in channels:
+            print('No protobuf channel "{}" in {}'.format(options.channel, options.filename),
+                  file=sys.stderr)
+            return 1
+        protobuf_type = message_class(channels[options.channel].message_type.type_name)
+        num_rows = export_channel(protobuf_reader, options.channel, protobuf_type,
+                                  options.field, options.output, options.format,
+                                  options.start_nsec, options.end_nsec)
+    print('Wrote {} rows to {}'.format(num_rows, options.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,17 +7,94 @@
 """A FileIndexer is an object which keeps an index of series and blocks within series"""
 
 import struct
+from array import array
 from hashlib import sha1
 
 import bosdyn.api.bddf_pb2 as bddf
 
 from .common import AddSeriesError, DataFormatError, SeriesNotUniqueError
 
+NSEC_PER_SEC = 1000000000
+
 
 def _hasher_to_uint64(hasher):
     return struct.unpack('>Q', hasher.digest()[0:8])[0]
 
 
+def _spec_key(spec):
+    """Return a hashable key for a series spec ({key -> value})."""
+    return tuple(sorted(spec.items()))
+
+
+class BlockIndexArrays:
+    """The block entries of a series' index, stored in compact arrays.
+
+    This holds the same information as the block_entries and total_bytes of a SeriesBlockIndex
+     without creating a protobuf message for every block.
+    """
+
+    def __init__(self, num_additional_indexes=0):
+        self.num_additional_indexes = num_additional_indexes
+        self.file_offsets = array('Q')
+        self.timestamps = array('q')  # nsec since unix epoch
+        # num_additional_indexes values for each block, concatenated.
+        self.additional_indexes = array('q')
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self.file_offsets)
+
+    @classmethod
+    def from_proto(cls, series_block_index):
+        """Return BlockIndexArrays holding the block entries of a SeriesBlockIndex proto.
+
+        Raises DataFormatError if the entries have differing numbers of additional indexes.
+        """
+        block_entries = series_block_index.block_entries
+        arrays = cls(len(block_entries[0].additional_indexes) if block_entries else 0)
+        arrays.file_offsets = array('Q', (entry.file_offset for entry in block_entries))
+        arrays.timestamps = array('q', (entry.timestamp.seconds * NSEC_PER_SEC +
+                                        entry.timestamp.nanos for entry in block_entries))
+        if arrays.num_additional_indexes:
+            for entry in block_entries:
+                arrays.additional_indexes.extend(entry.additional_indexes)
+            if len(arrays.additional_indexes) != len(arrays) * arrays.num_additional_indexes:
+                raise DataFormatError('Series {} has inconsistent additional indexes'.format(
+                    series_block_index.series_index))
+        arrays.total_bytes = series_block_index.total_bytes
+        return arrays
+
+    def append(self, file_offset, timestamp_nsec, nbytes, additional_indexes=None):
+        """Add an entry for a data block.
+
+        Raises DataFormatError if the number of additional_indexes is not as expected.
+        """
+        additional_indexes = additional_indexes or ()
+        if len(additional_indexes) != self.num_additional_indexes:
+            raise DataFormatError('Block needs {} additional indexes, but {} provided.'.format(
+                self.num_additional_indexes, len(additional_indexes)))
+        self.file_offsets.append(file_offset)
+        self.timestamps.append(timestamp_nsec)
+        self.additional_indexes.extend(additional_indexes)
+        self.total_bytes += nbytes
+
+    def add_to_proto(self, series_block_index, start=0):
+        """Add entries from index start onward to the block_entries of a SeriesBlockIndex proto.
+
+        Also sets the total_bytes of the proto.
+        """
+        stride = self.num_additional_indexes
+        block_entries = series_block_index.block_entries
+        for idx in range(start, len(self)):
+            entry = block_entries.add(file_offset=self.file_offsets[idx])
+            entry.timestamp.seconds, entry.timestamp.nanos = divmod(self.timestamps[idx],
+                                                                    NSEC_PER_SEC)
+            if stride:
+                first = idx * stride
+                entry.additional_indexes.extend(self.additional_indexes[first:first + stride])
+        series_block_index.total_bytes = self.total_bytes
+
+
 class FileIndexer:
     """An object which keeps an index of series and blocks within series.
 
@@ -28,7 +105,12 @@ class FileIndexer:
         # DescriptorBlock proto for the FileIndex
         self._descriptor_index = bddf.DescriptorBlock()
         self._series_descriptors = []  # series_idx -> SeriesDescriptor
-        self._series_block_indexes = []  # series_index -> SeriesBlockIndex
+        self._block_arrays = []  # series_index -> BlockIndexArrays
+        self._descriptor_file_offsets = []  # series_index -> file offset of SeriesDescriptor
+        self._num_checkpointed = []  # series_index -> number of blocks in previous checkpoints
+        self._spec_to_series_index = {}  # {spec key -> series_index}
+        # SeriesBlockIndex protos are only built when requested, and then kept up to date.
+        self._series_block_indexes = {}  # {series_index -> SeriesBlockIndex}
 
     @property
     def file_index(self):
@@ -43,7 +125,23 @@ class FileIndexer:
     @property
     def series_block_indexes(self):
         """Returns the current list of SeriesBlockIndexes: series_index -> SeriesBlockIndex."""
-        return self._series_block_indexes
+        return [self.series_block_index(idx) for idx in range(len(self._series_descriptors))]
+
+    def series_block_index(self, series_index):
+        """Returns the current SeriesBlockIndex for the given series_index."""
+        arrays = self._block_arrays[series_index]
+        try:
+            block_index = self._series_block_indexes[series_index]
+        except KeyError:
+            block_index = self._new_series_block_index(series_index)
+            self._series_block_indexes[series_index] = block_index
+        if len(block_index.block_entries) < len(arrays):
+            arrays.add_to_proto(block_index, len(block_index.block_entries))
+        return block_index
+
+    def block_arrays(self, series_index):
+        """Returns the BlockIndexArrays holding the block entries of the given series_index."""
+        return self._block_arrays[series_index]
 
     def series_descriptor(self, series_index):
         """Return SeriesDescriptor for given series index."""
@@ -72,9 +170,12 @@ class FileIndexer:
         self.file_index.series_identifiers.add().CopyFrom(series_descriptor.series_identifier)
         self.file_index.series_identifier_hashes.append(series_descriptor.identifier_hash)
         self._series_descriptors.append(series_descriptor)
-        self._series_block_indexes.append(
-            bddf.SeriesBlockIndex(series_index=series_descriptor.series_index,
-                                  descriptor_file_offset=series_block_file_offset))
+        self._block_arrays.append(
+            BlockIndexArrays(len(series_descriptor.additional_index_names)))
+        self._descriptor_file_offsets.append(series_block_file_offset)
+        self._num_checkpointed.append(0)
+        self._spec_to_series_index.setdefault(_spec_key(series_descriptor.series_identifier.spec),
+                                              series_descriptor.series_index)
 
     def add_series(  # pylint: disable=too-many-arguments
             self, series_type, series_spec, message_type, pod_type, annotations,
@@ -112,10 +213,9 @@ class FileIndexer:
         series_descriptor.identifier_hash = self.series_identifier_to_hash(series_identifier)
 
         # Ensure the series_spec is unique in the file.
-        for prev_series_identifier in self.file_index.series_identifiers:
-            if prev_series_identifier.spec == series_identifier.spec:
-                raise SeriesNotUniqueError(
-                    "Spec %s is not unique within the data file" % series_identifier.spec)
+        if _spec_key(series_identifier.spec) in self._spec_to_series_index:
+            raise SeriesNotUniqueError(
+                "Spec %s is not unique within the data file" % series_identifier.spec)
 
         if message_type:
             if pod_type:
@@ -139,13 +239,13 @@ class FileIndexer:
     def index_data_block(  # pylint: disable=too-many-arguments
             self, series_index, timestamp_nsec, file_offset, nbytes, additional_indexes):
         """Add an entry to the data block index of the series identified by series_index."""
-        series_block_index = self._series_block_indexes[series_index]
-        block_entry = series_block_index.block_entries.add(file_offset=file_offset)
-        block_entry.timestamp.FromNanoseconds(timestamp_nsec)
-        series_block_index.total_bytes += nbytes
-        if additional_indexes:
-            for idx_val in additional_indexes:
-                block_entry.additional_indexes.append(idx_val)  # pylint: disable=no-member
+        self._block_arrays[series_index].append(file_offset, timestamp_nsec, nbytes,
+                                                additional_indexes)
+
+    def _new_series_block_index(self, series_index):
+        return bddf.SeriesBlockIndex(
+            series_index=series_index,
+            descriptor_file_offset=self._descriptor_file_offsets[series_index])
 
     def make_data_descriptor(self, series_index, timestamp_nsec, additional_indexes):
         """Return DataDescriptor for writing a data block, and add the block to the series index."""
@@ -162,15 +262,42 @@ class FileIndexer:
                 data_descriptor.additional_indexes.append(idx_val)  # pylint: disable=no-member
         return data_descriptor
 
+    def write_checkpoint(self, block_writer):
+        """Write the index entries of data blocks added since the previous checkpoint.
+
+        For each series with new data blocks, a SeriesBlockIndex holding only the new block
+         entries (and the total_bytes of all blocks so far) is written as a descriptor block.
+         Readers which use the index at the end of the file ignore these blocks.
+
+        Returns the number of SeriesBlockIndex blocks written.
+        """
+        num_written = 0
+        for series_index, arrays in enumerate(self._block_arrays):
+            start = self._num_checkpointed[series_index]
+            if start == len(arrays):
+                continue
+            block = bddf.DescriptorBlock()
+            block_index = block.series_block_index  # pylint: disable=no-member
+            block_index.series_index = series_index
+            block_index.descriptor_file_offset = self._descriptor_file_offsets[series_index]
+            arrays.add_to_proto(block_index, start)
+            block_writer.write_descriptor_block(block)
+            self._num_checkpointed[series_index] = len(arrays)
+            num_written += 1
+        return num_written
+
     def write_index(self, block_writer):
         """Write all the indexes of the data file, and the file end."""
-        # Write all the block indexes
-        for block_index in self.series_block_indexes:
+        # Write all the block indexes, building each SeriesBlockIndex proto only as it is written.
+        for series_index, arrays in enumerate(self._block_arrays):
             # Record the location of the block index.
             self.file_index.series_block_index_offsets.append(block_writer.tell())
             # Write the block index.
             block = bddf.DescriptorBlock()
-            block.series_block_index.CopyFrom(block_index)  # pylint: disable=no-member
+            block_index = block.series_block_index  # pylint: disable=no-member
+            block_index.series_index = series_index
+            block_index.descriptor_file_offset = self._descriptor_file_offsets[series_index]
+            arrays.add_to_proto(block_index)
             block_writer.write_descriptor_block(block)
         index_offset = block_writer.tell()
         block_writer.write_descriptor_block(self.descriptor_index)
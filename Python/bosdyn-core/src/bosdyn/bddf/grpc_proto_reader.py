@@ -19,6 +19,16 @@ class GrpcProtoReader:
         self._series_descriptor = series_descriptor
         self._num_messages = None
 
+    @property
+    def proto_type(self):
+        """Protobuf class of the messages."""
+        return self._proto_type
+
+    @property
+    def type_name(self):
+        """Full name of the protobuf type of the messages."""
+        return self._proto_type.DESCRIPTOR.full_name
+
     @property
     def num_messages(self):
         """Number of messages in of the given type."""
@@ -26,11 +26,8 @@ class GrpcReader:
         }
         self._proto_name_to_reader = {}
         for series_index, series_identifier in enumerate(data_reader.file_index.series_identifiers):
-            print(series_index)
             if series_identifier.series_type not in (GrpcRequests.SERIES_TYPE,
                                                      GrpcResponses.SERIES_TYPE):
-                print(series_identifier.series_type, GrpcRequests.SERIES_TYPE,
-                      GrpcResponses.SERIES_TYPE)
                 continue
 
             service_name = series_identifier.spec[GrpcRequests.SERVICE_NAME]
@@ -45,7 +42,6 @@ class GrpcReader:
             except KeyError:
                 service_reader = GrpcServiceReader(self, service_name)
                 self._service_name_to_reader[service_name] = service_reader
-            print("D")
             series_descriptor = self._data_reader.series_descriptor(series_index)
             reader = service_reader.add_proto_reader(series_index, proto_class,
                                                      series_identifier.series_type,
@@ -53,13 +49,32 @@ class GrpcReader:
             if message_type not in self._proto_name_to_reader:
                 self._proto_name_to_reader[message_type] = reader
             self._series_index_to_reader[series_index] = reader
-        print(self._proto_name_to_reader.keys())
 
     @property
     def data_reader(self):
         """Return underlying DataReader this object is using."""
         return self._data_reader
 
+    @property
+    def service_names(self):
+        """Return the names of the services with logged messages."""
+        return list(self._service_name_to_reader)
+
+    def get_service_reader(self, service_name):
+        """Return the GrpcServiceReader for the service with the specified name."""
+        return self._service_name_to_reader[service_name]
+
+    def request_response_pairs(self, service_name):
+        """Return the GrpcRequestResponse pairs of a service.  See GrpcServiceReader."""
+        return self._service_name_to_reader[service_name].request_response_pairs()
+
+    def latencies(self, service_name):
+        """Return {request type name -> list of latency nsec} for a service.
+
+        See GrpcServiceReader.latencies().
+        """
+        return self._service_name_to_reader[service_name].latencies()
+
     def get_proto_reader(self, proto_name):
         """Return the GrpcProtoReader for protobuf messages with the specified type name."""
         return self._proto_name_to_reader[proto_name]
@@ -6,9 +6,49 @@
 
 """A container for the GrpcProtoReaders associated with a given service in a bddf file."""
 
+import collections
+
+from bosdyn.util import timestamp_to_nsec
+
+from .bosdyn import GrpcRequests
 from .grpc_proto_reader import GrpcProtoReader
 
 
+class GrpcRequestResponse:
+    """A logged request message, and the logged response to it.
+
+    The messages are read from the file when request() or response() is called.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+            self, request_reader, request_index, request_timestamp_nsec, response_reader,
+            response_index, response_timestamp_nsec):
+        self.request_reader = request_reader  # GrpcProtoReader of the request series
+        self.request_index = request_index  # index of the request within its series
+        self.request_timestamp_nsec = request_timestamp_nsec
+        self.response_reader = response_reader  # GrpcProtoReader of the response series
+        self.response_index = response_index  # index of the response within its series
+        self.response_timestamp_nsec = response_timestamp_nsec
+
+    @property
+    def request_type(self):
+        """Full name of the protobuf type of the request."""
+        return self.request_reader.type_name
+
+    @property
+    def latency_nsec(self):
+        """Time from the request timestamp to the response timestamp, in nsec."""
+        return self.response_timestamp_nsec - self.request_timestamp_nsec
+
+    def request(self):
+        """Read and return the request protobuf."""
+        return self.request_reader.get_message(self.request_index)[1]
+
+    def response(self):
+        """Read and return the response protobuf."""
+        return self.response_reader.get_message(self.response_index)[1]
+
+
 class GrpcServiceReader:
     """A container for the GrpcProtoReaders associated with a given service in a bddf file."""
 
@@ -16,6 +56,9 @@ class GrpcServiceReader:
         self._grpc_reader = grpc_reader
         self._service_name = service_name
         self._type_name_to_reader = {}
+        self._request_readers = []
+        self._response_readers = []
+        self._pairs = None  # list of GrpcRequestResponse, built when first requested.
 
     @property
     def data_reader(self):
@@ -30,4 +73,115 @@ class GrpcServiceReader:
         """Create and return a GrpcProtoReader for the given series in the bddf file."""
         reader = GrpcProtoReader(self, series_index, series_type, proto_type, series_descriptor)
         self._type_name_to_reader[proto_type.DESCRIPTOR.full_name] = reader
+        if series_type == GrpcRequests.SERIES_TYPE:
+            self._request_readers.append(reader)
+        else:
+            self._response_readers.append(reader)
+        self._pairs = None
         return reader
+
+    def request_response_pairs(self):
+        """Return a list of GrpcRequestResponse for the requests with logged responses.
+
+        Requests are matched to responses by their type, and by the client name and request
+         timestamp in the request header, which services copy into the header of their response.
+         When a response only holds the request header, the request type is taken from the
+         response type name (FooResponse answers FooRequest), or else any request type with that
+         header is matched.  Requests with the same type and header, such as ones with empty
+         headers, are matched to responses with that header in the order they were logged.  The
+         pairs are found with a single pass over the requests and the responses of the service,
+         and kept for later calls.  They are ordered by request timestamp, then by order in the
+         file.
+        """
+        if self._pairs is not None:
+            return self._pairs
+        requests = []  # [(log nsec, request key, reader, index_in_series)]
+        for reader in self._request_readers:
+            for index_in_series in range(reader.num_messages):
+                timestamp_nsec, request = reader.get_message(index_in_series)
+                requests.append(
+                    (timestamp_nsec, _request_key(request.header), reader, index_in_series))
+        requests.sort(key=lambda item: item[0])
+        # {(request type, client_name, request nsec) -> deque of (log nsec, reader, index)}
+        request_key_to_indexes = {}
+        for timestamp_nsec, key, reader, index_in_series in requests:
+            indexes = request_key_to_indexes.setdefault((reader.type_name,) + key,
+                                                        collections.deque())
+            indexes.append((timestamp_nsec, reader, index_in_series))
+
+        responses = []  # [(log nsec, request type names, RequestHeader, reader, index_in_series)]
+        for reader in self._response_readers:
+            for index_in_series in range(reader.num_messages):
+                response_timestamp_nsec, response = reader.get_message(index_in_series)
+                request = self._request_header(reader, response.header)
+                if request is not None:
+                    request_type_names, request_header = request
+                    responses.append((response_timestamp_nsec, request_type_names, request_header,
+                                      reader, index_in_series))
+        responses.sort(key=lambda item: item[0])
+
+        pairs = []
+        for (response_timestamp_nsec, request_type_names, request_header, reader,
+             index_in_series) in responses:
+            request_indexes = _oldest_request_indexes(request_key_to_indexes, request_type_names,
+                                                      _request_key(request_header))
+            if request_indexes is None:
+                continue  # The request was not logged.
+            _timestamp_nsec, request_reader, request_index = request_indexes.popleft()
+            pairs.append(
+                GrpcRequestResponse(request_reader, request_index,
+                                    timestamp_to_nsec(request_header.request_timestamp), reader,
+                                    index_in_series, response_timestamp_nsec))
+        pairs.sort(key=lambda pair: (pair.request_timestamp_nsec, pair.request_index))
+        self._pairs = pairs
+        return pairs
+
+    def latencies(self):
+        """Return {request type name -> list of latency nsec} for the requests with responses.
+
+        Latencies are in order of request timestamp.
+        """
+        type_name_to_latencies = {}
+        for pair in self.request_response_pairs():
+            type_name_to_latencies.setdefault(pair.request_type, []).append(pair.latency_nsec)
+        return type_name_to_latencies
+
+    def _request_header(self, response_reader, response_header):
+        """Return (request type names, RequestHeader) of the request a response answers, or None.
+
+        The request type names are those the request may have.
+        """
+        if response_header.HasField('request_header'):
+            type_name = response_reader.type_name
+            if type_name.endswith('Response'):
+                request_type_name = type_name[:-len('Response')] + 'Request'
+                if any(reader.type_name == request_type_name for reader in self._request_readers):
+                    return [request_type_name], response_header.request_header
+            return ([reader.type_name for reader in self._request_readers],
+                    response_header.request_header)
+        if response_header.HasField('request'):
+            # Some services include the whole request instead.
+            for reader in self._request_readers:
+                if response_header.request.Is(reader.proto_type.DESCRIPTOR):
+                    request = reader.proto_type()
+                    response_header.request.Unpack(request)
+                    return [reader.type_name], request.header
+        return None
+
+
+def _request_key(request_header):
+    return request_header.client_name, timestamp_to_nsec(request_header.request_timestamp)
+
+
+def _oldest_request_indexes(request_key_to_indexes, request_type_names, request_key):
+    """Return the deque of unanswered requests with one of the types and the key, or None.
+
+    When several types have unanswered requests with the key, the deque with the earliest logged
+    request is returned.
+    """
+    oldest = None
+    for type_name in request_type_names:
+        indexes = request_key_to_indexes.get((type_name,) + request_key)
+        if indexes and (oldest is None or indexes[0][0] < oldest[0][0]):
+            oldest = indexes
+    return oldest
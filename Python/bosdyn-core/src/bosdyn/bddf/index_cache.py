@@ -0,0 +1,176 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Sidecar files caching the parsed index of a bddf file.
+
+The sidecar of 'name.bddf' is 'name.bddf.bddfidx'.  It holds the FileIndex, every
+ SeriesDescriptor and every series block index of the data file, so that all of them can be
+ loaded with a single read.  It is keyed by the size, modification time and checksum of the data
+ file, and is ignored if any of those do not match.
+
+Layout (all integers little-endian):
+  magic 'BDDFIDX1', file size (u64), mtime nsec (i64), checksum (u64),
+  FileIndex (u32 size + serialized proto), number of series (u32),
+  then for each series:
+    SeriesDescriptor (u32 size + serialized proto), descriptor file offset (u64),
+    total bytes (u64), number of blocks (u64), additional indexes per block (u32),
+    block file offsets (u64 each), block timestamps (i64 each), additional indexes (i64 each).
+"""
+import os
+import struct
+import sys
+
+from google.protobuf.message import DecodeError
+
+import bosdyn.api.bddf_pb2 as bddf
+
+from .common import LOGGER
+from .file_indexer import BlockIndexArrays
+
+INDEX_CACHE_SUFFIX = '.bddfidx'
+
+_MAGIC = b'BDDFIDX1'
+_KEY_FORMAT = '<QqQ'
+_SERIES_FORMAT = '<QQQI'
+
+
+class IndexCacheKey:  # pylint: disable=too-few-public-methods
+    """Identifies the version of a data file which an index cache describes."""
+
+    def __init__(self, file_size, mtime_nsec, checksum):
+        self.file_size = file_size
+        self.mtime_nsec = mtime_nsec
+        self.checksum = checksum
+
+    @classmethod
+    def from_file(cls, filename, checksum):
+        """Return key for the file with the given name and checksum."""
+        stat = os.stat(filename)
+        return cls(stat.st_size, stat.st_mtime_ns, checksum)
+
+    def as_tuple(self):
+        """Return the key as a tuple of (file_size, mtime_nsec, checksum)."""
+        return self.file_size, self.mtime_nsec, self.checksum
+
+
+class CachedIndex:  # pylint: disable=too-few-public-methods
+    """The index information of a data file stored in a sidecar."""
+
+    def __init__(self, file_index, series_descriptors, descriptor_file_offsets, block_arrays):
+        self.file_index = file_index  # FileIndex
+        self.series_descriptors = series_descriptors  # series_index -> SeriesDescriptor
+        self.descriptor_file_offsets = descriptor_file_offsets  # series_index -> int
+        self.block_arrays = block_arrays  # series_index -> BlockIndexArrays
+
+
+def index_cache_filename(filename):
+    """Return the name of the sidecar index file for the given data file name."""
+    return filename + INDEX_CACHE_SUFFIX
+
+
+def _little_endian_bytes(values):
+    if sys.byteorder != 'little':
+        values = values[:]
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(values, data):
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+
+
+def write_index_cache(filename, key, cached_index):
+    """Write the sidecar index file for the given data file name.
+
+    The file is written to a temporary name and then renamed, so readers never see a partial
+     sidecar.
+    """
+    parts = [_MAGIC, struct.pack(_KEY_FORMAT, *key.as_tuple())]
+
+    def _add_proto(proto):
+        serialized = proto.SerializeToString()
+        parts.append(struct.pack('<I', len(serialized)))
+        parts.append(serialized)
+
+    _add_proto(cached_index.file_index)
+    parts.append(struct.pack('<I', len(cached_index.series_descriptors)))
+    for series_descriptor, descriptor_file_offset, arrays in zip(
+            cached_index.series_descriptors, cached_index.descriptor_file_offsets,
+            cached_index.block_arrays):
+        _add_proto(series_descriptor)
+        parts.append(
+            struct.pack(_SERIES_FORMAT, descriptor_file_offset, arrays.total_bytes, len(arrays),
+                        arrays.num_additional_indexes))
+        parts.append(_little_endian_bytes(arrays.file_offsets))
+        parts.append(_little_endian_bytes(arrays.timestamps))
+        parts.append(_little_endian_bytes(arrays.additional_indexes))
+
+    cache_filename = index_cache_filename(filename)
+    tmp_filename = '{}.{}.tmp'.format(cache_filename, os.getpid())
+    with open(tmp_filename, 'wb') as outfile:
+        outfile.write(b''.join(parts))
+    os.replace(tmp_filename, cache_filename)
+
+
+def load_index_cache(filename, key):
+    """Load the sidecar index file for the given data file name.
+
+    Returns a CachedIndex, or None if there is no valid sidecar matching the key.
+    """
+    try:
+        with open(index_cache_filename(filename), 'rb') as infile:
+            data = memoryview(infile.read())
+    except OSError:
+        return None
+    try:
+        return _parse_index_cache(data, key)
+    except (DecodeError, struct.error, ValueError) as err:
+        LOGGER.warning('Ignoring invalid index cache for %s: %s', filename, err)
+        return None
+
+
+def _parse_index_cache(data, key):
+    offset = 0
+
+    def _take(nbytes):
+        nonlocal offset
+        if offset + nbytes > len(data):
+            raise ValueError('truncated index cache')
+        chunk = data[offset:offset + nbytes]
+        offset += nbytes
+        return chunk
+
+    def _unpack(fmt):
+        return struct.unpack(fmt, _take(struct.calcsize(fmt)))
+
+    def _take_proto(proto):
+        (nbytes,) = _unpack('<I')
+        proto.ParseFromString(_take(nbytes))
+        return proto
+
+    if _take(len(_MAGIC)) != _MAGIC:
+        raise ValueError('bad magic bytes')
+    if _unpack(_KEY_FORMAT) != key.as_tuple():
+        return None  # Cache is for a different version of the file.
+
+    file_index = _take_proto(bddf.FileIndex())
+    (num_series,) = _unpack('<I')
+    cached_index = CachedIndex(file_index, [], [], [])
+    for _ in range(num_series):
+        cached_index.series_descriptors.append(_take_proto(bddf.SeriesDescriptor()))
+        descriptor_file_offset, total_bytes, num_blocks, num_additional_indexes = _unpack(
+            _SERIES_FORMAT)
+        arrays = BlockIndexArrays(num_additional_indexes)
+        arrays.total_bytes = total_bytes
+        _from_little_endian(arrays.file_offsets, _take(num_blocks * 8))
+        _from_little_endian(arrays.timestamps, _take(num_blocks * 8))
+        _from_little_endian(arrays.additional_indexes,
+                            _take(num_blocks * num_additional_indexes * 8))
+        cached_index.descriptor_file_offsets.append(descriptor_file_offset)
+        cached_index.block_arrays.append(arrays)
+    return cached_index
@@ -0,0 +1,251 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""A class for reading the data of many bddf files in timestamp order."""
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .data_reader import DataReader
+
+BDDF_SUFFIX = '.bddf'
+
+
+class _FileInfo:  # pylint: disable=too-few-public-methods
+    """What MultiFileReader knows about a file without having it open."""
+
+    def __init__(self, order, filename, series, start_nsec, end_nsec):
+        self.order = order
+        self.filename = filename
+        self.series = series  # list of (series_index, series_index in file)
+        self.series_index_map = {
+            file_series_index: series_index for series_index, file_series_index in series
+        }
+        self.start_nsec = start_nsec  # earliest timestamp of any selected block in the file
+        self.end_nsec = end_nsec  # latest timestamp of any selected block in the file
+
+
+class _OpenFile:
+    """A file being read by MultiFileReader.read_range()."""
+
+    def __init__(self, info, data_reader, start_nsec, end_nsec):
+        self.info = info
+        self.data_reader = data_reader
+        self.prefetched = {}  # {(series index in file, index_in_series) -> data}
+        self.cursors = {}  # {series index in file -> list of index_in_series in time order}
+        for _, file_series_index in info.series:
+            indexes = data_reader.index_range(file_series_index, start_nsec, end_nsec)
+            if not isinstance(indexes, range):
+                # The series is not in time order within the file.
+                timestamps = data_reader.series_timestamps(file_series_index)
+                indexes = sorted(indexes, key=timestamps.__getitem__)
+            if indexes:
+                self.cursors[file_series_index] = indexes
+        self.num_active = len(self.cursors)
+
+    def prefetch(self, num_blocks):
+        """Read the first num_blocks blocks of each series so they are ready for the merge."""
+        for file_series_index, indexes in self.cursors.items():
+            for index_in_series in indexes[:num_blocks]:
+                self.prefetched[(file_series_index, index_in_series)] = self.data_reader.read(
+                    file_series_index, index_in_series)[2]
+
+    def read(self, file_series_index, index_in_series):
+        """Return the data of a block, using the prefetched copy if there is one."""
+        try:
+            return self.prefetched.pop((file_series_index, index_in_series))
+        except KeyError:
+            return self.data_reader.read(file_series_index, index_in_series)[2]
+
+    def close(self):
+        """Close the DataReader of the file."""
+        self.prefetched.clear()
+        self.data_reader._close()  # pylint: disable=protected-access
+
+
+class MultiFileReader:
+    """Reads the data of many bddf files as a single sequence in timestamp order.
+
+    Series with the same type and spec in several files (e.g., files downloaded hour-by-hour
+     from the same robot) are treated as a single series, whose series_index in this reader is
+     assigned in order of first appearance.
+
+    Blocks are merged with a heap which holds the next block of each series of the open files,
+     so only the files which overlap the current timestamp are open at once.  The next file to be
+     opened is opened and its first blocks read by a background thread while earlier files are
+     being read.
+
+    Methods raise ParseError if there is a problem with the format of a file.
+    """
+
+    def __init__(self, files, channels=None, prefetch_blocks=16, index_cache=False):
+        """
+        Args:
+         files:           list of names of bddf files, or the name of a directory from which all
+                           '.bddf' files are read.
+         channels:        names of message channels ('bosdyn:channel' in the series spec) to read,
+                           or None to read all series.
+         prefetch_blocks: number of blocks per series to read ahead when opening the next file,
+                           or 0 to open files only when they are needed.
+         index_cache:     passed to DataReader, to use sidecar index cache files.
+        """
+        if isinstance(files, str):
+            files = sorted(
+                os.path.join(files, name)
+                for name in os.listdir(files)
+                if name.endswith(BDDF_SUFFIX))
+        self._channels = None if channels is None else set(channels)
+        self._prefetch_blocks = prefetch_blocks
+        self._index_cache = index_cache
+        self._series_identifiers = []
+        self._series_descriptors = []
+        self._series_key_to_index = {}
+        self._files = []
+        for order, filename in enumerate(files):
+            info = self._scan_file(order, filename)
+            if info is not None:
+                self._files.append(info)
+        self._files.sort(key=lambda info: (info.start_nsec, info.order))
+
+    @property
+    def filenames(self):
+        """Names of the files with data in the selected series, ordered by first timestamp."""
+        return [info.filename for info in self._files]
+
+    @property
+    def series_identifiers(self):
+        """List of SeriesIdentifiers of the series read, indexed by series_index."""
+        return self._series_identifiers
+
+    def series_descriptor(self, series_index):
+        """Return the SeriesDescriptor for the series from the first file which contains it.
+
+        The series_index field of the descriptor is the index of the series in that file.
+        """
+        return self._series_descriptors[series_index]
+
+    def series_spec_to_index(self, series_spec):
+        """Given a series spec (map {key -> value}), return the series index for that series.
+
+        Raises ValueError if no such series exists.
+        """
+        return [dict(identifier.spec) for identifier in self._series_identifiers].index(series_spec)
+
+    def __iter__(self):
+        return self.read_range()
+
+    def read_range(self, start_nsec=None, end_nsec=None):
+        """Generator over the data of the selected series with timestamps in [start_nsec, end_nsec).
+
+        Data blocks with the same timestamp are returned in the order of the files given to
+         the constructor.
+
+        Args:
+         start_nsec:   first timestamp to include, or None for no limit.
+         end_nsec:     timestamp at which to stop (exclusive), or None for no limit.
+
+        Yields: series_index (int), timestamp_nsec (int), data (bytes)
+        """
+        pending = [
+            info for info in self._files
+            if (start_nsec is None or info.end_nsec >= start_nsec) and
+            (end_nsec is None or info.start_nsec < end_nsec)
+        ]
+        executor = ThreadPoolExecutor(max_workers=1) if self._prefetch_blocks else None
+        open_files = {}
+        heap = []
+
+        def _start_open(info):
+            if executor is None:
+                return None
+            return executor.submit(self._open_file, info, start_nsec, end_nsec, True)
+
+        def _push(open_file, file_series_index, cursor):
+            indexes = open_file.cursors[file_series_index]
+            if cursor < len(indexes):
+                timestamp = open_file.data_reader.series_timestamps(file_series_index)[
+                    indexes[cursor]]
+                heapq.heappush(heap, (timestamp, open_file.info.order, file_series_index, cursor))
+                return
+            open_file.num_active -= 1
+            if not open_file.num_active:
+                del open_files[open_file.info.order]
+                open_file.close()
+
+        next_file = 0
+        future = _start_open(pending[0]) if pending else None
+        try:
+            while True:
+                while next_file < len(pending) and (not heap or
+                                                    pending[next_file].start_nsec <= heap[0][0]):
+                    info = pending[next_file]
+                    if future is None:
+                        open_file = self._open_file(info, start_nsec, end_nsec, False)
+                    else:
+                        open_file, future = future.result(), None
+                    next_file += 1
+                    if next_file < len(pending):
+                        future = _start_open(pending[next_file])
+                    if not open_file.num_active:
+                        open_file.close()
+                        continue
+                    open_files[info.order] = open_file
+                    for file_series_index in list(open_file.cursors):
+                        _push(open_file, file_series_index, 0)
+                if not heap:
+                    return
+                timestamp, order, file_series_index, cursor = heapq.heappop(heap)
+                open_file = open_files[order]
+                data = open_file.read(file_series_index,
+                                      open_file.cursors[file_series_index][cursor])
+                yield open_file.info.series_index_map[file_series_index], timestamp, data
+                _push(open_file, file_series_index, cursor + 1)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+                if future is not None and future.done() and future.exception() is None:
+                    future.result().close()
+            for open_file in open_files.values():
+                open_file.close()
+
+    def _open_data_reader(self, filename):
+        return DataReader(filename=filename, index_cache=self._index_cache)
+
+    def _scan_file(self, order, filename):
+        """Register the selected series of a file, returning a _FileInfo or None if none."""
+        with self._open_data_reader(filename) as data_reader:
+            series = []
+            start_nsec = end_nsec = None
+            for file_series_index, identifier in enumerate(
+                    data_reader.file_index.series_identifiers):
+                if (self._channels is not None and
+                        identifier.spec.get('bosdyn:channel') not in self._channels):
+                    continue
+                timestamps = data_reader.series_timestamps(file_series_index)
+                if not timestamps:
+                    continue
+                key = (identifier.series_type, tuple(sorted(identifier.spec.items())))
+                try:
+                    series_index = self._series_key_to_index[key]
+                except KeyError:
+                    series_index = len(self._series_identifiers)
+                    self._series_key_to_index[key] = series_index
+                    self._series_identifiers.append(identifier)
+                    self._series_descriptors.append(
+                        data_reader.series_descriptor(file_series_index))
+                series.append((series_index, file_series_index))
+                first, last = min(timestamps), max(timestamps)
+                start_nsec = first if start_nsec is None else min(start_nsec, first)
+                end_nsec = last if end_nsec is None else max(end_nsec, last)
+        if not series:
+            return None
+        return _FileInfo(order, filename, series, start_nsec, end_nsec)
+
+    def _open_file(self, info, start_nsec, end_nsec, prefetch):
+        open_file = _OpenFile(info, self._open_data_reader(info.filename), start_nsec, end_nsec)
+        if prefetch:
+            open_file.prefetch(self._prefetch_blocks)
+        return open_file
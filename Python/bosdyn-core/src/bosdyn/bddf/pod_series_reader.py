@@ -6,9 +6,8 @@
 
 """A class for reading a series of POD data from a DataFile."""
 import struct
-from itertools import product
 
-from .common import POD_TYPE_TO_NUM_BYTES, POD_TYPE_TO_STRUCT, ParseError
+from .common import POD_TYPE_TO_NUM_BYTES, POD_TYPE_TO_NUMPY_DTYPE, POD_TYPE_TO_STRUCT, ParseError
 
 
 class PodSeriesReader:
@@ -70,7 +69,9 @@ class PodSeriesReader:
         def _split(vals, dims):
             if not dims:
                 return vals
-            els_per_sample = product(dims)
+            els_per_sample = 1
+            for dim in dims:
+                els_per_sample *= dim
             assert els_per_sample
             next_dims = dims[1:]
             return [
@@ -81,3 +82,33 @@ class PodSeriesReader:
         split_data = _split(pod_data, self._pod_type.dimension)
 
         return timestamp_nsec, split_data
+
+    def read_series_array(self, start_index=0, end_index=None):
+        """Return the POD data values from a range of data blocks as a single numpy array.
+
+        This requires numpy.  The data is read with numpy.frombuffer() rather than unpacked
+         value by value.  Timestamps for each block are available from
+         DataReader.series_timestamps().
+
+        Args:
+         start_index:  index of the first data block to read (default=0).
+         end_index:    index after the last data block to read, or None for the end of the series.
+
+        Returns: numpy.ndarray with shape (num_samples,) + dimension.
+        """
+        import numpy  # pylint: disable=import-outside-toplevel
+
+        if end_index is None:
+            end_index = self.num_data_blocks
+        blocks = []
+        for index_in_series in range(start_index, end_index):
+            _desc, _timestamp_nsec, data = self._data_reader.read(self._series_index,
+                                                                  index_in_series)
+            if len(data) % self._bytes_per_sample:
+                raise ParseError('{} idx={} has {} bytes, not a multiple of {}'.format(
+                    self._series_descriptor.series_identifier, index_in_series, len(data),
+                    self._bytes_per_sample))
+            blocks.append(data)
+        dtype = numpy.dtype(POD_TYPE_TO_NUMPY_DTYPE[self._pod_type.pod_type])
+        values = numpy.frombuffer(bytearray().join(blocks), dtype=dtype)
+        return values.reshape((-1,) + tuple(self._pod_type.dimension))
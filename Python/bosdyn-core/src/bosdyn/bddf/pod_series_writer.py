@@ -8,7 +8,8 @@
 import struct
 
 from .bosdyn import MessageChannel
-from .common import POD_TYPE_TO_NUM_BYTES, POD_TYPE_TO_STRUCT, DataFormatError
+from .common import (POD_TYPE_TO_NUM_BYTES, POD_TYPE_TO_NUMPY_DTYPE, POD_TYPE_TO_STRUCT,
+                     DataFormatError)
 
 
 class PodSeriesWriter:  # pylint: disable=too-many-instance-attributes
@@ -16,7 +17,7 @@ class PodSeriesWriter:  # pylint: disable=too-many-instance-attributes
 
     def __init__(  # pylint: disable=too-many-arguments
             self, data_writer, series_type, series_spec, pod_type, dimensions=None,
-            annotations=None, data_block_size=2048):
+            annotations=None, data_block_size=2048, compression=None):
         self._data_writer = data_writer
         self._series_type = series_type
         self._series_spec = series_spec
@@ -25,14 +26,19 @@ class PodSeriesWriter:  # pylint: disable=too-many-instance-attributes
         self._series_index = self._data_writer.add_pod_series(self.series_type, self.series_spec,
                                                               type_enum=self._pod_type,
                                                               dimension=self._dimensions,
-                                                              annotations=annotations)
+                                                              annotations=annotations,
+                                                              compression=compression)
 
         self._data_block_size = data_block_size
         self._num_values_per_sample = 1
         for dim in self._dimensions:
             self._num_values_per_sample *= dim
         self._bytes_per_sample = POD_TYPE_TO_NUM_BYTES[pod_type] * self._num_values_per_sample
-        self._block = b''
+        # Samples are accumulated into a preallocated buffer holding as many samples as fit
+        #  within data_block_size (at least one), and the block is written when it is full.
+        samples_per_block = max(1, self._data_block_size // self._bytes_per_sample)
+        self._block = bytearray(samples_per_block * self._bytes_per_sample)
+        self._block_len = 0
         self._timestamp_nsec = None
         self._format_str = '<{}{}'.format(self._num_values_per_sample, POD_TYPE_TO_STRUCT[pod_type])
         self._data_writer.run_on_close(self.finish_block)
@@ -44,38 +50,72 @@ class PodSeriesWriter:  # pylint: disable=too-many-instance-attributes
 
         Args:
          timestamp_nsec:  nsec since unix epoch to timestamp the data
-         sample:          array/vector of POD values to write
+         sample:          POD value, or flat array/vector of POD values for a series with
+                           dimensions.
 
         Raises DataFormatError if the data is invalid for this series.
         """
-        serialized_sample = struct.pack(self._format_str, sample)
-        if len(serialized_sample) != self._bytes_per_sample:
-            raise DataFormatError('{} expect {} elements but got {})'.format(
-                self._series_spec, self._bytes_per_sample, len(serialized_sample)))
-        if self._bytes_per_sample >= self._data_block_size:
-            # We should always immediately write data.
-            self._data_writer.write_data(self._series_index, timestamp_nsec, serialized_sample)
-            return
-
-        if not self._block:
+        values = sample if self._dimensions else (sample,)
+        if not self._block_len:
             # New block, starts with current timestamp.
             self._timestamp_nsec = timestamp_nsec
-            self._block = serialized_sample
-        else:
-            # Add data to pre-existing block
-            self._block += serialized_sample
-
-        if len(self._block) + self._bytes_per_sample > self._data_block_size:
+        try:
+            struct.pack_into(self._format_str, self._block, self._block_len, *values)
+        except struct.error as err:
+            raise DataFormatError('{} expect {} values per sample: {}'.format(
+                self._series_spec, self._num_values_per_sample, err))
+        self._block_len += self._bytes_per_sample
+        if self._block_len == len(self._block):
             # No room for more samples before the data must be written.
-            self._data_writer.write_data(self._series_index, self._timestamp_nsec, self._block)
-            self._block = b''
+            self._write_block()
+
+    def write_samples(self, timestamp_nsec, samples, sample_period_nsec=None):
+        """Add an array of samples to data blocks, writing each block as it fills.
+
+        This requires numpy.  The samples are copied into the block buffer as whole arrays
+         rather than packed one at a time.
+
+        Args:
+         timestamp_nsec:      nsec since unix epoch to timestamp the first sample
+         samples:             numpy array (or array-like) of shape (num_samples,) + dimensions
+         sample_period_nsec:  if specified, nsec between consecutive samples, used to timestamp
+                               blocks which start part-way through samples.  Otherwise all blocks
+                               started by this call are timestamped with timestamp_nsec.
+
+        Raises DataFormatError if the data is invalid for this series.
+        """
+        import numpy  # pylint: disable=import-outside-toplevel
+
+        values = numpy.ascontiguousarray(samples,
+                                         dtype=POD_TYPE_TO_NUMPY_DTYPE[self._pod_type])
+        if values.ndim == 0 or values.shape[1:] != tuple(self._dimensions):
+            raise DataFormatError('{} expect samples with dimensions {} but got shape {}'.format(
+                self._series_spec, list(self._dimensions), values.shape))
+        data = memoryview(values).cast('B')
+        offset = 0
+        while offset < len(data):
+            if not self._block_len:
+                # New block, starts with the timestamp of its first sample.
+                self._timestamp_nsec = timestamp_nsec
+                if sample_period_nsec:
+                    self._timestamp_nsec += (offset // self._bytes_per_sample) * sample_period_nsec
+            nbytes = min(len(self._block) - self._block_len, len(data) - offset)
+            self._block[self._block_len:self._block_len + nbytes] = data[offset:offset + nbytes]
+            self._block_len += nbytes
+            offset += nbytes
+            if self._block_len == len(self._block):
+                self._write_block()
 
     def finish_block(self):
         """If there are samples which haven't been written to the file, write them now."""
-        if not self._block:
+        if not self._block_len:
             return
-        self._data_writer.write_data(self._series_index, self._timestamp_nsec, self._block)
-        self._block = b''
+        self._write_block()
+
+    def _write_block(self):
+        data = bytes(memoryview(self._block)[:self._block_len])
+        self._data_writer.write_data(self._series_index, self._timestamp_nsec, data)
+        self._block_len = 0
 
     @property
     def series_type(self):
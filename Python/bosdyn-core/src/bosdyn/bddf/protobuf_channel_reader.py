@@ -47,6 +47,19 @@ class ProtobufChannelReader:
                                                                   index_in_series)
         return timestamp, msg
 
+    def read_range(self, start_nsec=None, end_nsec=None):
+        """Generator over messages in the series with timestamps in [start_nsec, end_nsec).
+
+        Args:
+         start_nsec:  first timestamp to include, or None for the start of the series.
+         end_nsec:    timestamp at which to stop (exclusive), or None for the end of the series.
+
+        Yields: timestamp_nsec (int), deserialized protobuf object
+        """
+        for _desc, timestamp, msg in self._protobuf_reader.read_range(
+                self._series_index, self._protobuf_type, start_nsec, end_nsec):
+            yield timestamp, msg
+
     def __iter__(self):
         return ProtobufChannelReader.Iterator(self)
 
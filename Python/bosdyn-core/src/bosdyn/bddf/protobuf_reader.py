@@ -5,8 +5,31 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """A class for reading Protobuf data from a DataFile."""
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .data_reader import DataReader
 from .message_reader import MessageReader
 
+# DataReaders opened by map_parallel() worker processes: {filename -> DataReader}.
+_worker_data_readers = {}
+
+
+def _map_blocks(filename, series_index, protobuf_type, fn, indexes):
+    """Run in a worker process: return fn(timestamp_nsec, message) for the given blocks."""
+    try:
+        data_reader = _worker_data_readers[filename]
+    except KeyError:
+        data_reader = _worker_data_readers[filename] = DataReader(filename=filename)
+    results = []
+    for index_in_series in indexes:
+        _desc, timestamp_nsec, data = data_reader.read(series_index, index_in_series)
+        protobuf = protobuf_type()
+        protobuf.ParseFromString(data)
+        results.append(fn(timestamp_nsec, protobuf))
+    return results
+
 
 class ProtobufReader(MessageReader):
     """A class for reading Protobuf data from a DataFile.
@@ -31,3 +54,68 @@ class ProtobufReader(MessageReader):
         protobuf = protobuf_type()
         protobuf.ParseFromString(data)
         return desc, timestamp_nsec, protobuf
+
+    def read_range(self, series_index, protobuf_type, start_nsec=None, end_nsec=None):
+        """Generator over deserialized protobufs with timestamps in [start_nsec, end_nsec).
+
+        Args:
+         series_index:     index (int) from the series_index() call
+         protobuf_type:    class of the protobuf we want to deserialize
+         start_nsec:       first timestamp to include, or None for the start of the series.
+         end_nsec:         timestamp at which to stop (exclusive), or None for no limit.
+
+        Yields: DataTypeDescriptor for channel, timestamp_nsec (int), deserialized protobuf object
+        """
+        for desc, timestamp_nsec, data in self.data_reader.read_range(
+                series_index, start_nsec, end_nsec):
+            protobuf = protobuf_type()
+            protobuf.ParseFromString(data)
+            yield desc, timestamp_nsec, protobuf
+
+    def map_parallel(  # pylint: disable=too-many-arguments,too-many-locals
+            self, channel_name, protobuf_type, fn, workers=None, chunk_size=None, start_nsec=None,
+            end_nsec=None):
+        """Generator over fn(timestamp_nsec, message) for messages of a channel, in parallel.
+
+        The messages of the channel are split into chunks of consecutive blocks.  Each worker
+         process opens the file with its own DataReader, then parses the messages of a chunk and
+         applies fn to them.  Results are returned in the order of the messages in the series,
+         with only a few chunks per worker in progress at once.
+
+        The file must be readable by name, and fn and protobuf_type must be picklable (e.g.,
+         functions and classes defined at module level) and return picklable results.
+
+        Args:
+         channel_name:     name of the channel of messages.
+         protobuf_type:    class of the protobuf we want to deserialize
+         fn:               function called with the timestamp_nsec (int) and message.
+         workers:          number of worker processes (default is the number of CPUs).
+         chunk_size:       number of messages handed to a worker at once (default spreads the
+                            messages over 4 chunks per worker).
+         start_nsec:       first timestamp to include, or None for the start of the series.
+         end_nsec:         timestamp at which to stop (exclusive), or None for no limit.
+
+        Yields: the results of fn.
+
+        Raises ValueError if the name of the file is not known.
+        """
+        filename = self.data_reader.file_path
+        if filename is None:
+            raise ValueError('map_parallel() requires a DataReader for a named file')
+        series_index = self.series_index(channel_name,
+                                         message_type=protobuf_type.DESCRIPTOR.full_name)
+        indexes = self.data_reader.index_range(series_index, start_nsec, end_nsec)
+        workers = workers or os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(indexes) // (workers * 4)))
+        chunks = (indexes[start:start + chunk_size] for start in range(0, len(indexes), chunk_size))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = collections.deque()
+            for chunk in chunks:
+                futures.append(
+                    executor.submit(_map_blocks, filename, series_index, protobuf_type, fn, chunk))
+                if len(futures) >= 2 * workers:
+                    yield from futures.popleft().result()
+            while futures:
+                yield from futures.popleft().result()
@@ -5,6 +5,7 @@
 # Development Kit License (20191101-BDSDK-SL).
 
 """Data reader which reads the file format from a stream, without seeking."""
+import os
 from hashlib import sha1
 
 from .base_data_reader import BaseDataReader
@@ -13,23 +14,45 @@ from .file_indexer import FileIndexer
 
 
 class StreamDataReader(BaseDataReader):
-    """Data reader which reads the file format from a stream, without seeking."""
+    """Data reader which reads the file format from a stream, without seeking.
 
-    def __init__(self, outfile):
+    Data blocks of series rejected by series_filter are returned by read_next_block() with
+     data of None, and are not returned by read_data_block() nor added to the stream index.
+     Their data is still read so that it is included in the checksum, unless verify_checksum is
+     False, in which case it is skipped over by seeking if the file is seekable.
+    """
+
+    def __init__(self, outfile, series_filter=None, verify_checksum=True):
         """
         Args:
          outfile:      binary file-like object for reading (e.g., from open(fname, "rb")).
+         series_filter:   optional function taking a SeriesDescriptor and returning True if
+                           the data of the series should be read.
+         verify_checksum: if False, do not compute the checksum of the file while reading it.
         """
-        self._hasher = sha1()  # This computes a checksum
+        self._hasher = sha1() if verify_checksum else None  # This computes a checksum
+        self._series_filter = series_filter
+        self._filtered_series = set()  # series indexes rejected by series_filter
         super(StreamDataReader, self).__init__(outfile)
+        self._seekable = not verify_checksum and getattr(self._file, 'seekable', bool)()
         self._indexer = FileIndexer()
         self._series_index_to_block_index = {}  # {series_index -> SeriesBlockIndex}
 
     def _read(self, nbytes):
         block = BaseDataReader._read(self, nbytes)
-        self._hasher.update(block)
+        if self._hasher is not None:
+            self._hasher.update(block)
         return block
 
+    def _skip(self, nbytes):
+        if self._seekable:
+            self._file.seek(nbytes, os.SEEK_CUR)
+        else:
+            super(StreamDataReader, self)._skip(nbytes)
+
+    def _skip_data_block(self, data_descriptor):
+        return data_descriptor.series_index in self._filtered_series
+
     @property
     def read_checksum(self):
         """64-bit checksum read from the end of the file, or None if not yet read."""
@@ -41,6 +64,8 @@ class StreamDataReader(BaseDataReader):
         return self._indexer.file_index
 
     def _computed_checksum(self):
+        if self._hasher is None:
+            return None
         return self._hasher.digest()
 
     def series_descriptor(self, series_index):
@@ -53,6 +78,8 @@ class StreamDataReader(BaseDataReader):
     def read_data_block(self):
         """Read and return next data block.
 
+        Blocks of series rejected by the series_filter are skipped.
+
         Returns: DataDescriptor, SeriesDescriptor, data (bytes)
 
         Raises ParseError if there is a problem with the format of the file,
@@ -60,7 +87,7 @@ class StreamDataReader(BaseDataReader):
         """
         while True:
             is_data, desc, data = self.read_next_block()
-            if not is_data:
+            if not is_data or data is None:
                 continue
             return desc, self.series_descriptor(desc.series_index), data
 
@@ -68,6 +95,7 @@ class StreamDataReader(BaseDataReader):
         """Read and return next block.
 
         Returns: True, DataDescriptor, data (bytes)   for data block
+        Returns: True, DataDescriptor, None           for data block rejected by series_filter
         Returns: False, DescriptorBlock, None         for descriptor block
 
         Raises ParseError if there is a problem with the format of the file,
@@ -80,8 +108,11 @@ class StreamDataReader(BaseDataReader):
             self._eof = True
             raise err
         if is_data:
+            if data is None:
+                return is_data, desc, data
+            data = self._decode_data(desc.series_index, data)
             self._indexer.index_data_block(desc.series_index, desc.timestamp.ToNanoseconds(),
-                                           len(data), file_offset, desc.additional_indexes)
+                                           file_offset, len(data), desc.additional_indexes)
         else:
             desc_type = desc.WhichOneof("DescriptorType")
             if desc_type == 'file_index':
@@ -91,6 +122,8 @@ class StreamDataReader(BaseDataReader):
             elif desc_type == 'series_descriptor':
                 series_descriptor = desc.series_descriptor
                 self._indexer.add_series_descriptor(series_descriptor, file_offset)
+                if self._series_filter is not None and not self._series_filter(series_descriptor):
+                    self._filtered_series.add(series_descriptor.series_index)
             elif desc_type == 'series_block_index':
                 series_block_index = desc.series_block_index
                 self._series_index_to_block_index[
@@ -106,7 +139,7 @@ class StreamDataReader(BaseDataReader):
 
     def series_block_index(self, series_index):
         """Returns the SeriesBlockIndexes for the given series_index."""
-        return self._indexer.series_block_indexes[series_index]
+        return self._indexer.series_block_index(series_index)
 
     @property
     def eof(self):
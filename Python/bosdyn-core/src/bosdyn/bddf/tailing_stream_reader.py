@@ -0,0 +1,104 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Data reader which follows a file while it is being written."""
+import threading
+import time
+
+from .stream_data_reader import StreamDataReader
+
+
+class TailingStreamReader(StreamDataReader):
+    """Data reader which follows a file while it is being written, like 'tail -f'.
+
+    When the reader reaches the end of the data written so far, it waits for more data to be
+     written.  Data only becomes visible as the writer flushes it to the file, so a DataWriter
+     which is followed should be created with checkpoint_interval_sec, which bounds how long
+     written data can stay buffered by the writer.
+
+    The file object must be seekable, so that a partially-written block can be read again once
+     the rest of it has been written.
+    """
+
+    def __init__(self, infile, poll_interval_sec=0.1, timeout_sec=None, **kwargs):
+        """
+        Args:
+         infile:            binary file-like object for reading (e.g., from open(fname, "rb")).
+         poll_interval_sec: time to wait before checking again for more data in the file.
+         timeout_sec:       longest time to wait for more data before raising TimeoutError, or
+                             None to wait until stop() is called.
+         kwargs:            series_filter and verify_checksum, as for StreamDataReader.
+        """
+        self._poll_interval_sec = poll_interval_sec
+        self._timeout_sec = timeout_sec
+        self._stop_event = threading.Event()
+        super(TailingStreamReader, self).__init__(infile, **kwargs)
+        # Data which is skipped may not have been written yet, so it is always read.
+        self._seekable = False
+
+    def stop(self):
+        """Stop waiting for data, from another thread.
+
+        A read waiting for data raises TimeoutError, and follow() returns.
+        """
+        self._stop_event.set()
+
+    def read_next_block(self):
+        """Read and return next block, waiting for it to be written if necessary.
+
+        Returns: True, DataDescriptor, data (bytes)   for data block
+        Returns: False, DescriptorBlock, None         for descriptor block
+
+        Raises ParseError if there is a problem with the format of the file,
+               EOFError if the end of the file is reached,
+               TimeoutError if the block is not written within timeout_sec, or stop() is called.
+                The reader is left at the start of the block, so reading may be retried.
+        """
+        file_offset = self._file.tell()
+        hasher = None if self._hasher is None else self._hasher.copy()
+        try:
+            return super(TailingStreamReader, self).read_next_block()
+        except TimeoutError:
+            self._file.seek(file_offset)
+            self._hasher = hasher
+            raise
+
+    def follow(self):
+        """Generator over data blocks as they are written to the file.
+
+        Returns at the end of the file, when no data is written within timeout_sec, or when
+         stop() is called.
+
+        Yields: DataDescriptor, SeriesDescriptor, data (bytes)
+        """
+        while True:
+            try:
+                yield self.read_data_block()
+            except (EOFError, TimeoutError):
+                return
+
+    def _read(self, nbytes):
+        assert nbytes
+        chunks = []
+        deadline = None
+        while nbytes:
+            chunk = self._file.read(nbytes)
+            if chunk:
+                chunks.append(chunk)
+                nbytes -= len(chunk)
+                continue
+            if self._stop_event.is_set():
+                raise TimeoutError('Stopped following bddf file')
+            now = time.monotonic()
+            if deadline is None and self._timeout_sec is not None:
+                deadline = now + self._timeout_sec
+            if deadline is not None and now >= deadline:
+                raise TimeoutError('No more data written to bddf file')
+            self._stop_event.wait(self._poll_interval_sec)
+        block = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        if self._hasher is not None:
+            self._hasher.update(block)
+        return block
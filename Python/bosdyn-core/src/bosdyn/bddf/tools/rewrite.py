@@ -0,0 +1,295 @@
+# Copyright (c) 2023 Boston Dynamics, Inc.  All rights reserved.
+#
+# Downloading, reproducing, distributing or otherwise using the SDK Software
+# is subject to the terms and conditions of the Boston Dynamics Software
+# Development Kit License (20191101-BDSDK-SL).
+
+"""Split, re-block and concatenate bddf files in a single streaming pass.
+
+The input file is read once, from start to end, with a StreamDataReader, and its data blocks are
+ written to a sequence of output files.  A new output file is started when the timestamp of a
+ block reaches the end of the time window of the current output, or when the current output
+ would grow beyond a maximum size.  Blocks are written in the order they appear in the input, so
+ a block with an earlier timestamp than the start of the current window stays in that window.
+
+Series marked as metadata (see DataWriter.add_message_series()) are needed to interpret other
+ messages, so the latest block of each metadata series seen so far is also written at the start
+ of every output file.  Each output therefore stands alone.
+
+Blocks of POD series may be re-blocked: consecutive blocks of a series are concatenated into
+ blocks of up to a target size, keeping the timestamp and additional indexes of the first.
+ Blocks are never split.  Message series always keep one message per block.
+
+Memory use is bounded by the largest block, the pending re-blocked data of each POD series and
+ the latest block of each metadata series, no matter how large the input is.
+
+concatenate_files() does the reverse, joining files which cover consecutive time spans (e.g.,
+ pieces of a download) into a single file.
+
+Example:
+  python -m bosdyn.bddf.tools.rewrite log.bddf 'log-{index:03d}.bddf' --window-sec 600
+"""
+import contextlib
+import sys
+
+from ..compression import COMPRESSION_ANNOTATION
+from ..data_reader import DataReader
+from ..data_writer import DataWriter
+from ..stream_data_reader import StreamDataReader
+
+
+def _series_key(series_descriptor):
+    identifier = series_descriptor.series_identifier
+    return identifier.series_type, tuple(sorted(identifier.spec.items()))
+
+
+def _is_metadata(series_descriptor):
+    return (series_descriptor.WhichOneof('DataType') == 'message_type' and
+            series_descriptor.message_type.is_metadata)
+
+
+class _Output:
+    """An output file being written by rewrite_file()."""
+
+    def __init__(self, filename, annotations, compression, start_nsec, end_nsec):
+        self.filename = filename
+        self.start_nsec = start_nsec
+        self.end_nsec = end_nsec  # end of the time window (exclusive), or None
+        self.num_data_blocks = 0
+        self.series_index_map = {}  # {(series_type, spec items) -> output series_index}
+        self._exit_stack = contextlib.ExitStack()
+        self._file = self._exit_stack.enter_context(open(filename, 'wb'))
+        self.data_writer = self._exit_stack.enter_context(
+            DataWriter(self._file, annotations=annotations, compression=compression))
+
+    def tell(self):
+        """Return the number of bytes written to the file so far."""
+        return self._file.tell()
+
+    def write(self, series_descriptor, timestamp_nsec, data, additional_indexes):
+        """Write a data block of the given input series, adding the series if needed."""
+        try:
+            series_index = self.series_index_map[_series_key(series_descriptor)]
+        except KeyError:
+            series_index = self._add_series(series_descriptor)
+        self.data_writer.write_data(series_index, timestamp_nsec, data, additional_indexes)
+        self.num_data_blocks += 1
+
+    def close(self):
+        """Write the index of the file and close it."""
+        self._exit_stack.close()
+
+    def _add_series(self, series_descriptor):
+        # The codec of the output is set by rewrite_file(), not copied from the input.
+        annotations = {
+            key: value
+            for key, value in series_descriptor.annotations.items()
+            if key != COMPRESSION_ANNOTATION
+        }
+        data_type = series_descriptor.WhichOneof('DataType')
+        series_index = self.data_writer.add_series(
+            series_descriptor.series_identifier.series_type,
+            dict(series_descriptor.series_identifier.spec),
+            message_type=series_descriptor.message_type if data_type == 'message_type' else None,
+            pod_type=series_descriptor.pod_type if data_type == 'pod_type' else None,
+            annotations=annotations,
+            additional_index_names=list(series_descriptor.additional_index_names))
+        self.series_index_map[_series_key(series_descriptor)] = series_index
+        return series_index
+
+
+def rewrite_file(  # pylint: disable=too-many-arguments,too-many-locals,too-many-branches
+        infile, output_filename_format, window_nsec=None, max_bytes=None, pod_block_bytes=None,
+        compression=None, index_cache=False):
+    """Stream a bddf file into new files split by time window or size.
+
+    Args:
+     infile:                 binary file-like object for reading the input bddf file.
+     output_filename_format: format string for the output file names, which may use the fields
+                              'index' (the number of the output, starting at 0) and 'start_nsec'
+                              (the first timestamp of its time window, or of its first block).
+     window_nsec:            length of the time window of each output, measured from the
+                              timestamp of the first data block, or None not to split by time.
+     max_bytes:              start a new output before a data block would grow the current output
+                              beyond this size, or None not to split by size.  POD data waiting
+                              to be re-blocked counts toward the size of the output it will be
+                              written to.  An output always holds at least one data block, so it
+                              may exceed this size.
+     pod_block_bytes:        target size of the data blocks of POD series, or None to keep the
+                              blocks of the input.
+     compression:            name of the codec used to compress the data blocks of the outputs,
+                              or None to write them uncompressed.
+     index_cache:            if True, also write the sidecar index cache of each output, so that
+                              opening it with DataReader(index_cache=True) reads a single file.
+
+    Returns: list of the names of the output files, in order.
+
+    Raises ParseError if there is a problem with the format of the input file.
+    """
+    reader = StreamDataReader(infile)
+    outputs = []
+    output = None
+    latest_metadata = {}  # {input series_index -> (SeriesDescriptor, timestamp, data, indexes)}
+    # {input series_index -> [SeriesDescriptor, timestamp, bytearray, additional indexes]}
+    pending_pod = {}
+    first_nsec = None
+
+    def _flush_pod(series_index):
+        series_descriptor, timestamp_nsec, data, indexes = pending_pod.pop(series_index)
+        output.write(series_descriptor, timestamp_nsec, bytes(data), indexes)
+
+    def _pending_bytes():
+        return sum(len(pending[2]) for pending in pending_pod.values())
+
+    def _close_output():
+        for series_index in list(pending_pod):
+            _flush_pod(series_index)
+        output.close()
+        if index_cache:
+            # DataReader writes the sidecar when it reads the index of a file without one.
+            with DataReader(filename=output.filename, index_cache=True):
+                pass
+
+    def _open_output(timestamp_nsec):
+        start_nsec = timestamp_nsec
+        end_nsec = None
+        if window_nsec is not None:
+            start_nsec = first_nsec + (timestamp_nsec - first_nsec) // window_nsec * window_nsec
+            end_nsec = start_nsec + window_nsec
+        filename = output_filename_format.format(index=len(outputs), start_nsec=start_nsec)
+        new_output = _Output(filename, dict(reader.annotations), compression, start_nsec,
+                             end_nsec)
+        outputs.append(new_output)
+        for series_descriptor, metadata_nsec, data, indexes in latest_metadata.values():
+            new_output.write(series_descriptor, metadata_nsec, data, indexes)
+        # Metadata copied from earlier outputs does not count toward the blocks of this one.
+        new_output.num_data_blocks = 0
+        return new_output
+
+    try:
+        while True:
+            try:
+                desc, series_descriptor, data = reader.read_data_block()
+            except EOFError:
+                break
+            series_index = desc.series_index
+            timestamp_nsec = desc.timestamp.ToNanoseconds()
+            additional_indexes = list(desc.additional_indexes) or None
+            if first_nsec is None:
+                first_nsec = timestamp_nsec
+            if output is not None and output.num_data_blocks and (
+                (output.end_nsec is not None and timestamp_nsec >= output.end_nsec) or
+                (max_bytes is not None and
+                 output.tell() + _pending_bytes() + len(data) > max_bytes)):
+                _close_output()
+                output = None
+            if output is None:
+                output = _open_output(timestamp_nsec)
+
+            if _is_metadata(series_descriptor):
+                latest_metadata[series_index] = (series_descriptor, timestamp_nsec, data,
+                                                 additional_indexes)
+            if (pod_block_bytes is not None and
+                    series_descriptor.WhichOneof('DataType') == 'pod_type'):
+                pending = pending_pod.get(series_index)
+                if pending is not None and len(pending[2]) + len(data) > pod_block_bytes:
+                    _flush_pod(series_index)
+                    pending = None
+                if pending is None:
+                    pending_pod[series_index] = [
+                        series_descriptor, timestamp_nsec,
+                        bytearray(data), additional_indexes
+                    ]
+                else:
+                    pending[2] += data
+                if len(pending_pod[series_index][2]) >= pod_block_bytes:
+                    _flush_pod(series_index)
+                output.num_data_blocks += 1
+                continue
+            output.write(series_descriptor, timestamp_nsec, data, additional_indexes)
+        if output is not None:
+            _close_output()
+            output = None
+    finally:
+        if output is not None:
+            output.close()
+    return [finished.filename for finished in outputs]
+
+
+def concatenate_files(filenames, output_filename, compression=None):
+    """Stream the data blocks of several bddf files, in order, into a single new file.
+
+    Series with the same type and spec in several input files are written as a single series.
+     The file annotations are those of the first input.
+
+    Args:
+     filenames:        names of the input bddf files, in the order their data is written.
+     output_filename:  name of the file to write.
+     compression:      name of the codec used to compress the data blocks of the output, or None
+                        to write them uncompressed.
+
+    Returns: number of data blocks written.
+
+    Raises ParseError if there is a problem with the format of an input file.
+    """
+    output = None
+    num_blocks = 0
+    try:
+        for filename in filenames:
+            with open(filename, 'rb') as infile:
+                reader = StreamDataReader(infile)
+                while True:
+                    try:
+                        desc, series_descriptor, data = reader.read_data_block()
+                    except EOFError:
+                        break
+                    if output is None:
+                        output = _Output(output_filename, dict(reader.annotations), compression,
+                                         None, None)
+                    output.write(series_descriptor, desc.timestamp.ToNanoseconds(), data,
+                                 list(desc.additional_indexes) or None)
+                    num_blocks += 1
+        if output is None:
+            # No input had any data, but the output is still a valid (empty) file.
+            output = _Output(output_filename, None, compression, None, None)
+    finally:
+        if output is not None:
+            output.close()
+    return num_blocks
+
+
+def main(args=None):
+    """Command-line interface."""
+    # pylint: disable=import-outside-toplevel
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Split a bddf file into new files by time window or size.')
+    parser.add_argument('filename', help='bddf file to read')
+    parser.add_argument(
+        'output_format',
+        help="format of the output file names, using the fields 'index' and 'start_nsec'"
+        " (e.g., 'part-{index:03d}.bddf')")
+    parser.add_argument('--window-sec', type=float, help='length of the time window of each file')
+    parser.add_argument('--max-bytes', type=int, help='largest size of each file')
+    parser.add_argument('--pod-block-bytes', type=int,
+                        help='target size of the data blocks of POD series')
+    parser.add_argument('--compression', help='codec for compressing the output data blocks')
+    parser.add_argument('--index-cache', action='store_true',
+                        help='write the sidecar index cache of each output file')
+    options = parser.parse_args(args)
+
+    window_nsec = None if options.window_sec is None else int(options.window_sec * 1e9)
+    with open(options.filename, 'rb') as infile:
+        filenames = rewrite_file(infile, options.output_format, window_nsec=window_nsec,
+                                 max_bytes=options.max_bytes,
+                                 pod_block_bytes=options.pod_block_bytes,
+                                 compression=options.compression,
+                                 index_cache=options.index_cache)
+    for filename in filenames:
+        print(filename)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,18 +6,31 @@
 
 """Test code for bosdyn.bddf"""
 
+import csv
 import os
+import struct
 import tempfile
+import threading
+import time
 
 import pytest
 from google.protobuf.timestamp_pb2 import Timestamp
 
 import bosdyn.api.bddf_pb2 as bddf
 import bosdyn.api.robot_id_pb2 as robot_id
+import bosdyn.api.robot_state_pb2 as robot_state
 from bosdyn.api.data_buffer_pb2 import OperatorComment
-from bosdyn.bddf import (DataReader, DataWriter, GrpcReader, GrpcServiceWriter, PodSeriesReader,
-                         PodSeriesWriter, ProtobufChannelReader, ProtobufReader,
-                         ProtobufSeriesWriter, StreamDataReader)
+from bosdyn.api.robot_state_pb2 import RobotState
+from bosdyn.bddf import (AddSeriesError, AsyncDataWriter, BlockCodec, DataFormatError, DataReader,
+                         DataWriter, GrpcReader, GrpcServiceWriter, MultiFileReader,
+                         OverflowPolicy, PodSeriesReader, PodSeriesWriter, ProtobufChannelReader,
+                         ProtobufReader, ProtobufSeriesWriter, SeriesNotUniqueError,
+                         StreamDataReader, TailingStreamReader, index_cache_filename,
+                         register_codec)
+from bosdyn.bddf.common import END_MAGIC
+from bosdyn.bddf.export import export_channel
+from bosdyn.bddf.export import main as export_main
+from bosdyn.bddf.tools.rewrite import concatenate_files, rewrite_file
 from bosdyn.util import now_nsec, now_timestamp, nsec_to_timestamp, timestamp_to_nsec
 
 
@@ -197,3 +210,902 @@ def test_grpc_read_write():
         nsec, msg = proto_reader.get_message(0)
         assert msg == response
         assert nsec_to_timestamp(nsec) == msg.header.response_timestamp
+
+
+def test_grpc_request_response_pairs():
+    """Test matching logged GRPC requests to their responses."""
+    filename = os.path.join(gettempdir(), 'test_grpc_pairs.bddf')
+    requests = []
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        grpc_log = GrpcServiceWriter(data_writer, 'robot-id')
+        for idx in range(6):
+            request = robot_id.RobotIdRequest()
+            request.header.request_timestamp.FromNanoseconds(1000 * (idx // 2))
+            request.header.client_name = 'client{}'.format(idx % 2)
+            grpc_log.log_request(request)
+            requests.append(request)
+        # Respond in a different order, and not to the last request.
+        for idx, latency_nsec in ((3, 70), (0, 20), (2, 10), (1, 50), (4, 30)):
+            response = robot_id.RobotIdResponse()
+            response.header.response_timestamp.FromNanoseconds(
+                timestamp_to_nsec(requests[idx].header.request_timestamp) + latency_nsec)
+            if idx == 4:
+                response.header.request.Pack(requests[idx])
+            else:
+                response.header.request_header.CopyFrom(requests[idx].header)
+            response.robot_id.serial_number = str(idx)
+            grpc_log.log_response(response)
+
+    with DataReader(filename=filename) as data_reader:
+        grpc_reader = GrpcReader(data_reader, [robot_id.RobotIdRequest, robot_id.RobotIdResponse])
+        assert grpc_reader.service_names == ['robot-id']
+        pairs = grpc_reader.request_response_pairs('robot-id')
+        assert [pair.response().robot_id.serial_number for pair in pairs] == [
+            '0', '1', '2', '3', '4'
+        ]
+        assert [pair.request() for pair in pairs] == requests[:5]
+        assert pairs[1].request_type == robot_id.RobotIdRequest.DESCRIPTOR.full_name
+        assert grpc_reader.latencies('robot-id') == {
+            robot_id.RobotIdRequest.DESCRIPTOR.full_name: [20, 50, 10, 70, 30]
+        }
+    os.unlink(filename)
+
+
+def test_grpc_request_response_pairs_same_header():
+    """Test matching requests which share a header to their responses in order."""
+    filename = os.path.join(gettempdir(), 'test_grpc_pairs_same_header.bddf')
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        grpc_log = GrpcServiceWriter(data_writer, 'robot-id')
+        # Two requests with the same client and timestamp, and two with empty headers.
+        for client_name in ('client', 'client', '', ''):
+            request = robot_id.RobotIdRequest()
+            request.header.client_name = client_name
+            if client_name:
+                request.header.request_timestamp.FromNanoseconds(1000)
+            grpc_log.log_request(request)
+        for idx, client_name in enumerate(('client', '', 'client', '')):
+            response = robot_id.RobotIdResponse()
+            response.header.response_timestamp.FromNanoseconds(2000 + idx)
+            response.header.request_header.client_name = client_name
+            if client_name:
+                response.header.request_header.request_timestamp.FromNanoseconds(1000)
+            response.robot_id.serial_number = str(idx)
+            grpc_log.log_response(response)
+
+    with DataReader(filename=filename) as data_reader:
+        grpc_reader = GrpcReader(data_reader, [robot_id.RobotIdRequest, robot_id.RobotIdResponse])
+        pairs = grpc_reader.request_response_pairs('robot-id')
+        # Each request is paired once, with the responses to its header in the order logged.
+        assert sorted((pair.request_index, pair.response().robot_id.serial_number)
+                      for pair in pairs) == [(0, '0'), (1, '2'), (2, '1'), (3, '3')]
+    os.unlink(filename)
+
+
+def test_grpc_request_response_pairs_request_types():
+    """Test matching requests of different types which share a header to their responses."""
+    filename = os.path.join(gettempdir(), 'test_grpc_pairs_request_types.bddf')
+    requests = [robot_state.RobotStateRequest(), robot_state.RobotMetricsRequest()]
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        grpc_log = GrpcServiceWriter(data_writer, 'robot-state')
+        for request in requests:
+            request.header.client_name = 'client'
+            request.header.request_timestamp.FromNanoseconds(1000)
+            grpc_log.log_request(request)
+        # Respond to the second request first, with only its header.
+        response = robot_state.RobotMetricsResponse()
+        response.header.response_timestamp.FromNanoseconds(2000)
+        response.header.request_header.CopyFrom(requests[1].header)
+        grpc_log.log_response(response)
+        response = robot_state.RobotStateResponse()
+        response.header.response_timestamp.FromNanoseconds(3000)
+        response.header.request.Pack(requests[0])
+        grpc_log.log_response(response)
+
+    proto_types = [
+        robot_state.RobotStateRequest, robot_state.RobotStateResponse,
+        robot_state.RobotMetricsRequest, robot_state.RobotMetricsResponse
+    ]
+    with DataReader(filename=filename) as data_reader:
+        grpc_reader = GrpcReader(data_reader, proto_types)
+        pairs = grpc_reader.request_response_pairs('robot-state')
+        assert sorted((pair.request_type, pair.response_timestamp_nsec) for pair in pairs) == [
+            (robot_state.RobotMetricsRequest.DESCRIPTOR.full_name, 2000),
+            (robot_state.RobotStateRequest.DESCRIPTOR.full_name, 3000),
+        ]
+    os.unlink(filename)
+
+
+def _write_test_messages(filename, num_messages):
+    """Write num_messages OperatorComments, with timestamps 0, 10, 20, ... nsec."""
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        proto_writer = ProtobufSeriesWriter(data_writer, OperatorComment)
+        for idx in range(num_messages):
+            proto_writer.write(idx * 10, OperatorComment(message=str(idx)))
+
+
+def test_read_mmap():
+    """Test reading a file through a memory-map."""
+    filename = os.path.join(gettempdir(), 'test_mmap.bddf')
+    _write_test_messages(filename, 5)
+
+    with DataReader(filename=filename, use_mmap=True) as data_reader:
+        assert data_reader.use_mmap
+        _desc, timestamp_, data_ = data_reader.read(0, 3)
+        assert isinstance(data_, memoryview)
+        assert timestamp_ == 30
+        assert data_ == OperatorComment(message='3').SerializeToString()
+
+        operator_message_reader = ProtobufChannelReader(ProtobufReader(data_reader),
+                                                        OperatorComment)
+        assert [msg.message for _, msg in operator_message_reader] == [str(i) for i in range(5)]
+
+    # The memoryview remains readable after the reader is closed.
+    assert bytes(data_) == OperatorComment(message='3').SerializeToString()
+    os.unlink(filename)
+
+
+def test_read_range():
+    """Test reading the messages of a series within a time range."""
+    filename = os.path.join(gettempdir(), 'test_range.bddf')
+    _write_test_messages(filename, 20)
+
+    with DataReader(filename=filename) as data_reader:
+        assert list(data_reader.series_timestamps(0)) == list(range(0, 200, 10))
+        assert list(data_reader.index_range(0, 25, 60)) == [3, 4, 5]
+        assert list(data_reader.index_range(0, 30, 30)) == []
+        assert list(data_reader.index_range(0, None, 20)) == [0, 1]
+        assert list(data_reader.index_range(0, 185)) == [19]
+        assert [ts for _, ts, _ in data_reader.read_range(0, 100, 130)] == [100, 110, 120]
+
+        proto_reader = ProtobufReader(data_reader)
+        assert [msg.message for _, _, msg in proto_reader.read_range(0, OperatorComment, 50, 70)
+               ] == ['5', '6']
+        channel_reader = ProtobufChannelReader(proto_reader, OperatorComment)
+        assert [(ts, msg.message) for ts, msg in channel_reader.read_range(180)
+               ] == [(180, '18'), (190, '19')]
+    os.unlink(filename)
+
+
+def test_block_cache():
+    """Test the LRU block cache and read-ahead of DataReader."""
+    filename = os.path.join(gettempdir(), 'test_block_cache.bddf')
+    _write_test_messages(filename, 40)
+    message_nbytes = len(OperatorComment(message='10').SerializeToString())
+
+    infile = _CountingFile(open(filename, 'rb'))
+    with DataReader(infile, cache_bytes=10 * message_nbytes, read_ahead_blocks=0) as data_reader:
+        for index_in_series in (10, 11, 10, 12, 11, -1):
+            _desc, timestamp_, data_ = data_reader.read(0, index_in_series)
+            assert timestamp_ == (index_in_series % 40) * 10
+            assert data_ == OperatorComment(
+                message=str(index_in_series % 40)).SerializeToString()
+        assert (data_reader.cache_hits, data_reader.cache_misses) == (2, 4)
+        assert data_reader.cache_nbytes == 4 * message_nbytes
+
+        # The least-recently used blocks are evicted to stay within cache_bytes.
+        for index_in_series in range(20, 30):
+            data_reader.read(0, index_in_series)
+        assert data_reader.cache_nbytes <= 10 * message_nbytes
+        num_read_calls = infile.num_read_calls
+        data_reader.read(0, 29)
+        data_reader.read(0, 10)
+        assert infile.num_read_calls > num_read_calls
+        assert (data_reader.cache_hits, data_reader.cache_misses) == (3, 15)
+        data_reader.clear_cache()
+        assert data_reader.cache_nbytes == 0
+
+    # Reading in order reads the following blocks ahead with a single read.
+    infile = _CountingFile(open(filename, 'rb'))
+    with DataReader(infile, cache_bytes=1000000, read_ahead_blocks=8) as data_reader:
+        num_read_calls = infile.num_read_calls
+        messages = [data_reader.read(0, idx)[2] for idx in range(40)]
+        assert messages == [
+            OperatorComment(message=str(idx)).SerializeToString() for idx in range(40)
+        ]
+        assert infile.num_read_calls - num_read_calls < 40
+        assert data_reader.cache_hits > 30
+    os.unlink(filename)
+
+
+def test_read_range_unsorted():
+    """Test time ranges over a series whose timestamps are not in order."""
+    filename = os.path.join(gettempdir(), 'test_range_unsorted.bddf')
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        series_index = data_writer.add_message_series('bosdyn/test', {'channel': 'a'},
+                                                      'text/plain', 'text')
+        for timestamp in (30, 10, 20, 40):
+            data_writer.write_data(series_index, timestamp, str(timestamp).encode())
+
+    with DataReader(filename=filename) as data_reader:
+        assert [bytes(data) for _, _, data in data_reader.read_range(0, 15, 35)
+               ] == [b'30', b'20']
+    os.unlink(filename)
+
+
+def test_read_decimated_and_bucketed():
+    """Test choosing messages to read from the timestamps in the index."""
+    filename = os.path.join(gettempdir(), 'test_decimated.bddf')
+    _write_test_messages(filename, 20)
+
+    with DataReader(filename=filename) as data_reader:
+        assert [ts for _, ts, _ in data_reader.read_decimated(0, 5)] == [0, 50, 100, 150]
+        assert [ts for _, ts, _ in data_reader.read_decimated(0, 4, 25, 130)] == [30, 70, 110]
+        with pytest.raises(ValueError):
+            data_reader.index_decimated(0, 0)
+
+        assert [ts for _, ts, _ in data_reader.read_bucketed(0, 45)] == [0, 50, 90, 140, 180]
+        assert [ts for _, ts, _ in data_reader.read_bucketed(0, 45, last=True)
+               ] == [40, 80, 130, 170, 190]
+        # Buckets start at start_nsec.
+        assert data_reader.index_bucketed(0, 30, start_nsec=25, end_nsec=100) == [3, 6, 9]
+        assert data_reader.index_bucketed(0, 30, True, 25, 100) == [5, 8, 9]
+        with pytest.raises(ValueError):
+            data_reader.index_bucketed(0, 0)
+
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        series_index = data_writer.add_message_series('bosdyn/test', {'channel': 'a'},
+                                                      'text/plain', 'text')
+        for timestamp in (30, 10, 20, 40, 5, 35):
+            data_writer.write_data(series_index, timestamp, str(timestamp).encode())
+    with DataReader(filename=filename) as data_reader:
+        assert [ts for _, ts, _ in data_reader.read_bucketed(0, 20)] == [5, 20, 40]
+        assert [ts for _, ts, _ in data_reader.read_bucketed(0, 20, last=True)] == [10, 35, 40]
+    os.unlink(filename)
+
+
+def test_index_cache():
+    """Test writing, loading and invalidating the sidecar index cache."""
+    filename = os.path.join(gettempdir(), 'test_index_cache.bddf')
+    cache_filename = index_cache_filename(filename)
+    if os.path.exists(cache_filename):
+        os.unlink(cache_filename)
+    _write_test_messages(filename, 10)
+
+    with DataReader(filename=filename, index_cache=True) as data_reader:
+        expected_block_index = data_reader.series_block_index(0)
+    assert os.path.exists(cache_filename)
+
+    with DataReader(filename=filename, index_cache=True) as data_reader:
+        assert data_reader.series_descriptor(0).message_type.type_name == (
+            OperatorComment.DESCRIPTOR.full_name)
+        assert list(data_reader.series_timestamps(0)) == list(range(0, 100, 10))
+        assert data_reader.series_block_index(0) == expected_block_index
+        _desc, timestamp_, data_ = data_reader.read(0, 4)
+        assert timestamp_ == 40
+        assert data_ == OperatorComment(message='4').SerializeToString()
+
+    # Re-writing the file invalidates the cache, which is then re-written.
+    _write_test_messages(filename, 3)
+    with DataReader(filename=filename, index_cache=True) as data_reader:
+        assert data_reader.num_data_blocks(0) == 3
+    with DataReader(filename=filename, index_cache=True) as data_reader:
+        assert list(data_reader.series_timestamps(0)) == [0, 10, 20]
+
+    # A corrupt cache is ignored.
+    with open(cache_filename, 'wb') as outfile:
+        outfile.write(b'BDDFIDX1')
+    with DataReader(filename=filename, index_cache=True) as data_reader:
+        assert data_reader.num_data_blocks(0) == 3
+    os.unlink(cache_filename)
+    os.unlink(filename)
+
+
+@pytest.mark.parametrize('prefetch_blocks', [0, 2])
+def test_multi_file_reader(prefetch_blocks):
+    """Test merging the data of several files in timestamp order."""
+    directory = tempfile.mkdtemp(dir=gettempdir())
+    # (channel, timestamps) written to each file.  Files 0 and 1 overlap in time.
+    contents = [
+        [('a', [0, 20, 40]), ('b', [5, 15])],
+        [('a', [30, 50, 70]), ('c', [60])],
+        [('b', [100, 110])],
+    ]
+    for file_idx, file_contents in enumerate(contents):
+        with open(os.path.join(directory, 'log{}.bddf'.format(file_idx)), 'wb') as outfile, \
+                DataWriter(outfile) as data_writer:
+            for channel, timestamps in file_contents:
+                proto_writer = ProtobufSeriesWriter(data_writer, OperatorComment,
+                                                    channel_name=channel)
+                for timestamp_ in timestamps:
+                    proto_writer.write(timestamp_, OperatorComment(message=str(timestamp_)))
+
+    reader = MultiFileReader(directory, prefetch_blocks=prefetch_blocks)
+    channels = [identifier.spec['bosdyn:channel'] for identifier in reader.series_identifiers]
+    assert channels == ['a', 'b', 'c']
+    assert reader.series_spec_to_index(dict(reader.series_identifiers[1].spec)) == 1
+    merged = [(channels[series_index], timestamp_, OperatorComment.FromString(data_).message)
+              for series_index, timestamp_, data_ in reader]
+    assert [timestamp_ for _, timestamp_, _ in merged] == [0, 5, 15, 20, 30, 40, 50, 60, 70, 100,
+                                                           110]
+    assert all(message == str(timestamp_) for _, timestamp_, message in merged)
+    assert [channel for channel, _, _ in merged if channel == 'b'] == ['b'] * 4
+
+    reader = MultiFileReader(
+        [os.path.join(directory, name) for name in ('log2.bddf', 'log1.bddf', 'log0.bddf')],
+        channels=['a', 'b'], prefetch_blocks=prefetch_blocks)
+    assert reader.filenames == [
+        os.path.join(directory, 'log{}.bddf'.format(idx)) for idx in range(3)
+    ]
+    assert [timestamp_ for _, timestamp_, _ in reader.read_range(20, 105)] == [20, 30, 40, 50, 70,
+                                                                               100]
+    # Stopping iteration early closes the files.
+    iterator = iter(reader)
+    next(iterator)
+    iterator.close()
+
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def test_rewrite_file():
+    """Test splitting a file by time window and by size, and re-blocking POD series."""
+    directory = tempfile.mkdtemp(dir=gettempdir())
+    filename = os.path.join(directory, 'input.bddf')
+    pod_spec = {'varname': 'counter'}
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        metadata_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='meta',
+                                               is_metadata=True)
+        comment_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='comment')
+        pod_index = data_writer.add_pod_series('bosdyn/test/pod', pod_spec, bddf.TYPE_INT32)
+        metadata_writer.write(0, OperatorComment(message='meta0'))
+        for timestamp_ in range(0, 100, 10):
+            if timestamp_ == 50:
+                metadata_writer.write(timestamp_, OperatorComment(message='meta50'))
+            comment_writer.write(timestamp_, OperatorComment(message=str(timestamp_)))
+            data_writer.write_data(pod_index, timestamp_, struct.pack('<i', timestamp_))
+
+    def _read_output(output_filename):
+        with DataReader(filename=output_filename) as data_reader:
+            protobuf_reader = ProtobufReader(data_reader)
+            meta = [
+                message.message for _, _, message in protobuf_reader.read_range(
+                    protobuf_reader.series_index('meta'), OperatorComment)
+            ]
+            comment_index = protobuf_reader.series_index('comment')
+            comments = list(data_reader.series_timestamps(comment_index))
+            pod_index_ = data_reader.series_spec_to_index(pod_spec)
+            pod_blocks = [
+                struct.unpack('<{}i'.format(len(data_) // 4), data_)
+                for data_ in (data_reader.read(pod_index_, idx)[2]
+                              for idx in range(data_reader.num_data_blocks(pod_index_)))
+            ]
+            return meta, comments, pod_blocks
+
+    output_format = os.path.join(directory, 'window-{index}-{start_nsec}.bddf')
+    with open(filename, 'rb') as infile:
+        outputs = rewrite_file(infile, output_format, window_nsec=40, pod_block_bytes=8,
+                               index_cache=True)
+    assert outputs == [output_format.format(index=idx, start_nsec=idx * 40) for idx in range(3)]
+    assert all(os.path.exists(index_cache_filename(output)) for output in outputs)
+    # Every output starts with the latest metadata, so it can be read alone.
+    assert _read_output(outputs[0]) == (['meta0'], [0, 10, 20, 30], [(0, 10), (20, 30)])
+    assert _read_output(outputs[1]) == (['meta0', 'meta50'], [40, 50, 60, 70], [(40, 50),
+                                                                               (60, 70)])
+    assert _read_output(outputs[2]) == (['meta50'], [80, 90], [(80, 90)])
+
+    # Joining the windows again gives a file with the same data, apart from the copied metadata.
+    joined = os.path.join(directory, 'joined.bddf')
+    assert concatenate_files(outputs, joined) == 19
+    assert _read_output(joined) == (['meta0', 'meta0', 'meta50', 'meta50'],
+                                    list(range(0, 100, 10)), [(0, 10), (20, 30), (40, 50),
+                                                              (60, 70), (80, 90)])
+
+    output_format = os.path.join(directory, 'size-{index}.bddf')
+    with open(filename, 'rb') as infile:
+        outputs = rewrite_file(infile, output_format, max_bytes=os.path.getsize(filename) // 2)
+    assert len(outputs) > 1
+    comments = []
+    for output in outputs:
+        meta, output_comments, pod_blocks = _read_output(output)
+        assert meta
+        assert [block[0] for block in pod_blocks] == output_comments
+        comments.extend(output_comments)
+    assert comments == list(range(0, 100, 10))
+
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def test_rewrite_file_pod_blocks():
+    """Test that re-blocked POD data keeps its additional indexes and counts toward max_bytes."""
+    directory = tempfile.mkdtemp(dir=gettempdir())
+    filename = os.path.join(directory, 'input.bddf')
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        pod_index = data_writer.add_series('bosdyn/test/pod', {'varname': 'counter'},
+                                           pod_type=bddf.PodTypeDescriptor(
+                                               pod_type=bddf.TYPE_INT32),
+                                           additional_index_names=['sequence'])
+        for idx in range(1000):
+            data_writer.write_data(pod_index, idx, struct.pack('<i', idx), [1000 + idx])
+
+    max_bytes = 1000
+    output_format = os.path.join(directory, 'size-{index}.bddf')
+    with open(filename, 'rb') as infile:
+        outputs = rewrite_file(infile, output_format, max_bytes=max_bytes, pod_block_bytes=4000)
+    assert len(outputs) > 1
+    samples = []
+    for output in outputs:
+        with DataReader(filename=output) as data_reader:
+            blocks = [data_reader.read(0, idx) for idx in range(data_reader.num_data_blocks(0))]
+        # The pending re-blocked data was written before the output grew beyond max_bytes.
+        assert sum(len(data) for _, _, data in blocks) <= max_bytes
+        for desc, _, data in blocks:
+            block_samples = struct.unpack('<{}i'.format(len(data) // 4), data)
+            assert desc.timestamp.ToNanoseconds() == block_samples[0]
+            assert list(desc.additional_indexes) == [1000 + block_samples[0]]
+            samples.extend(block_samples)
+    assert samples == list(range(1000))
+
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+def _timestamp_and_message(timestamp_nsec, message):
+    return timestamp_nsec, message.message
+
+
+@pytest.mark.parametrize('chunk_size', [None, 3])
+def test_map_parallel(chunk_size):
+    """Test decoding messages in worker processes."""
+    filename = os.path.join(gettempdir(), 'test_map_parallel.bddf')
+    _write_test_messages(filename, 20)
+
+    with DataReader(filename=filename) as data_reader:
+        proto_reader = ProtobufReader(data_reader)
+        channel_name = OperatorComment.DESCRIPTOR.full_name
+        results = list(
+            proto_reader.map_parallel(channel_name, OperatorComment, _timestamp_and_message,
+                                      workers=2, chunk_size=chunk_size))
+        assert results == [(idx * 10, str(idx)) for idx in range(20)]
+        results = list(
+            proto_reader.map_parallel(channel_name, OperatorComment, _timestamp_and_message,
+                                      workers=2, chunk_size=chunk_size, start_nsec=55,
+                                      end_nsec=100))
+        assert results == [(idx * 10, str(idx)) for idx in range(6, 10)]
+    os.unlink(filename)
+
+
+def test_export(capsys):
+    """Test exporting fields of a protobuf channel to columnar files."""
+    numpy = pytest.importorskip('numpy')
+    filename = os.path.join(gettempdir(), 'test_export.bddf')
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        proto_writer = ProtobufSeriesWriter(data_writer, RobotState, channel_name='robot_state')
+        for idx in range(10):
+            state = RobotState()
+            state.kinematic_state.acquisition_timestamp.FromNanoseconds(idx * 1000 + 1)
+            for joint_idx in range(3):
+                joint = state.kinematic_state.joint_states.add(name='j{}'.format(joint_idx))
+                joint.position.value = idx + 0.5 * joint_idx
+            proto_writer.write(idx * 1000, state)
+
+    fields = ['kinematic_state.joint_states[*].position',
+              'kinematic_state.acquisition_timestamp', 'kinematic_state.joint_states[1].name']
+    with DataReader(filename=filename) as data_reader:
+        proto_reader = ProtobufReader(data_reader)
+        csv_filename = os.path.join(gettempdir(), 'test_export.csv')
+        assert export_channel(proto_reader, 'robot_state', RobotState, fields, csv_filename,
+                              chunk_rows=3) == 10
+        with open(csv_filename) as infile:
+            rows = list(csv.reader(infile))
+        assert rows[0] == [
+            'timestamp_nsec', 'kinematic_state.joint_states[0].position',
+            'kinematic_state.joint_states[1].position', 'kinematic_state.joint_states[2].position',
+            'kinematic_state.acquisition_timestamp', 'kinematic_state.joint_states[1].name'
+        ]
+        assert rows[3] == ['2000', '2.0', '2.5', '3.0', '2001', 'j1']
+        assert len(rows) == 11
+
+        npz_filename = os.path.join(gettempdir(), 'test_export.npz')
+        assert export_channel(proto_reader, 'robot_state', RobotState, fields[:2], npz_filename,
+                              chunk_rows=4, start_nsec=2000, end_nsec=7000) == 5
+        with numpy.load(npz_filename) as arrays:
+            assert list(arrays['timestamp_nsec']) == [2000, 3000, 4000, 5000, 6000]
+            assert arrays['kinematic_state.joint_states[2].position'].dtype == numpy.float64
+            assert list(arrays['kinematic_state.joint_states[2].position']) == [3, 4, 5, 6, 7]
+            assert arrays['kinematic_state.acquisition_timestamp'][0] == 2001
+        with pytest.raises(ValueError):
+            export_channel(proto_reader, 'robot_state', RobotState, fields, npz_filename)
+
+        for bad_path in ('kinematic_state.joint_states.position', 'kinematic_state[*]',
+                         'kinematic_state', 'no_such_field', 'kinematic_state.joint_states[x]'):
+            with pytest.raises(ValueError):
+                export_channel(proto_reader, 'robot_state', RobotState, [bad_path], csv_filename)
+
+    assert export_main([filename, '--list']) == 0
+    assert 'robot_state\tbosdyn.api.RobotState' in capsys.readouterr().out
+    assert export_main([
+        filename, '-c', 'robot_state', '-f', 'kinematic_state.joint_states[0].position', '-o',
+        csv_filename
+    ]) == 0
+    with open(csv_filename) as infile:
+        assert len(list(csv.reader(infile))) == 11
+    for output in (csv_filename, npz_filename, filename):
+        os.unlink(output)
+
+
+def test_read_series_array():
+    """Test reading multi-dimensional POD data as numpy arrays."""
+    np = pytest.importorskip('numpy')
+    filename = os.path.join(gettempdir(), 'test_pod_array.bddf')
+    pod_spec = {'varname': 'matrix'}
+    expected = np.arange(24, dtype='<f8').reshape(4, 2, 3)
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        series_index = data_writer.add_pod_series('bosdyn/test/pod', pod_spec, bddf.TYPE_FLOAT64,
+                                                  dimension=[2, 3])
+        # Two samples in each block.
+        for block_idx in range(2):
+            samples = expected[block_idx * 2:block_idx * 2 + 2]
+            data_writer.write_data(series_index, block_idx,
+                                   struct.pack('<12d', *samples.flatten()))
+
+    with DataReader(filename=filename) as data_reader:
+        pod_reader = PodSeriesReader(data_reader, pod_spec)
+        assert pod_reader.num_data_blocks == 2
+        _timestamp, samples = pod_reader.read_samples(1)
+        assert samples == expected[2:].tolist()
+
+        values = pod_reader.read_series_array()
+        assert values.shape == (4, 2, 3)
+        assert values.dtype == np.float64
+        assert (values == expected).all()
+        assert (pod_reader.read_series_array(1, 2) == expected[2:]).all()
+    os.unlink(filename)
+
+
+def test_pod_write_samples():
+    """Test writing arrays of POD samples."""
+    np = pytest.importorskip('numpy')
+    filename = os.path.join(gettempdir(), 'test_pod_write_samples.bddf')
+    vector_spec = {'varname': 'vector'}
+    scalar_spec = {'varname': 'scalar'}
+    expected = np.arange(30, dtype=np.float32).reshape(10, 3)
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        # Blocks hold 4 samples of 12 bytes.
+        vector_writer = PodSeriesWriter(data_writer, 'bosdyn/test/pod', vector_spec,
+                                        bddf.TYPE_FLOAT32, dimensions=[3], data_block_size=50)
+        vector_writer.write(1000, expected[0])
+        vector_writer.write_samples(1010, expected[1:], sample_period_nsec=10)
+        with pytest.raises(DataFormatError):
+            vector_writer.write_samples(2000, np.zeros((2, 4)))
+
+        scalar_writer = PodSeriesWriter(data_writer, 'bosdyn/test/pod', scalar_spec,
+                                        bddf.TYPE_INT16)
+        scalar_writer.write_samples(5, range(7))
+        scalar_writer.write(6, 7)
+
+    with DataReader(filename=filename) as data_reader:
+        vector_reader = PodSeriesReader(data_reader, vector_spec)
+        assert vector_reader.num_data_blocks == 3
+        vector_index = data_reader.series_spec_to_index(vector_spec)
+        assert list(data_reader.series_timestamps(vector_index)) == [1000, 1040, 1080]
+        assert (vector_reader.read_series_array() == expected).all()
+
+        scalar_reader = PodSeriesReader(data_reader, scalar_spec)
+        assert scalar_reader.read_series_array().tolist() == list(range(8))
+    os.unlink(filename)
+
+
+def test_compression():
+    """Test writing and reading series with compressed data blocks."""
+    filename = os.path.join(gettempdir(), 'test_compression.bddf')
+    message = OperatorComment(message='compress me ' * 100)
+    register_codec(BlockCodec('test-reverse', lambda data: bytes(data)[::-1],
+                              lambda data: bytes(data)[::-1]))
+
+    with open(filename, 'wb') as outfile:
+        with pytest.raises(DataFormatError):
+            DataWriter(outfile, compression='bogus')
+
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        with pytest.raises(AddSeriesError):
+            ProtobufSeriesWriter(data_writer, OperatorComment, compression='zlib')
+
+    with open(filename, 'wb') as outfile, \
+         DataWriter(outfile, compression='zlib') as data_writer:
+        zlib_writer = ProtobufSeriesWriter(data_writer, OperatorComment)
+        plain_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='plain',
+                                            compression='none')
+        custom_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='custom',
+                                             compression='test-reverse')
+        for idx in range(3):
+            zlib_writer.write(idx, message)
+            plain_writer.write(idx, message)
+            custom_writer.write(idx, message)
+
+    # Only the plain and custom series hold uncompressed copies of the message.
+    assert os.path.getsize(filename) < 7 * len(message.SerializeToString())
+
+    with DataReader(filename=filename) as data_reader:
+        assert data_reader.version.minor_version == 1
+        assert data_reader.series_descriptor(0).annotations['bosdyn:compression'] == 'zlib'
+        assert 'bosdyn:compression' not in data_reader.series_descriptor(1).annotations
+        assert data_reader.total_bytes(0) == 3 * len(message.SerializeToString())
+        proto_reader = ProtobufReader(data_reader)
+        for channel_name in (OperatorComment.DESCRIPTOR.full_name, 'plain', 'custom'):
+            channel_reader = ProtobufChannelReader(proto_reader, OperatorComment, channel_name)
+            assert [msg for _, msg in channel_reader] == [message] * 3
+
+    with open(filename, 'rb') as infile, StreamDataReader(infile) as data_reader:
+        for _ in range(9):
+            _desc, _sdesc, data = data_reader.read_data_block()
+            assert data == message.SerializeToString()
+    os.unlink(filename)
+
+
+class _GatedFile:
+    """File wrapper whose writes wait until the gate is opened."""
+
+    def __init__(self, outfile):
+        self._outfile = outfile
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def write(self, data):
+        self.gate.wait()
+        return self._outfile.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._outfile, name)
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+def test_async_data_writer():
+    """Test writing data from a background thread."""
+    filename = os.path.join(gettempdir(), 'test_async.bddf')
+    with open(filename, 'wb') as outfile, \
+         AsyncDataWriter(DataWriter(outfile), max_queue_size=4) as data_writer:
+        proto_writer = ProtobufSeriesWriter(data_writer, OperatorComment)
+        pod_writer = PodSeriesWriter(data_writer, 'bosdyn/test/pod', {'varname': 'x'},
+                                     bddf.TYPE_INT32)
+        for idx in range(100):
+            proto_writer.write(idx, OperatorComment(message=str(idx)))
+            pod_writer.write(idx, idx)
+        assert data_writer.flush(timeout=5)
+        assert data_writer.num_written == 100
+        assert data_writer.max_queue_depth <= 4
+
+    with DataReader(filename=filename) as data_reader:
+        channel_reader = ProtobufChannelReader(ProtobufReader(data_reader), OperatorComment)
+        assert [msg.message for _, msg in channel_reader] == [str(i) for i in range(100)]
+        _timestamp, samples = PodSeriesReader(data_reader, {'varname': 'x'}).read_samples(0)
+        assert samples == list(range(100))
+    os.unlink(filename)
+
+
+@pytest.mark.parametrize('overflow_policy,expected', [(OverflowPolicy.DROP_OLDEST, [0, 2, 3]),
+                                                      (OverflowPolicy.DROP_NEWEST, [0, 1, 2])])
+def test_async_data_writer_overflow(overflow_policy, expected):
+    """Test dropping data when the queue of an AsyncDataWriter is full."""
+    filename = os.path.join(gettempdir(), 'test_async_overflow.bddf')
+    with open(filename, 'wb') as outfile:
+        gated_file = _GatedFile(outfile)
+        data_writer = AsyncDataWriter(DataWriter(gated_file), max_queue_size=2,
+                                      overflow_policy=overflow_policy)
+        series_index = data_writer.add_message_series('bosdyn/test', {'channel': 'a'},
+                                                      'text/plain', 'text')
+        gated_file.gate.clear()
+        data_writer.write_data(series_index, 0, b'0')
+        # Wait for the writer thread to take the first block and stall on the write.
+        _wait_until(lambda: data_writer.queue_depth == 0)
+        results = [
+            data_writer.write_data(series_index, idx, str(idx).encode()) for idx in (1, 2, 3)
+        ]
+        assert results == [True, True, overflow_policy == OverflowPolicy.DROP_OLDEST]
+        assert data_writer.num_dropped == 1
+        gated_file.gate.set()
+        data_writer.close()
+
+    with DataReader(filename=filename) as data_reader:
+        assert list(data_reader.series_timestamps(0)) == expected
+    os.unlink(filename)
+
+
+def test_async_data_writer_close_while_blocked():
+    """Test closing an AsyncDataWriter while a producer waits for room in the queue."""
+    filename = os.path.join(gettempdir(), 'test_async_close.bddf')
+    with open(filename, 'wb') as outfile:
+        gated_file = _GatedFile(outfile)
+        data_writer = AsyncDataWriter(DataWriter(gated_file), max_queue_size=1)
+        series_index = data_writer.add_message_series('bosdyn/test', {'channel': 'a'},
+                                                      'text/plain', 'text')
+        gated_file.gate.clear()
+        data_writer.write_data(series_index, 0, b'0')
+        _wait_until(lambda: data_writer.queue_depth == 0)
+        data_writer.write_data(series_index, 1, b'1')
+
+        errors = []
+
+        def _produce():
+            try:
+                data_writer.write_data(series_index, 2, b'2')
+            except ValueError as err:
+                errors.append(err)
+
+        producer = threading.Thread(target=_produce)
+        producer.start()
+        closer = threading.Thread(target=data_writer.close)
+        closer.start()
+        try:
+            # The blocked producer is refused rather than queuing data which would be lost.
+            producer.join(timeout=5)
+            assert not producer.is_alive()
+            assert len(errors) == 1
+        finally:
+            gated_file.gate.set()
+        closer.join(timeout=5)
+        assert not closer.is_alive()
+
+    with DataReader(filename=filename) as data_reader:
+        assert list(data_reader.series_timestamps(0)) == [0, 1]
+    os.unlink(filename)
+
+
+class _CountingFile:
+    """File wrapper which counts the bytes read."""
+
+    def __init__(self, infile, seekable=True):
+        self._infile = infile
+        self._seekable = seekable
+        self.num_read = 0
+        self.num_read_calls = 0
+
+    def read(self, nbytes):
+        data = self._infile.read(nbytes)
+        self.num_read += len(data)
+        self.num_read_calls += 1
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._infile.seek(offset, whence)
+
+    def tell(self):
+        return self._infile.tell()
+
+    def seekable(self):
+        return self._seekable
+
+    def close(self):
+        self._infile.close()
+
+
+@pytest.mark.parametrize('verify_checksum,seekable', [(True, True), (False, True), (False, False)])
+def test_stream_series_filter(verify_checksum, seekable):
+    """Test reading only the data of some series from a stream."""
+    filename = os.path.join(gettempdir(), 'test_stream_filter.bddf')
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        big_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='big')
+        small_writer = ProtobufSeriesWriter(data_writer, OperatorComment, channel_name='small')
+        for idx in range(10):
+            big_writer.write(idx, OperatorComment(message='x' * 10000))
+            small_writer.write(idx, OperatorComment(message=str(idx)))
+    file_size = os.path.getsize(filename)
+
+    infile = _CountingFile(open(filename, 'rb'), seekable)
+    with StreamDataReader(
+            infile, verify_checksum=verify_checksum,
+            series_filter=lambda desc: desc.series_identifier.spec['bosdyn:channel'] == 'small'
+    ) as data_reader:
+        messages = []
+        while True:
+            try:
+                desc, sdesc, data_ = data_reader.read_data_block()
+            except EOFError:
+                break
+            assert sdesc.series_identifier.spec['bosdyn:channel'] == 'small'
+            messages.append(OperatorComment.FromString(data_).message)
+        assert messages == [str(idx) for idx in range(10)]
+        assert len(data_reader.series_block_index(1).block_entries) == 10
+        assert not data_reader.series_block_index(0).block_entries
+        if verify_checksum:
+            assert data_reader.read_checksum == data_reader.checksum
+        else:
+            assert data_reader.read_checksum is None
+        if verify_checksum or not seekable:
+            assert infile.num_read == file_size - len(END_MAGIC)
+        else:
+            assert infile.num_read < file_size / 10
+    os.unlink(filename)
+
+
+def test_tailing_stream_reader():
+    """Test following a file with checkpoints while it is being written."""
+    filename = os.path.join(gettempdir(), 'test_tailing.bddf')
+    data_writer = DataWriter(open(filename, 'wb'), checkpoint_interval_sec=0)
+    proto_writer = ProtobufSeriesWriter(data_writer, OperatorComment)
+    proto_writer.write(0, OperatorComment(message='0'))
+
+    with open(filename, 'rb') as infile:
+        reader = TailingStreamReader(infile, poll_interval_sec=0.01, timeout_sec=0.05)
+        assert [desc.timestamp.ToNanoseconds() for desc, _, _ in reader.follow()] == [0]
+        with pytest.raises(TimeoutError):
+            reader.read_data_block()
+        for idx in range(1, 4):
+            proto_writer.write(idx * 10, OperatorComment(message=str(idx)))
+        assert [desc.timestamp.ToNanoseconds() for desc, _, _ in reader.follow()] == [10, 20, 30]
+
+    # Without a timeout, following continues until stop() is called.
+    with open(filename, 'rb') as infile:
+        reader = TailingStreamReader(infile, poll_interval_sec=0.01)
+        stop_timer = threading.Timer(0.1, reader.stop)
+        stop_timer.start()
+        assert len(list(reader.follow())) == 4
+        stop_timer.join()
+
+    data_writer._close()  # pylint: disable=protected-access
+    with open(filename, 'rb') as infile:
+        data = infile.read()
+    with DataReader(filename=filename) as data_reader:
+        assert list(data_reader.series_timestamps(0)) == [0, 10, 20, 30]
+
+    # Each block is in one checkpoint, and again in the index at the end of the file.
+    checkpoint_entries = 0
+    with open(filename, 'rb') as infile, StreamDataReader(infile) as stream_reader:
+        while True:
+            try:
+                is_data, desc, _data = stream_reader.read_next_block()
+            except EOFError:
+                break
+            if not is_data and desc.WhichOneof('DescriptorType') == 'series_block_index':
+                checkpoint_entries += len(desc.series_block_index.block_entries)
+    assert checkpoint_entries == 2 * 4
+
+    # Follow a file written a few bytes at a time, so blocks are read while partially written.
+    def _write_slowly():
+        with open(filename, 'wb') as outfile:
+            for offset in range(0, len(data), 7):
+                outfile.write(data[offset:offset + 7])
+                outfile.flush()
+                time.sleep(0.001)
+
+    with open(filename, 'wb'):
+        pass
+    write_thread = threading.Thread(target=_write_slowly)
+    write_thread.start()
+    with open(filename, 'rb') as infile:
+        reader = TailingStreamReader(infile, poll_interval_sec=0.001, timeout_sec=5)
+        assert [
+            (desc.timestamp.ToNanoseconds(), OperatorComment.FromString(data_).message)
+            for desc, _, data_ in reader.follow()
+        ] == [(0, '0'), (10, '1'), (20, '2'), (30, '3')]
+        assert reader.eof
+        assert reader.read_checksum == reader.checksum
+    write_thread.join()
+    os.unlink(filename)
+
+
+def test_stream_index_matches_file_index():
+    """Test that the index built while streaming a file matches the index written in it."""
+    filename = os.path.join(gettempdir(), 'test_stream_index.bddf')
+    with open(filename, 'wb') as outfile, DataWriter(outfile) as data_writer:
+        series_a = data_writer.add_message_series('bosdyn/test', {'channel': 'a'}, 'text/plain',
+                                                  'text', additional_index_names=['idx'])
+        series_b = data_writer.add_message_series('bosdyn/test', {'channel': 'b'}, 'text/plain',
+                                                  'text')
+        with pytest.raises(SeriesNotUniqueError):
+            data_writer.add_message_series('bosdyn/other', {'channel': 'a'}, 'text/plain', 'text')
+        with pytest.raises(DataFormatError):
+            data_writer.write_data(series_a, 0, b'missing additional index')
+        for idx in range(10):
+            data_writer.write_data(series_a, idx, b'a' * (idx + 1), [idx * 2])
+            data_writer.write_data(series_b, idx, b'b')
+
+    with DataReader(filename=filename) as data_reader:
+        file_block_indexes = [data_reader.series_block_index(idx) for idx in (series_a, series_b)]
+    with open(filename, 'rb') as infile, StreamDataReader(infile) as data_reader:
+        with pytest.raises(EOFError):
+            while True:
+                data_reader.read_data_block()
+        assert data_reader.series_block_indexes == file_block_indexes
+    assert file_block_indexes[0].total_bytes == sum(range(1, 11))
+    assert file_block_indexes[0].block_entries[3].additional_indexes == [6]
+    os.unlink(filename)